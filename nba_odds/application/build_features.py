@@ -1,90 +1,259 @@
 """ Module to build features. """
-import pandas as pd
+import logging
+import os
 
+from nba_odds.application.dag import DagExecutor, Stage
+from nba_odds.application.datasets_io import write_dataset
+from nba_odds.application.feature_registry import Feature, FeatureRegistry
+from nba_odds.application.instrumentation import Instrumentation
+from nba_odds.application.stage_cache import StageCache
 from nba_odds.config.config import Paths
+from nba_odds.config.params import EloParams, PerParams
 from nba_odds.features.elo_rating import EloRating
 from nba_odds.features.player_efficiency_rating import PER
 from nba_odds.features.teams_stats import TeamsStats
+from nba_odds.preprocessing.chunked_players_data import ChunkedPlayersData
 from nba_odds.preprocessing.games_per_team import GamesPerTeam
+from nba_odds.preprocessing.id_dictionary import IdDictionary
 from nba_odds.preprocessing.labels import Labels
 from nba_odds.preprocessing.players_data import PlayersData
+from nba_odds.preprocessing.raw_data_loader import RawDataLoader
 from nba_odds.preprocessing.split_on_playoffs import SplitPlayoff
 
+# features of each dataset, the first one gives the lines (team seasons) of the dataset
+preseason_features_registry = FeatureRegistry([
+    Feature('PreseasonTeamsStats', columns=TeamsStats.feature_columns(), prunable=True),
+    Feature('Labels', columns=['won'], keys=['season']),
+    Feature('PreseasonElo', columns=['elo']),
+    Feature('PreseasonPER', columns=PER.feature_columns()),
+])
+playoff_features_registry = FeatureRegistry([
+    Feature('RegularSeasonTeamsStats', columns=TeamsStats.feature_columns(), prunable=True),
+    Feature('Labels', columns=['won'], keys=['season']),
+    Feature('PreplayoffElo', columns=['elo']),
+    Feature('PreplayoffPER', columns=PER.feature_columns()),
+])
 
-def main():
+
+def main(refresh_stages=(), max_workers=None, export_csv=False, report_path=None, profile_stages=(),
+         chunked_box_score=False, preseason_columns=None, playoff_columns=None):
     """ Build features dataset from raws datasets.
+    :param refresh_stages: names of the stages to recompute even if their outputs are in the stage cache.
+    :param max_workers: number of processes running independent stages at the same time.
+    :param export_csv: also write the features datasets as csv.
+    :param report_path: json lines file where the time and memory of each stage are appended, e.g.
+        Paths.run_report, no measure if None.
+    :param profile_stages: names of the stages run under cProfile, when report_path is set.
+    :param chunked_box_score: read and process the box score season by season (ChunkedPlayersData), the memory
+        used by players data is bounded by one season. Features are the same.
+    :param preseason_columns: columns of the preseason dataset (e.g. build_models.columns_to_keep), all if None.
+        Only the stages needed by the requested columns are run, e.g. the box score is not read without PER columns.
+    :param playoff_columns: columns of the playoff dataset, all if None.
     :return: dataset with features by team and season with labels (1 if the team won the nba season.).
     """
-    # raw data
-    basket_ref_games = pd.read_parquet(Paths.path_basket_ref_games)
-    basket_ref_box_score = pd.read_parquet(Paths.path_basket_ref_box_score)
+    instrumentation = Instrumentation(report_path=report_path, profile_stages=profile_stages)
+    stages, columns_values = _build_stages(chunked_box_score, preseason_columns=preseason_columns,
+                                           playoff_columns=playoff_columns)
+    stages_inputs = {name for stage in stages for name in stage.dependency_names}
 
-    # preprocessed data
-    games_per_team = GamesPerTeam(basket_ref_games=basket_ref_games).build_dataset()
-    players_stats, players_with_team = PlayersData(basket_ref_box_score=basket_ref_box_score,
-                                                   games_per_team=games_per_team).build_data()
+    # raw data, game ids are joined on as codes of the dictionary kept between runs
+    id_dictionary = IdDictionary.load(Paths.id_dictionary)
+    raw_data_loader = RawDataLoader(path_basket_ref_games=Paths.path_basket_ref_games,
+                                    path_basket_ref_box_score=Paths.path_basket_ref_box_score,
+                                    id_dictionary=id_dictionary)
+    values = {'basket_ref_games': instrumentation.call('load_games', raw_data_loader.load_games), **columns_values}
+    id_dictionary.save(Paths.id_dictionary)
+    if 'box_score_file' in stages_inputs:
+        # the file is read by the players data stage, its cache key depends on the file path, size and date
+        file_stat = os.stat(Paths.path_basket_ref_box_score)
+        values['box_score_file'] = {'path': Paths.path_basket_ref_box_score, 'size': file_stat.st_size,
+                                    'mtime_ns': file_stat.st_mtime_ns, 'id_dictionary': Paths.id_dictionary}
+    elif 'basket_ref_box_score' in stages_inputs:
+        values['basket_ref_box_score'] = instrumentation.call('load_box_score', raw_data_loader.load_box_score)
 
-    # Labels
-    winner_by_season = Labels(basket_ref_games=basket_ref_games).compute_winner_by_season()
-    elo_rating = EloRating(basket_ref_games=basket_ref_games)
-    all_games_elo = elo_rating.compute()
+    # stages outputs are loaded from the cache when their inputs and parameters did not change
+    cache = StageCache(cache_dir=Paths.cache_dir, refresh=refresh_stages)
+    executor = DagExecutor(stages=stages, max_workers=max_workers, cache=cache,
+                           instrumentation=instrumentation if instrumentation.enabled else None)
+    outputs = executor.run(values)
+    preseason_features, playoff_dataset = outputs['PreseasonFeatures'], outputs['PlayoffFeatures']
 
-    # previous season features
-    preseason_features = _build_preseason_features(all_games_elo, games_per_team, players_stats,
-                                                   players_with_team, winner_by_season)
+    params = {'PerParams': _params(PerParams), 'EloParams': _params(EloParams)}
+    with instrumentation.stage('write_features', inputs=[preseason_features, playoff_dataset]):
+        write_dataset(preseason_features, Paths.output_preseason_features, params=params,
+                      csv_path=Paths.output_preseason_features_csv if export_csv else None)
+        write_dataset(playoff_dataset, Paths.output_preplayoff_features, params=params,
+                      csv_path=Paths.output_preplayoff_features_csv if export_csv else None)
+    if instrumentation.enabled:
+        logging.info(f"Run {instrumentation.run_id} report : {report_path}.")
+    return preseason_features, playoff_dataset
 
-    # regular season features
-    playoff_dataset = _build_playoff_features(all_games_elo, basket_ref_box_score, games_per_team, winner_by_season)
 
-    preseason_features.to_csv(Paths.output_preseason_features, index=False)
-    playoff_dataset.to_csv(Paths.output_preplayoff_features, index=False)
-    return preseason_features, playoff_dataset
+def _build_stages(chunked_box_score=False, preseason_columns=None, playoff_columns=None):
+    """ Features stages needed by the requested columns, independent stages (Elo, Labels, team stats, PER) can run at
+    the same time.
+    :return: list of Stage, dict of the requested columns given to the stages as inputs.
+    """
+    per_params, elo_params = _params(PerParams), _params(EloParams)
+    stages = [
+        # preprocessed data
+        Stage('GamesPerTeam', _build_games_per_team, ['basket_ref_games']),
 
+        # Labels
+        Stage('Labels', _compute_labels, ['basket_ref_games']),
+        Stage('EloRating', _compute_elo, ['basket_ref_games'], params=elo_params),
 
-def _build_preseason_features(all_games_elo, games_per_team, players_stats, players_with_team, winner_by_season):
-    # preseason features
-    teams_stats = TeamsStats(games_per_team=games_per_team).compute_previous_season_features()
-    preseason_elo = EloRating.get_first_elo_season(teams_elo_df=all_games_elo)
-    preseason_per = PER(players_stats=players_stats, players_team=players_with_team).previous_season_per()
+        # previous season features
+        Stage('PreseasonTeamsStats', _compute_previous_season_teams_stats,
+              ['GamesPerTeam', 'PreseasonTeamsStats_columns']),
+        Stage('PreseasonElo', _compute_preseason_elo, ['EloRating'], params=elo_params),
 
-    dataset = _merge_all_features(per=preseason_per, elo=preseason_elo, teams_stats=teams_stats,
-                                  labels=winner_by_season)
-    return dataset
+        # regular season features
+        Stage('RegularSeasonTeamsStats', _compute_regular_season_teams_stats,
+              ['GamesPerTeam', 'RegularSeasonTeamsStats_columns']),
+        Stage('PreplayoffElo', _compute_preplayoff_elo, ['EloRating', 'GamesPerTeam'], params=elo_params),
+    ] + (_build_chunked_per_stages(per_params) if chunked_box_score else _build_per_stages(per_params))
+
+    # datasets, from the features tables of the requested columns
+    columns_values = {}
+    for name, func, registry, columns in (
+            ('PreseasonFeatures', _build_preseason_features, preseason_features_registry, preseason_columns),
+            ('PlayoffFeatures', _build_playoff_features, playoff_features_registry, playoff_columns)):
+        columns_values[f'{name}_columns'] = None if columns is None else list(columns)
+        for feature, feature_columns in registry.select(columns):
+            if feature.prunable:
+                columns_values[f'{feature.name}_columns'] = None if columns is None else feature_columns
+        stages.append(Stage(name, func, [f'{name}_columns'] + registry.dependencies(columns), cached=False))
+    return _needed_stages(stages, targets=['PreseasonFeatures', 'PlayoffFeatures']), columns_values
+
+
+def _needed_stages(stages, targets):
+    """ Stages the targets depend on, directly or not, in the order of stages."""
+    stages_by_name = {stage.name: stage for stage in stages}
+    needed, to_visit = set(), list(targets)
+    while to_visit:
+        name = to_visit.pop()
+        if name in stages_by_name and name not in needed:
+            needed.add(name)
+            to_visit.extend(stages_by_name[name].dependency_names)
+    return [stage for stage in stages if stage.name in needed]
+
+
+def _build_per_stages(per_params):
+    return [
+        Stage('PlayersData', _build_players_data, ['basket_ref_box_score', 'GamesPerTeam']),
+        # simplified PER of each player game, shared by preseason and playoff features
+        Stage('PER', PER.compute_per_by_game, [('PlayersData', 0)], params=per_params),
+        Stage('PreseasonPER', _compute_previous_season_per, ['PER', ('PlayersData', 1)], params=per_params),
+        Stage('PreplayoffPER', _compute_preplayoff_per, ['PER', ('PlayersData', 2), 'GamesPerTeam'],
+              params=per_params),
+    ]
 
 
-def _build_playoff_features(all_games_elo, basket_ref_box_score, games_per_team, winner_by_season):
-    # recreate processed data for playoff
+def _build_chunked_per_stages(per_params):
+    # players teams and PER aggregates by player and season are computed season by season
+    return [
+        Stage('ChunkedPlayersData', _build_chunked_players_data, ['box_score_file', 'GamesPerTeam'],
+              params=per_params),
+        Stage('PreseasonPER', _compute_previous_season_per_by_player,
+              [('ChunkedPlayersData', 2), ('ChunkedPlayersData', 0)], params=per_params),
+        Stage('PreplayoffPER', _compute_preplayoff_per_by_player,
+              [('ChunkedPlayersData', 3), ('ChunkedPlayersData', 1)], params=per_params),
+    ]
+
+
+def _build_preseason_features(columns, *features_tables):
+    dataset = preseason_features_registry.assemble(features_tables, columns=columns)
+    return _set_labels(dataset)
+
+
+def _build_playoff_features(columns, *features_tables):
+    dataset = playoff_features_registry.assemble(features_tables, columns=columns)
+    return _set_labels(dataset)
+
+
+def _compute_preseason_elo(all_games_elo):
+    return EloRating.get_first_elo_season(teams_elo_df=all_games_elo)
+
+
+def _compute_preplayoff_elo(all_games_elo, games_per_team):
+    # elo rating before playoff
     playoff_splitter = SplitPlayoff(games_per_team=games_per_team)
-    games_regular_season = playoff_splitter.keep_only_regular_season()
-    preplayoff_player_data, players_with_team = PlayersData(basket_ref_box_score=basket_ref_box_score,
-                                                            games_per_team=games_regular_season).build_data()
+    playoff_elo = all_games_elo[all_games_elo['game_id'].isin(playoff_splitter.playoff_game_ids)]
+    return EloRating.get_first_elo_season(playoff_elo)
+
+
+def _build_games_per_team(basket_ref_games):
+    return GamesPerTeam(basket_ref_games=basket_ref_games).build_dataset()
 
-    # features based on the regular season before playoff
-    regular_season_stats = TeamsStats(games_per_team=games_regular_season).compute_aggregated_features()
-    preplayoff_per = PER(players_stats=preplayoff_player_data, players_team=players_with_team).preplayoff_season_per()
 
-    # get elo rating before playoff
-    playoff_elo = all_games_elo[all_games_elo['date'].isin(playoff_splitter.playoff_dates)]
-    preplayoff_elo = EloRating.get_first_elo_season(playoff_elo)
+def _build_players_data(basket_ref_box_score, games_per_team):
+    games_regular_season = SplitPlayoff(games_per_team=games_per_team).keep_only_regular_season()
+    return (PlayersData(basket_ref_box_score=basket_ref_box_score, games_per_team=games_per_team)
+            .build_data_with_regular_season_teams(regular_season_game_ids=games_regular_season['game_id']))
 
-    # final dataset
-    playoff_dataset = _merge_all_features(per=preplayoff_per, elo=preplayoff_elo, teams_stats=regular_season_stats,
-                                          labels=winner_by_season)
-    return playoff_dataset
 
+def _build_chunked_players_data(box_score_file, games_per_team):
+    games_regular_season = SplitPlayoff(games_per_team=games_per_team).keep_only_regular_season()
+    raw_data_loader = RawDataLoader(path_basket_ref_games=None, path_basket_ref_box_score=box_score_file['path'],
+                                    id_dictionary=IdDictionary.load(box_score_file['id_dictionary']))
+    return (ChunkedPlayersData(games_per_team=games_per_team, raw_data_loader=raw_data_loader)
+            .build_data(regular_season_game_ids=games_regular_season['game_id'], aggregate=_aggregate_players_per))
 
-def _merge_all_features(per, elo, teams_stats, labels):
-    # final dataset preseason
-    with_labels = _set_labels(teams_stats, labels)
-    with_elo = pd.merge(with_labels, elo, on=['id', 'season'], how='left')
-    with_per = pd.merge(with_elo, per, on=['id', 'season'], how='left')
-    return with_per
 
+def _aggregate_players_per(players_stats, regular_season_game_ids):
+    per_by_game = PER.compute_per_by_game(players_stats)
+    regular_season_per_by_game = per_by_game[per_by_game['game_id'].isin(regular_season_game_ids)]
+    return PER.aggregate_by_player_on_season(per_by_game), PER.aggregate_by_player_on_season(regular_season_per_by_game)
 
-def _set_labels(features, winner_by_season):
-    with_label = pd.merge(features, winner_by_season, on='season', how='left')
-    with_label['won'] = with_label['won'] == with_label['id']
-    return with_label
+
+def _compute_labels(basket_ref_games):
+    return Labels(basket_ref_games=basket_ref_games).compute_winner_by_season()
+
+
+def _compute_elo(basket_ref_games):
+    # only games that are not in the checkpoint of the previous run are processed
+    elo_rating = EloRating(basket_ref_games=basket_ref_games, checkpoint_dir=Paths.elo_checkpoint_dir)
+    return elo_rating.update(new_games=basket_ref_games)
+
+
+def _compute_previous_season_teams_stats(games_per_team, columns=None):
+    return TeamsStats(games_per_team=games_per_team, columns=columns).compute_previous_season_features()
+
+
+def _compute_regular_season_teams_stats(games_per_team, columns=None):
+    games_regular_season = SplitPlayoff(games_per_team=games_per_team).keep_only_regular_season()
+    return TeamsStats(games_per_team=games_regular_season, columns=columns).compute_aggregated_features()
+
+
+def _compute_previous_season_per(per_by_game, players_with_team):
+    return PER(players_stats=None, players_team=players_with_team, per_by_game=per_by_game).previous_season_per()
+
+
+def _compute_preplayoff_per(per_by_game, players_with_team, games_per_team):
+    games_regular_season = SplitPlayoff(games_per_team=games_per_team).keep_only_regular_season()
+    preplayoff_per_by_game = per_by_game[per_by_game['game_id'].isin(games_regular_season['game_id'])]
+    return PER(players_stats=None, players_team=players_with_team,
+               per_by_game=preplayoff_per_by_game).preplayoff_season_per()
+
+
+def _compute_previous_season_per_by_player(per_by_player, players_with_team):
+    return PER(players_stats=None, players_team=players_with_team, per_by_player=per_by_player).previous_season_per()
+
+
+def _compute_preplayoff_per_by_player(per_by_player, players_with_team):
+    return PER(players_stats=None, players_team=players_with_team, per_by_player=per_by_player).preplayoff_season_per()
+
+
+def _params(params_class):
+    return {name: value for name, value in vars(params_class).items() if not name.startswith('_')}
+
+
+def _set_labels(dataset):
+    # the won column holds the winner of the season
+    if 'won' in dataset:
+        dataset['won'] = dataset['won'] == dataset['id']
+    return dataset
 
 
 if __name__ == "__main__":
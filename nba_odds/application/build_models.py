@@ -1,44 +1,150 @@
-import pandas as pd
+import json
+import logging
+import os
+
 from imblearn.over_sampling import ADASYN
 from imblearn.pipeline import Pipeline
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.linear_model import LogisticRegression
 
+from nba_odds.application.datasets_io import read_dataset, write_dataset
+from nba_odds.application.instrumentation import Instrumentation
 from nba_odds.config.config import Paths
+from nba_odds.config.params import (LogisticRegressionParams, LogisticRegressionSearchParams, RandomForestParams,
+                                    RandomForestSearchParams)
+from nba_odds.model.hyperparameter_search import HyperparameterSearch
 from nba_odds.model.model_builder import ModelBuilder
 
 
-def main():
-    """ Build the model and predict odds."""
-    columns_to_keep = ['elo', 'goal_diff_mean', 'PER_mean_sum', 'won_sum', 'points_before_ot_sum', 'PER_mean_mean',
-                       'opp_ortg_mean', 'points_before_ot_mean', 'opp_points_before_ot_sum', 'orb_sum'] + ['id', 'won',
-                                                                                                           'season']
+columns_to_keep = ['elo', 'goal_diff_mean', 'PER_mean_sum', 'won_sum', 'points_before_ot_sum', 'PER_mean_mean',
+                   'opp_ortg_mean', 'points_before_ot_mean', 'opp_points_before_ot_sum', 'orb_sum'] + ['id', 'won',
+                                                                                                       'season']
+
+
+def main(export_csv=False, report_path=None, profile_stages=()):
+    """ Build the model and predict odds.
+    :param export_csv: also write the predictions as csv.
+    :param report_path: json lines file where the time and memory of each stage are appended, e.g.
+        Paths.run_report, no measure if None.
+    :param profile_stages: names of the stages run under cProfile, when report_path is set.
+    """
+    instrumentation = Instrumentation(report_path=report_path, profile_stages=profile_stages)
+    preseason_data, playoff_data = instrumentation.call('load_datasets', _load_datasets)
+    preseason_model(preseason_data, export_csv=export_csv, instrumentation=instrumentation)
+    preplayoff_model(playoff_data, export_csv=export_csv, instrumentation=instrumentation)
+    if instrumentation.enabled:
+        logging.info(f"Run {instrumentation.run_id} report : {report_path}.")
+
+
+def backtest(min_train_seasons=5, n_jobs=-1):
+    """ Walk forward backtest of the preseason and playoff models on every season.
+    :param min_train_seasons: number of seasons in the first train set.
+    :param n_jobs: number of parallel jobs, -1 to use all the cores.
+    :return: dict model name -> (predictions by season, aggregated metrics).
+    """
+    preseason_data, playoff_data = _load_datasets()
+    results = {}
+    for model_name, model, dataset in (('preseason_lr', _preseason_pipeline(), preseason_data),
+                                       ('playoff_lr', _playoff_model(), playoff_data)):
+        model_builder = ModelBuilder(dataset=dataset, model=model, scale=True, model_name=model_name,
+                                     cache_dir=os.path.join(Paths.cache_dir, 'model_folds'))
+        results[model_name] = model_builder.backtest(min_train_seasons=min_train_seasons, n_jobs=n_jobs)
+    return results
+
 
-    preseason_data = pd.read_csv(Paths.output_preseason_features).dropna()
-    preseason_model(preseason_data[columns_to_keep])
+def search_params(method='halving', n_iter=30, time_budget=None, min_train_seasons=5, n_jobs=-1):
+    """ Search the parameters of the preseason and playoff models and save them for the next builds.
+    :param method: 'grid', 'random' or 'halving', see HyperparameterSearch.
+    :param n_iter: number of sampled candidates for 'random' and 'halving'.
+    :param time_budget: maximum duration of each search in seconds, no limit if None.
+    :param min_train_seasons: number of seasons in the first train set.
+    :param n_jobs: number of parallel jobs, -1 to use all the cores.
+    :return: dict model name -> best parameters.
+    """
+    preseason_data, playoff_data = _load_datasets()
+    searches = (
+        ('preseason_lr', _preseason_pipeline(), preseason_data, _params(LogisticRegressionSearchParams, 'class__')),
+        ('playoff_lr', _playoff_model(), playoff_data, _params(RandomForestSearchParams)),
+    )
+    best_params = {}
+    for model_name, model, dataset, param_distributions in searches:
+        search = HyperparameterSearch(dataset=dataset, model=model, param_distributions=param_distributions,
+                                      min_train_seasons=min_train_seasons,
+                                      cache_dir=os.path.join(Paths.cache_dir, 'model_folds'))
+        best_params[model_name] = search.search(method=method, n_iter=n_iter, time_budget=time_budget, n_jobs=n_jobs)
+        search.save(_params_path(model_name))
+    return best_params
+
+
+def _load_datasets():
+    # only the columns used by the preseason model are read from the file
+    preseason_data = read_dataset(Paths.output_preseason_features, columns=columns_to_keep).dropna()
+    playoff_data = read_dataset(Paths.output_preplayoff_features).dropna()  # keep all features for playoff predictions
+    return preseason_data, playoff_data
+
+
+def _preseason_pipeline():
+    model = LogisticRegression(**_params(LogisticRegressionParams))
+    adasyn = ADASYN()
+    pipeline = Pipeline([('sampling', adasyn), ('class', model)])
+    return pipeline.set_params(**_load_searched_params('preseason_lr'))
 
-    playoff_data = pd.read_csv(Paths.output_preplayoff_features).dropna()
-    preplayoff_model(playoff_data) # keep all features for playoff predictions
 
+def _playoff_model():
+    model = RandomForestClassifier(**_params(RandomForestParams))
+    return model.set_params(**_load_searched_params('playoff_lr'))
 
-def preplayoff_model(playoff_data):
-    model = RandomForestClassifier()
+
+def _load_searched_params(model_name):
+    """ Parameters saved by search_params, they override the config parameters."""
+    path = _params_path(model_name)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as params_file:
+        searched_params = json.load(params_file)['params']
+    logging.info(f"Using searched parameters {searched_params} for {model_name}.")
+    return searched_params
+
+
+def _params_path(model_name):
+    return os.path.join(Paths.model_params_dir, f'{model_name}_params.json')
+
+
+def _params(params_class, prefix=''):
+    return {prefix + name: value for name, value in vars(params_class).items() if not name.startswith('_')}
+
+
+def preplayoff_model(playoff_data, export_csv=False, instrumentation=None):
+    instrumentation = instrumentation or Instrumentation()
+    model = _playoff_model()
     model_builder = ModelBuilder(dataset=playoff_data, model=model, scale=True, model_name='playoff_lr')
-    predictions_df = model_builder.build()
+    with instrumentation.stage('playoff_lr.build', inputs=[playoff_data]) as record:
+        predictions_df = model_builder.build()
+        record.set_outputs(predictions_df)
 
     # Random forrest predicts 0 as a probability. We fill missing odds with a multiple of the maximum odd.
     predictions_df.loc[:, 'odds'] = predictions_df['odds'].fillna(2*max(predictions_df['odds']))
 
-    predictions_df.to_csv(Paths.output_playoff_odds_path, index=False)
+    with instrumentation.stage('playoff_lr.write_predictions', inputs=[predictions_df]):
+        write_dataset(predictions_df, Paths.output_playoff_odds_path, params=_model_params(model, playoff_data),
+                      csv_path=Paths.output_playoff_odds_csv_path if export_csv else None)
 
 
-def preseason_model(preseason_data):
-    model = LogisticRegression()
-    adasyn = ADASYN()
-    pipeline = Pipeline([('sampling', adasyn), ('class', model)])
+def preseason_model(preseason_data, export_csv=False, instrumentation=None):
+    instrumentation = instrumentation or Instrumentation()
+    pipeline = _preseason_pipeline()
     model_builder = ModelBuilder(dataset=preseason_data, model=pipeline, scale=True, model_name='preseason_lr')
-    predictions_df = model_builder.build()
-    predictions_df.to_csv(Paths.output_preseason_odds_path, index=False)
+    with instrumentation.stage('preseason_lr.build', inputs=[preseason_data]) as record:
+        predictions_df = model_builder.build()
+        record.set_outputs(predictions_df)
+    with instrumentation.stage('preseason_lr.write_predictions', inputs=[predictions_df]):
+        write_dataset(predictions_df, Paths.output_preseason_odds_path,
+                      params=_model_params(pipeline, preseason_data),
+                      csv_path=Paths.output_preseason_odds_csv_path if export_csv else None)
+
+
+def _model_params(model, dataset):
+    return {'model': str(model), 'columns': list(dataset.columns)}
 
 
 if __name__ == '__main__':
@@ -0,0 +1,136 @@
+""" Classes to run pipeline stages as a dependency graph in a process pool."""
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+logging.basicConfig(level=logging.INFO)
+
+
+class Stage:
+    """A pipeline stage: a module level function and the values it is called with.
+
+    :attributes name: name of the stage, used by the stages depending on it.
+    :attributes func: module level function (it is sent to worker processes).
+    :attributes dependencies: names of the values func is called with, in order. ('name', i) selects the i-th output
+        of a stage returning a tuple.
+    :attributes params: parameters of the stage, used in its cache key.
+    :attributes cached: whether the stage outputs are kept in the stage cache.
+    """
+
+    def __init__(self, name, func, dependencies=(), params=None, cached=True):
+        self.name = name
+        self.func = func
+        self.dependencies = list(dependencies)
+        self.params = params
+        self.cached = cached
+
+    @property
+    def dependency_names(self):
+        return [dependency[0] if isinstance(dependency, tuple) else dependency for dependency in self.dependencies]
+
+
+class DagExecutor:
+    """Run stages in a process pool, each stage starting as soon as all its dependencies are available.
+
+    The stage cache is looked up and filled in the main process, only stages missing from the cache are sent to the
+    workers. Inputs and outputs go between processes pickled.
+
+    :attributes stages: list of Stage.
+    :attributes max_workers: number of worker processes, stages run in the main process when it is 1.
+    :attributes cache: optional StageCache.
+    :attributes instrumentation: optional Instrumentation, computed stages are measured where they run.
+    :methods run
+    """
+
+    def __init__(self, stages, max_workers=None, cache=None, instrumentation=None):
+        self.stages = stages
+        self.max_workers = max_workers
+        self.cache = cache
+        self.instrumentation = instrumentation
+
+    def run(self, values):
+        """ Run all the stages.
+        :param values: dict name -> value of the inputs that are not computed by a stage.
+        :return: dict name -> value with the inputs and every stage outputs.
+        """
+        values = dict(values)
+        sorted_stages = self._sorted_stages(values)  # raises on missing or cyclic dependencies
+        if self.max_workers == 1:
+            for stage in sorted_stages:
+                values[stage.name] = self._run_in_process(stage, values)
+            return values
+
+        pending = {stage.name: stage for stage in self.stages}
+        running = {}
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                self._submit_ready_stages(pool, pending, running, values)
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, key, start_time = running.pop(future)
+                    values[stage.name] = future.result()
+                    logging.info(f"{stage.name} : done in {time.time() - start_time:.1f}s.")
+                    self._store(stage, key, values[stage.name])
+        return values
+
+    def _submit_ready_stages(self, pool, pending, running, values):
+        """ Submit the stages whose dependencies are available, stages in the cache are loaded directly."""
+        ready = True
+        while ready:  # cache hits may make other stages ready
+            ready = [stage for stage in pending.values() if all(name in values for name in stage.dependency_names)]
+            for stage in ready:
+                del pending[stage.name]
+                inputs = self._get_inputs(stage, values)
+                key, outputs = self._lookup(stage, inputs)
+                if outputs is not None:
+                    values[stage.name] = outputs
+                else:
+                    logging.info(f"{stage.name} : started.")
+                    running[pool.submit(*self._task(stage, inputs))] = (stage, key, time.time())
+            ready = [stage for stage in ready if stage.name in values]
+
+    def _run_in_process(self, stage, values):
+        inputs = self._get_inputs(stage, values)
+        key, outputs = self._lookup(stage, inputs)
+        if outputs is None:
+            start_time = time.time()
+            func, *args = self._task(stage, inputs)
+            outputs = func(*args)
+            logging.info(f"{stage.name} : done in {time.time() - start_time:.1f}s.")
+            self._store(stage, key, outputs)
+        return outputs
+
+    def _task(self, stage, inputs):
+        """ Function and arguments computing the stage, through the instrumentation if there is one."""
+        if self.instrumentation is None:
+            return (stage.func, *inputs)
+        return (self.instrumentation.call, stage.name, stage.func, *inputs)
+
+    def _lookup(self, stage, inputs):
+        if self.cache is None or not stage.cached:
+            return None, None
+        return self.cache.lookup(stage.name, inputs, stage.params, func=stage.func)
+
+    def _store(self, stage, key, outputs):
+        if self.cache is not None and stage.cached:
+            self.cache.store(stage.name, key, outputs)
+
+    @staticmethod
+    def _get_inputs(stage, values):
+        return [values[dependency[0]][dependency[1]] if isinstance(dependency, tuple) else values[dependency]
+                for dependency in stage.dependencies]
+
+    def _sorted_stages(self, values):
+        """ Stages in an order where each stage comes after its dependencies."""
+        available = set(values)
+        pending = list(self.stages)
+        sorted_stages = []
+        while pending:
+            ready = [stage for stage in pending if set(stage.dependency_names) <= available]
+            if not ready:
+                raise ValueError(f"Stages with missing or cyclic dependencies : {[stage.name for stage in pending]}.")
+            for stage in ready:
+                pending.remove(stage)
+                sorted_stages.append(stage)
+                available.add(stage.name)
+        return sorted_stages
@@ -0,0 +1,54 @@
+""" Functions to write and read features and predictions datasets as typed parquet files."""
+import json
+import logging
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import nba_odds
+
+logging.basicConfig(level=logging.INFO)
+
+METADATA_KEY = b'nba_odds'
+
+
+def write_dataset(df, path, params=None, csv_path=None):
+    """ Write a dataset as parquet, with its schema and the parameters that produced it in the file metadata.
+    :param df: pandas dataframe.
+    :param path: path of the parquet file.
+    :param params: json serializable parameters used to build the dataset.
+    :param csv_path: optional path to also export the dataset as csv.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = {'params': params or {}, 'version': nba_odds.__version__}
+    table = table.replace_schema_metadata({**table.schema.metadata,
+                                           METADATA_KEY: json.dumps(metadata, default=str).encode()})
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pq.write_table(table, path)
+    logging.info(f"{path} has been created.")
+
+    if csv_path is not None:
+        df.to_csv(csv_path, index=False)
+        logging.info(f"{csv_path} has been created.")
+
+
+def read_dataset(path, columns=None):
+    """ Read a dataset written by write_dataset, with its original dtypes.
+    :param path: path of the parquet file.
+    :param columns: columns to read, all by default. Other columns are not loaded.
+    :return: pandas dataframe.
+    """
+    return pq.read_table(path, columns=columns).to_pandas()
+
+
+def read_metadata(path):
+    """ Parameters and package version stored with a dataset, without reading its data.
+    :param path: path of the parquet file.
+    :return: dict with keys 'params' and 'version'.
+    """
+    schema_metadata = pq.read_schema(path).metadata or {}
+    if METADATA_KEY not in schema_metadata:
+        return {'params': {}, 'version': None}
+    return json.loads(schema_metadata[METADATA_KEY])
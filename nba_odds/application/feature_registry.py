@@ -0,0 +1,73 @@
+""" Classes to declare the features of a dataset and compute only the requested ones."""
+import pandas as pd
+
+
+class Feature:
+    """A table of features computed by a pipeline stage.
+
+    :attributes name: name of the stage computing the table.
+    :attributes columns: feature columns of the table, besides its keys.
+    :attributes keys: columns identifying a line of the table, a subset of the dataset keys.
+    :attributes prunable: whether the stage computes only the requested columns, it then gets them as last input.
+    """
+
+    def __init__(self, name, columns, keys=('id', 'season'), prunable=False):
+        self.name = name
+        self.columns = list(columns)
+        self.keys = list(keys)
+        self.prunable = prunable
+
+
+class FeatureRegistry:
+    """Features of a dataset with one line per keys, computed only when one of their columns is requested.
+
+    The lines of the dataset are the lines of the first feature, which is always computed. The other tables are
+    aligned on the dataset keys and added in one concat, as successive left merges would, without copying the
+    dataset at each merge. Tables keyed on a subset of the keys (e.g. season) are broadcast to the dataset lines.
+
+    :attributes features: list of Feature, in the order of the dataset columns.
+    :attributes keys: columns identifying a line of the dataset.
+    :methods select, dependencies, assemble
+    """
+
+    def __init__(self, features, keys=('id', 'season')):
+        self.features = features
+        self.keys = list(keys)
+
+    def select(self, columns=None):
+        """ Features needed for the requested columns.
+        :param columns: list of columns of the dataset, keys included or not, all the columns if None.
+        :return: list of (Feature, its requested columns), in the order of the registry.
+        """
+        if columns is None:
+            return [(feature, feature.columns) for feature in self.features]
+
+        unknown_columns = set(columns) - set(self.keys).union(*[feature.columns for feature in self.features])
+        if unknown_columns:
+            raise ValueError(f"Unknown feature columns {sorted(unknown_columns)}.")
+        selected = []
+        for index, feature in enumerate(self.features):
+            feature_columns = [column for column in feature.columns if column in columns]
+            if feature_columns or index == 0:
+                selected.append((feature, feature_columns))
+        return selected
+
+    def dependencies(self, columns=None):
+        """ Names of the stages computing the requested columns, in the order assemble gets their tables."""
+        return [feature.name for feature, _ in self.select(columns)]
+
+    def assemble(self, tables, columns=None):
+        """ Join the feature tables on the dataset keys.
+        :param tables: tables of the selected features, in the order of `dependencies(columns)`.
+        :param columns: requested columns, all if None.
+        :return: pandas dataframe with the keys and the requested columns.
+        """
+        selected = self.select(columns)
+        (base_feature, base_columns), base_table = selected[0], tables[0]
+        parts = [base_table[self.keys + base_columns].reset_index(drop=True)]
+        keys = pd.MultiIndex.from_frame(base_table[self.keys])
+        for (feature, feature_columns), table in zip(selected[1:], tables[1:]):
+            lines_keys = keys.droplevel([key for key in self.keys if key not in feature.keys])
+            aligned = table.set_index(feature.keys)[feature_columns].reindex(lines_keys)
+            parts.append(aligned.reset_index(drop=True))
+        return pd.concat(parts, axis=1)
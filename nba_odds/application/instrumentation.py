@@ -0,0 +1,186 @@
+""" Classes to measure the time and memory of pipeline stages and write a run report."""
+import cProfile
+import functools
+import json
+import os
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+
+class Instrumentation:
+    """Measure pipeline stages and append one json line per stage to a run report.
+
+    Each stage record has the wall and cpu time, the peak memory traced by tracemalloc during the stage, and the number
+    of rows and the size in bytes (shallow, object columns count 8 bytes per value) of the dataframes and arrays the
+    stage gets and returns. Stages listed in profile_stages are also run under cProfile, their stats are dumped in
+    profile_dir.
+    Without report_path the instrumentation is disabled : stages are run as is, at the cost of one function call.
+    Instances are sent to DagExecutor worker processes, which append their records to the same report.
+
+    :attributes report_path: json lines file the records are appended to, None to disable the instrumentation.
+    :attributes profile_stages: names of the stages to profile.
+    :attributes profile_dir: directory of the profile stats, next to the report by default.
+    :attributes trace_memory: whether the peak memory is measured, tracemalloc slows down allocations.
+    :attributes run_id: identifier shared by the records of a run.
+    :methods stage, call, wrap, write
+    """
+
+    def __init__(self, report_path=None, profile_stages=(), profile_dir=None, trace_memory=True, run_id=None):
+        self.report_path = report_path
+        self.profile_stages = set(profile_stages)
+        self.profile_dir = profile_dir
+        if profile_dir is None and report_path is not None:
+            self.profile_dir = os.path.join(os.path.dirname(os.path.abspath(report_path)), 'profiles')
+        self.trace_memory = trace_memory
+        self.run_id = run_id or datetime.now().strftime('%Y%m%dT%H%M%S')
+
+    @property
+    def enabled(self):
+        return self.report_path is not None
+
+    def stage(self, name, inputs=()):
+        """ Context manager measuring the code it wraps as a stage.
+        Outputs are given to the record with `set_outputs`:
+
+            with instrumentation.stage('GamesPerTeam', inputs=[games]) as record:
+                games_per_team = GamesPerTeam(games).build_dataset()
+                record.set_outputs(games_per_team)
+
+        :param name: name of the stage in the report.
+        :param inputs: dataframes, arrays or tuples of them the stage works on.
+        :return: StageRecord context manager.
+        """
+        if not self.enabled:
+            return _disabled_record
+        return StageRecord(self, name, inputs)
+
+    def call(self, name, func, *inputs):
+        """ Call func(*inputs) as a stage and return its outputs."""
+        if not self.enabled:
+            return func(*inputs)
+        with StageRecord(self, name, inputs) as record:
+            outputs = func(*inputs)
+            record.set_outputs(outputs)
+        return outputs
+
+    def wrap(self, name=None):
+        """ Decorator measuring each call of the decorated function as a stage, named after the function by default.
+        """
+        def decorator(func):
+            stage_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*inputs):
+                return self.call(stage_name, func, *inputs)
+            return wrapper
+        return decorator
+
+    def write(self, record):
+        """ Append a record to the report, in one write so that records of concurrent processes do not mix."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.report_path)), exist_ok=True)
+        with open(self.report_path, 'a') as report_file:
+            report_file.write(json.dumps(record) + '\n')
+
+
+class StageRecord:
+    """Measures of a stage, written to the report when the stage ends (also when it raises).
+
+    :attributes instrumentation: Instrumentation writing the record.
+    :attributes name: name of the stage.
+    :methods set_outputs
+    """
+
+    def __init__(self, instrumentation, name, inputs):
+        self.instrumentation = instrumentation
+        self.name = name
+        self._input_rows, self._input_bytes = _frames_size(inputs)
+        self._output_rows, self._output_bytes = None, None
+        self._profiler = None
+        self._is_tracing = False
+
+    def set_outputs(self, outputs):
+        """ Record the number of rows and size of the stage outputs."""
+        self._output_rows, self._output_bytes = _frames_size(outputs)
+
+    def __enter__(self):
+        self._start_date = datetime.now().isoformat()
+        # a stage nested in another traced stage is part of its peak memory, only the outer one is traced
+        self._is_tracing = self.instrumentation.trace_memory and not tracemalloc.is_tracing()
+        if self._is_tracing:
+            tracemalloc.start()
+        if self.name in self.instrumentation.profile_stages:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._start_cpu_time = time.process_time()
+        self._start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        wall_time = time.perf_counter() - self._start_time
+        cpu_time = time.process_time() - self._start_cpu_time
+        profile_path = None
+        if self._profiler is not None:
+            self._profiler.disable()
+            os.makedirs(self.instrumentation.profile_dir, exist_ok=True)
+            profile_path = os.path.join(self.instrumentation.profile_dir,
+                                        f'{self.instrumentation.run_id}_{self.name}.prof')
+            self._profiler.dump_stats(profile_path)
+        peak_memory = None
+        if self._is_tracing:
+            _, peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        self.instrumentation.write({
+            'run_id': self.instrumentation.run_id, 'stage': self.name, 'start': self._start_date, 'pid': os.getpid(),
+            'wall_time': wall_time, 'cpu_time': cpu_time, 'peak_memory': peak_memory,
+            'input_rows': self._input_rows, 'input_bytes': self._input_bytes,
+            'output_rows': self._output_rows, 'output_bytes': self._output_bytes,
+            'profile': profile_path, 'error': None if exc_type is None else exc_type.__name__,
+        })
+        return False
+
+
+class _DisabledRecord:
+    """ Record of a disabled instrumentation, does nothing."""
+
+    def set_outputs(self, outputs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_disabled_record = _DisabledRecord()
+
+
+def read_report(report_path, run_id=None):
+    """ Read the records of a run report.
+    :param run_id: keep only the records of this run, all the records if None.
+    :return: pandas dataframe with one line per stage record.
+    """
+    report = pd.read_json(report_path, lines=True, dtype={'run_id': str})
+    if run_id is not None:
+        report = report[report['run_id'] == run_id].reset_index(drop=True)
+    return report
+
+
+def _frames_size(values):
+    """ Total number of rows and shallow size in bytes of the dataframes, series and arrays in values."""
+    if isinstance(values, (pd.DataFrame, pd.Series)):
+        return len(values), int(np.sum(values.memory_usage(index=True, deep=False)))
+    if isinstance(values, np.ndarray):
+        return len(values), int(values.nbytes)
+    if isinstance(values, (tuple, list)):
+        rows, size = 0, 0
+        for value in values:
+            value_rows, value_size = _frames_size(value)
+            rows, size = rows + value_rows, size + value_size
+        return rows, size
+    return 0, 0
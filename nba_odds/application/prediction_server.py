@@ -0,0 +1,79 @@
+""" Local http server predicting odds with models loaded once at start."""
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from nba_odds.model.odds_predictor import OddsPredictor
+
+logging.basicConfig(level=logging.INFO)
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    """Handle prediction requests, predictors are read from the server.
+
+    - GET /models : names and features columns of the loaded models.
+    - POST /predict/<model_name> : body is a json list of features rows (one per team or scenario), response is the
+    list of rows with season and id (when given), predictions and odds. Other bodies get a 400 error.
+    """
+
+    def do_GET(self):
+        if self.path != '/models':
+            return self._send_json(404, {'error': f"Unknown path {self.path}."})
+        models = {name: list(predictor.columns) for name, predictor in self.server.predictors.items()}
+        return self._send_json(200, models)
+
+    def do_POST(self):
+        prefix = '/predict/'
+        model_name = self.path[len(prefix):] if self.path.startswith(prefix) else None
+        if model_name not in self.server.predictors:
+            return self._send_json(404, {'error': f"Unknown model {model_name}."})
+
+        try:
+            rows = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+                raise ValueError("The body must be a json list of features rows.")
+            predictions = self.server.predictors[model_name].predict_odds(pd.DataFrame.from_records(rows))
+        except ValueError as error:  # invalid json, body that is not a list of rows or missing features columns
+            return self._send_json(400, {'error': str(error)})
+        return self._send_body(200, predictions.to_json(orient='records').encode())
+
+    def _send_json(self, status, content):
+        self._send_body(status, json.dumps(content).encode())
+
+    def _send_body(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug(format % args)
+
+
+def build_server(predictors, host='127.0.0.1', port=8000):
+    """ Http server answering with the given predictors, requests are handled in threads.
+    :param predictors: dict model name -> OddsPredictor.
+    :param host: host to listen on.
+    :param port: port to listen on, 0 for any free port.
+    :return: ThreadingHTTPServer, started with serve_forever.
+    """
+    server = ThreadingHTTPServer((host, port), PredictionHandler)
+    server.predictors = predictors
+    return server
+
+
+def main(model_names=('preseason_lr', 'playoff_lr'), version='latest', host='127.0.0.1', port=8000):
+    """ Load a bundle of each model from the registry and serve predictions until interrupted.
+    :param version: version of the models, 'latest' or 'best:<metric>'.
+    """
+    predictors = {model_name: OddsPredictor.from_registry(model_name, version=version) for model_name in model_names}
+    server = build_server(predictors, host=host, port=port)
+    logging.info(f"Serving {list(predictors)} on http://{host}:{server.server_port}.")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
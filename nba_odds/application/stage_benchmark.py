@@ -0,0 +1,281 @@
+""" Benchmark of the features and model stages on synthetic data of several sizes."""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from nba_odds.application import build_features, build_models
+from nba_odds.application.synthetic_data import SyntheticData
+from nba_odds.config.config import Paths
+from nba_odds.features.elo_rating import EloRating
+from nba_odds.features.player_efficiency_rating import PER
+from nba_odds.features.teams_stats import TeamsStats
+from nba_odds.model.model_builder import ModelBuilder
+from nba_odds.preprocessing.games_per_team import GamesPerTeam
+from nba_odds.preprocessing.id_dictionary import IdDictionary
+from nba_odds.preprocessing.labels import Labels
+from nba_odds.preprocessing.players_data import PlayersData
+from nba_odds.preprocessing.raw_data_loader import RawDataLoader
+from nba_odds.preprocessing.split_on_playoffs import SplitPlayoff
+
+logging.basicConfig(level=logging.INFO)
+
+
+class StageBenchmark:
+    """Time and memory of each stage of the pipeline, on synthetic data of several sizes.
+
+    Stages run one after the other, each one on the outputs of the previous ones. The time of a stage is the best of
+    `repeat` runs on fresh copies of its inputs, its memory is the peak of the memory allocated during one more run,
+    traced by tracemalloc (numpy and pandas buffers included). Results are saved as json and compared to a baseline
+    with `compare`.
+
+    :attributes scales: names of the scales to run, keys of StageBenchmark.scales_params.
+    :attributes repeat: number of timed runs of each stage.
+    :methods run, save, load, compare
+    """
+    # SyntheticData parameters of each scale, the preseason model (ADASYN) needs at least 6 winners to train on.
+    # SplitPlayoff cuts the regular season after 30 * 82 lines from 2004 (29 * 82 before, SyntheticData teams are
+    # even) : scales start in 2004 and nb_teams * nb_games_per_team stays 30 * 82.
+    scales_params = {
+        'small': {'first_season': 2011, 'last_season': 2018},
+        'medium': {'first_season': 2004, 'last_season': 2018},
+        'large': {'first_season': 2004, 'last_season': 2018, 'nb_players_per_game': 20},
+        'many_teams': {'first_season': 2011, 'last_season': 2018, 'nb_teams': 60, 'nb_games_per_team': 41,
+                       'nb_playoff_teams': 32},
+        'long_seasons': {'first_season': 2011, 'last_season': 2018, 'nb_teams': 20, 'nb_games_per_team': 123,
+                         'nb_playoff_teams': 8},
+    }
+
+    def __init__(self, scales=('small', 'medium'), repeat=3):
+        unknown_scales = set(scales) - set(self.scales_params)
+        if unknown_scales:
+            raise ValueError(f"Unknown scales {sorted(unknown_scales)}, available : {list(self.scales_params)}.")
+        self.scales = scales
+        self.repeat = repeat
+
+    def run(self):
+        """ Run every stage at every scale.
+        :return: dict with the environment and, by scale, the data parameters and the time (seconds), peak memory
+            (bytes) and number of output rows of each stage.
+        """
+        results = {'date': datetime.now().isoformat(timespec='seconds'), 'repeat': self.repeat,
+                   'environment': self._environment(), 'scales': {}}
+        for scale in self.scales:
+            logging.info(f"Benchmarking scale {scale}.")
+            results['scales'][scale] = {'params': self.scales_params[scale],
+                                        'stages': self._run_scale(self.scales_params[scale])}
+        return results
+
+    @staticmethod
+    def save(results, path):
+        """ Write benchmark results as json."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as results_file:
+            json.dump(results, results_file, indent=2)
+
+    @staticmethod
+    def load(path):
+        """ Read benchmark results written by save."""
+        with open(path) as results_file:
+            return json.load(results_file)
+
+    @staticmethod
+    def compare(results, baseline, tolerance=0.2, min_time=0.01):
+        """ Stages slower or using more memory than in the baseline.
+        :param results: results of run.
+        :param baseline: results of a previous run.
+        :param tolerance: relative increase above which a stage is a regression.
+        :param min_time: stages faster than this in the baseline (seconds) are not compared on time, their time is
+            mostly noise.
+        :return: list of regressions, dicts with scale, stage, metric, baseline and current values and ratio.
+        """
+        regressions = []
+        for scale, scale_results in results['scales'].items():
+            baseline_stages = baseline['scales'].get(scale, {}).get('stages', {})
+            for stage, measures in scale_results['stages'].items():
+                if stage not in baseline_stages:
+                    continue
+                for metric in ('time', 'peak_memory'):
+                    baseline_value, value = baseline_stages[stage][metric], measures[metric]
+                    if metric == 'time' and baseline_value < min_time:
+                        continue
+                    ratio = value / baseline_value if baseline_value else float('inf')
+                    if ratio > 1 + tolerance:
+                        regressions.append({'scale': scale, 'stage': stage, 'metric': metric,
+                                            'baseline': baseline_value, 'current': value, 'ratio': ratio})
+        return regressions
+
+    def _run_scale(self, data_params):
+        with tempfile.TemporaryDirectory() as data_dir:
+            path_games, path_box_score = SyntheticData(**data_params).write(data_dir)
+            # ModelBuilder saves its model in the registry, the model uses the config parameters and not the ones
+            # saved by build_models.search_params, so that results do not depend on the last search
+            model_dir, Paths.model_dir = Paths.model_dir, os.path.join(data_dir, 'model')
+            model_params_dir, Paths.model_params_dir = Paths.model_params_dir, os.path.join(data_dir, 'model_params')
+            try:
+                return self._run_stages(path_games, path_box_score)
+            finally:
+                Paths.model_dir = model_dir
+                Paths.model_params_dir = model_params_dir
+
+    def _run_stages(self, path_games, path_box_score):
+        """ Stages of build_features and build_models, with the inputs taken from the previous stages outputs."""
+        outputs, measures = {}, {}
+
+        def measure(stage, func, *inputs):
+            outputs[stage], measures[stage] = self._measure(func, *[outputs[name] for name in inputs])
+
+        outputs['paths'] = (path_games, path_box_score)
+        measure('RawDataLoader', _load_raw_data, 'paths')
+        outputs['games'], outputs['box_score'] = outputs['RawDataLoader']
+        measure('GamesPerTeam.build_dataset', _build_games_per_team, 'games')
+        measure('SplitPlayoff.keep_only_regular_season', _keep_only_regular_season, 'GamesPerTeam.build_dataset')
+        measure('PlayersData.build_data', _build_players_data, 'box_score', 'GamesPerTeam.build_dataset')
+        outputs['players_stats'], outputs['players_team'] = outputs['PlayersData.build_data']
+        measure('EloRating.compute', _compute_elo, 'games')
+        measure('Labels.compute_winner_by_season', _compute_labels, 'games')
+        measure('PER.compute_per_by_game', PER.compute_per_by_game, 'players_stats')
+        measure('PER.previous_season_per', _compute_previous_season_per, 'PER.compute_per_by_game', 'players_team')
+        measure('PER.preplayoff_season_per', _compute_preplayoff_per, 'PER.compute_per_by_game', 'players_team')
+        measure('TeamsStats.compute_previous_season_features', _compute_previous_season_teams_stats,
+                'GamesPerTeam.build_dataset')
+        measure('TeamsStats.compute_aggregated_features', _compute_aggregated_teams_stats,
+                'SplitPlayoff.keep_only_regular_season')
+        measure('EloRating.get_first_elo_season', build_features._compute_preseason_elo, 'EloRating.compute')
+        measure('PreseasonFeatures', _build_preseason_features, 'TeamsStats.compute_previous_season_features',
+                'Labels.compute_winner_by_season', 'EloRating.get_first_elo_season', 'PER.previous_season_per')
+        measure('ModelBuilder.build', _build_model, 'PreseasonFeatures')
+        return measures
+
+    def _measure(self, func, *inputs):
+        """ Best time of `repeat` runs and peak memory of one traced run, each one on copies of the inputs."""
+        times = []
+        for _ in range(self.repeat):
+            copied_inputs = _copy(inputs)
+            start = time.perf_counter()
+            output = func(*copied_inputs)
+            times.append(time.perf_counter() - start)
+
+        copied_inputs = _copy(inputs)
+        tracemalloc.start()
+        try:
+            output = func(*copied_inputs)
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return output, {'time': min(times), 'peak_memory': peak_memory, 'rows': _nb_rows(output)}
+
+    @staticmethod
+    def _environment():
+        return {'python': platform.python_version(), 'platform': platform.platform(), 'cpu_count': os.cpu_count(),
+                'numpy': np.__version__, 'pandas': pd.__version__, 'sklearn': sklearn.__version__}
+
+
+def _load_raw_data(paths):
+    raw_data_loader = RawDataLoader(path_basket_ref_games=paths[0], path_basket_ref_box_score=paths[1],
+                                    id_dictionary=IdDictionary())
+    return raw_data_loader.load_games(), raw_data_loader.load_box_score()
+
+
+def _build_games_per_team(games):
+    return GamesPerTeam(basket_ref_games=games).build_dataset()
+
+
+def _keep_only_regular_season(games_per_team):
+    return SplitPlayoff(games_per_team=games_per_team).keep_only_regular_season()
+
+
+def _build_players_data(box_score, games_per_team):
+    return PlayersData(games_per_team=games_per_team, basket_ref_box_score=box_score).build_data()
+
+
+def _compute_elo(games):
+    return EloRating(basket_ref_games=games).compute()
+
+
+def _compute_labels(games):
+    return Labels(basket_ref_games=games).compute_winner_by_season()
+
+
+def _compute_previous_season_per(per_by_game, players_team):
+    return PER(players_stats=None, players_team=players_team, per_by_game=per_by_game).previous_season_per()
+
+
+def _compute_preplayoff_per(per_by_game, players_team):
+    return PER(players_stats=None, players_team=players_team, per_by_game=per_by_game).preplayoff_season_per()
+
+
+def _compute_previous_season_teams_stats(games_per_team):
+    return TeamsStats(games_per_team=games_per_team).compute_previous_season_features()
+
+
+def _compute_aggregated_teams_stats(games_per_team):
+    return TeamsStats(games_per_team=games_per_team).compute_aggregated_features()
+
+
+def _build_preseason_features(teams_stats, winner_by_season, preseason_elo, preseason_per):
+    return build_features._build_preseason_features(None, teams_stats, winner_by_season, preseason_elo, preseason_per)
+
+
+def _build_model(preseason_features):
+    dataset = preseason_features[build_models.columns_to_keep].dropna()
+    return ModelBuilder(dataset=dataset, model=build_models._preseason_pipeline(), scale=True,
+                        model_name='benchmark').build()
+
+
+def _copy(inputs):
+    return [value.copy() if isinstance(value, (pd.DataFrame, pd.Series)) else value for value in inputs]
+
+
+def _nb_rows(output):
+    if isinstance(output, tuple):
+        return sum(_nb_rows(value) for value in output)
+    return len(output) if isinstance(output, (pd.DataFrame, pd.Series)) else None
+
+
+def main(args=None):
+    """ Command line : `run` benchmarks the stages and saves the results, `compare` compares results to a baseline
+    and exits with status 1 when a stage regressed."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    run_parser = subparsers.add_parser('run', help='benchmark the stages and save the results')
+    run_parser.add_argument('--scales', nargs='+', default=['small', 'medium'],
+                            choices=list(StageBenchmark.scales_params))
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--output', default=Paths.benchmark_results)
+    compare_parser = subparsers.add_parser('compare', help='compare results to a baseline')
+    compare_parser.add_argument('results', nargs='?', default=Paths.benchmark_results)
+    compare_parser.add_argument('--baseline', default=Paths.benchmark_baseline)
+    compare_parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args(args)
+
+    if args.command == 'run':
+        benchmark = StageBenchmark(scales=args.scales, repeat=args.repeat)
+        results = benchmark.run()
+        benchmark.save(results, args.output)
+        for scale, scale_results in results['scales'].items():
+            for stage, measures in scale_results['stages'].items():
+                print(f"{scale:<8} {stage:<45} {measures['time']:>9.4f} s {measures['peak_memory'] / 2 ** 20:>9.1f} MB")
+        return 0
+
+    regressions = StageBenchmark.compare(StageBenchmark.load(args.results), StageBenchmark.load(args.baseline),
+                                         tolerance=args.tolerance)
+    for regression in regressions:
+        print(f"{regression['scale']:<8} {regression['stage']:<45} {regression['metric']:<12} "
+              f"{regression['baseline']:.4g} -> {regression['current']:.4g} (x{regression['ratio']:.2f})")
+    print(f"{len(regressions)} regression(s).")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
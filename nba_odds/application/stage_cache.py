@@ -0,0 +1,225 @@
+""" Class to cache pipeline stages outputs on disk."""
+import hashlib
+import inspect
+import json
+import logging
+import os
+import shutil
+
+import pandas as pd
+
+import nba_odds
+
+logging.basicConfig(level=logging.INFO)
+
+
+class StageCache:
+    """Content addressed cache of pipeline stages outputs, stored as parquet files.
+
+    The key of a stage is a hash of its name, its parameters, its code and the keys of its inputs. An input produced
+    by a cached stage takes the key of this stage, other dataframes are hashed from their content the first time they
+    are seen, so that later in place modifications do not change their key. The code of a stage is the bytecode and
+    constants of its function and of the nba_odds functions and classes (methods and class attributes) it uses,
+    directly or not : editing a feature definition changes the key of the stages using it. Least recently used entries
+    are removed when the cache gets bigger than max_size_bytes.
+
+    :attributes cache_dir: directory of the cache, one sub directory per stage and key.
+    :attributes max_size_bytes: maximum size of the cache.
+    :attributes refresh: names of the stages to recompute even if they are in the cache.
+    :methods run, lookup, store, hash_frame, hash_code
+    """
+    meta_filename = 'meta.json'
+
+    def __init__(self, cache_dir, max_size_bytes=2 * 1024 ** 3, refresh=()):
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        self.refresh = set(refresh)
+        self._frames_keys = {}
+        self._code_keys = {}
+
+    def run(self, stage, func, inputs, params=None):
+        """ Load the stage outputs from the cache, or compute and cache them.
+        :param stage: name of the stage.
+        :param func: function computing the stage from inputs, returns a dataframe or a tuple of dataframes.
+        :param inputs: list of func arguments (dataframes or json serializable values).
+        :param params: json serializable parameters the stage depends on.
+        :return: func outputs.
+        """
+        key, outputs = self.lookup(stage, inputs, params, func=func)
+        if outputs is None:
+            outputs = func(*inputs)
+            self.store(stage, key, outputs)
+        return outputs
+
+    def lookup(self, stage, inputs, params=None, func=None):
+        """ Key of the stage and its outputs if they are in the cache.
+        :param func: function computing the stage, its code is part of the key.
+        :return: key, outputs or None if the stage has to be computed.
+        """
+        key = self._stage_key(stage, inputs, params, func)
+        stage_dir = os.path.join(self.cache_dir, stage, key)
+
+        if stage not in self.refresh and os.path.exists(os.path.join(stage_dir, self.meta_filename)):
+            logging.info(f"{stage} : cache hit {key[:12]}.")
+            outputs = self._load(stage_dir)
+            os.utime(stage_dir)
+            self._register(outputs, key)
+            return key, outputs
+
+        logging.info(f"{stage} : cache miss {key[:12]}, computing.")
+        return key, None
+
+    def store(self, stage, key, outputs):
+        """ Save the outputs of a stage computed after a lookup miss."""
+        stage_dir = os.path.join(self.cache_dir, stage, key)
+        self._save(stage_dir, outputs)
+        self._evict(keep=stage_dir)
+        self._register(outputs, key)
+
+    def _register(self, outputs, key):
+        for output in (outputs if isinstance(outputs, tuple) else (outputs,)):
+            self._frames_keys[id(output)] = (output, key)
+
+    @staticmethod
+    def hash_frame(df):
+        """ Hash of a dataframe columns, dtypes, index and values."""
+        digest = hashlib.sha256()
+        digest.update(str([(column, str(dtype)) for column, dtype in df.dtypes.items()]).encode())
+        digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+        return digest.hexdigest()
+
+    @staticmethod
+    def hash_code(func):
+        """ Hash of the code of a function and of the nba_odds functions and classes it uses, directly or not."""
+        digest = hashlib.sha256()
+        _hash_code(func, digest, seen=set())
+        return digest.hexdigest()
+
+    def _stage_key(self, stage, inputs, params, func):
+        if func is not None and func not in self._code_keys:
+            self._code_keys[func] = self.hash_code(func)
+        code = None if func is None else self._code_keys[func]
+        digest = hashlib.sha256()
+        digest.update(json.dumps({'stage': stage, 'params': params, 'version': nba_odds.__version__, 'code': code},
+                                 sort_keys=True, default=str).encode())
+        for stage_input in inputs:
+            digest.update(self._input_key(stage_input).encode())
+        return digest.hexdigest()
+
+    def _input_key(self, stage_input):
+        if id(stage_input) in self._frames_keys:
+            return self._frames_keys[id(stage_input)][1]
+        if isinstance(stage_input, pd.DataFrame):
+            # frames are kept with their key so that their id is not reused
+            self._frames_keys[id(stage_input)] = (stage_input, self.hash_frame(stage_input))
+            return self._frames_keys[id(stage_input)][1]
+        return json.dumps(stage_input, sort_keys=True, default=str)
+
+    def _save(self, stage_dir, outputs):
+        if os.path.exists(stage_dir):
+            shutil.rmtree(stage_dir)
+        os.makedirs(stage_dir)
+        frames = outputs if isinstance(outputs, tuple) else (outputs,)
+        for index, frame in enumerate(frames):
+            frame.to_parquet(os.path.join(stage_dir, f'output_{index}.parquet'))
+        # meta file is written last : an entry without it is incomplete.
+        with open(os.path.join(stage_dir, self.meta_filename), 'w') as meta_file:
+            json.dump({'nb_outputs': len(frames), 'is_tuple': isinstance(outputs, tuple)}, meta_file)
+
+    @staticmethod
+    def _load(stage_dir):
+        with open(os.path.join(stage_dir, StageCache.meta_filename)) as meta_file:
+            meta = json.load(meta_file)
+        frames = tuple(pd.read_parquet(os.path.join(stage_dir, f'output_{index}.parquet'))
+                       for index in range(meta['nb_outputs']))
+        return frames if meta['is_tuple'] else frames[0]
+
+    def _evict(self, keep):
+        """ Remove least recently used entries until the cache size is below max_size_bytes."""
+        entries = []
+        for stage in os.listdir(self.cache_dir):
+            for key in os.listdir(os.path.join(self.cache_dir, stage)):
+                entry_dir = os.path.join(self.cache_dir, stage, key)
+                size = sum(os.path.getsize(os.path.join(entry_dir, filename)) for filename in os.listdir(entry_dir))
+                entries.append((os.path.getmtime(entry_dir), size, entry_dir))
+
+        cache_size = sum(size for _, size, _ in entries)
+        for _, size, entry_dir in sorted(entries):
+            if cache_size <= self.max_size_bytes:
+                break
+            if entry_dir != keep:
+                logging.info(f"Removing {entry_dir} from cache.")
+                shutil.rmtree(entry_dir)
+                cache_size -= size
+
+
+def _hash_code(obj, digest, seen):
+    """ Add the code of a function, method, property or class to digest, then the code of the nba_odds objects it
+    uses. seen holds the ids of the objects already added, functions and classes can use each other."""
+    obj = getattr(obj, '__func__', obj)  # bound, static and class methods
+    if id(obj) in seen:
+        return
+    seen.add(id(obj))
+    if isinstance(obj, property):
+        for accessor in (obj.fget, obj.fset, obj.fdel):
+            if accessor is not None:
+                _hash_code(accessor, digest, seen)
+    elif inspect.isclass(obj):
+        digest.update(f'class {obj.__module__}.{obj.__qualname__}'.encode())
+        for base in obj.__bases__:
+            if _is_package_object(base):
+                _hash_code(base, digest, seen)
+        for name, value in sorted(vars(obj).items()):
+            if name not in ('__dict__', '__weakref__', '__module__', '__doc__'):
+                digest.update(name.encode())
+                _hash_value(value, digest, seen)
+    elif inspect.isfunction(obj):
+        _hash_code_object(obj.__code__, digest)
+        for default in obj.__defaults__ or ():
+            _hash_value(default, digest, seen)
+        for name in sorted(_code_names(obj.__code__)):
+            if name in obj.__globals__ and not inspect.ismodule(obj.__globals__[name]):
+                digest.update(name.encode())
+                _hash_value(obj.__globals__[name], digest, seen)
+
+
+def _hash_value(value, digest, seen):
+    """ Code of the nba_odds functions and classes, content of json values, type of the other values (their repr can
+    change between runs)."""
+    if isinstance(value, (staticmethod, classmethod, property)) or inspect.isfunction(value) \
+            or inspect.isclass(value):
+        if _is_package_object(getattr(value, '__func__', value)):
+            _hash_code(value, digest, seen)
+        return
+    try:
+        digest.update(json.dumps(value, sort_keys=True).encode())
+    except (TypeError, ValueError):
+        value_type = type(value)
+        digest.update(f'{value_type.__module__}.{value_type.__qualname__}'.encode())
+        if _is_package_object(value_type):
+            _hash_code(value_type, digest, seen)
+
+
+def _hash_code_object(code, digest):
+    digest.update(code.co_code)
+    digest.update(str(code.co_names).encode())
+    for const in code.co_consts:
+        if inspect.iscode(const):  # nested functions, lambdas and comprehensions
+            _hash_code_object(const, digest)
+        elif isinstance(const, frozenset):  # the order of a frozenset changes with the strings hash seed
+            digest.update(repr(sorted(const, key=repr)).encode())
+        else:
+            digest.update(repr(const).encode())
+
+
+def _code_names(code):
+    """ Global and attribute names used by a code object and the code objects nested in it."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _code_names(const)
+    return names
+
+
+def _is_package_object(obj):
+    return (getattr(obj, '__module__', None) or '').split('.')[0] == nba_odds.__name__
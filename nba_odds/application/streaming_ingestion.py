@@ -0,0 +1,176 @@
+""" Class to update features in season, when new games and box scores arrive."""
+import asyncio
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from nba_odds.config.config import BoxScoreRawSchema, GamesRawSchema, ProcessedSchema
+from nba_odds.features.elo_rating import EloRating
+from nba_odds.features.player_efficiency_rating import PER
+from nba_odds.features.running_per import RunningPER
+from nba_odds.features.running_teams_stats import RunningTeamsStats
+from nba_odds.preprocessing.games_per_team import GamesPerTeam
+from nba_odds.preprocessing.raw_data_loader import RawDataLoader
+from nba_odds.preprocessing.split_on_playoffs import SplitPlayoff
+
+logging.basicConfig(level=logging.INFO)
+
+
+class StreamingIngestion:
+    """Consume new games and box scores from an asyncio queue and keep running aggregates up to date : team stats
+    (RunningTeamsStats), elo state of each team and players PER (RunningPER).
+
+    Queue items are ('games', raw games dataframe) or ('box_score', raw box score dataframe), in the raw parquet
+    formats, and None to stop. Games must arrive in date order, a late game is applied after the games already
+    processed. Box score lines of a game that has not arrived yet are kept until it does.
+    Processing a batch and reading the features only depend on the size of the batch and on the number of teams and
+    players, not on the number of past games.
+
+    :attributes teams_stats: RunningTeamsStats.
+    :attributes per: RunningPER.
+    :attributes elo_state: dict team -> (last elo, last season).
+    :methods run, process, add_games, add_box_score, features, watch_directory
+    """
+
+    def __init__(self):
+        self.teams_stats = RunningTeamsStats()
+        self.per = RunningPER()
+        self.elo_state = {}
+        self._elo_rating = EloRating(basket_ref_games=None)
+        self._games_teams = {}  # game_id -> list of (team id, season, phase)
+        self._seasons_lines = {}  # season -> (number of games_per_team lines, last regular season date)
+        self._pending_box_score = None
+
+    async def run(self, queue):
+        """ Process the queue items until None is received."""
+        while True:
+            item = await queue.get()
+            try:
+                if item is None:
+                    break
+                self.process(*item)
+            finally:
+                queue.task_done()
+
+    def process(self, kind, records):
+        """ Apply a batch of 'games' or 'box_score' records."""
+        if kind == 'games':
+            self.add_games(records)
+        elif kind == 'box_score':
+            self.add_box_score(records)
+        else:
+            raise ValueError(f"kind must be 'games' or 'box_score', got {kind}.")
+
+    def add_games(self, games):
+        """ Update team stats and elo with new games.
+        :param games: raw pandas dataframe with one line per game, same format as basket_ref_games.
+        """
+        games = RawDataLoader.parse_decimals(games.copy(), GamesRawSchema.decimal_columns)
+        games[GamesRawSchema.date_col] = pd.to_datetime(games[GamesRawSchema.date_col])
+
+        self._elo_rating.apply_games(games.copy(), teams_state=self.elo_state)
+
+        games_per_team = GamesPerTeam(basket_ref_games=games).build_dataset(with_phase=False)
+        games_per_team[ProcessedSchema.phase] = self._compute_phase(games_per_team)
+        self.teams_stats.add(games_per_team)
+
+        for game_id, team, season, phase in games_per_team[[GamesRawSchema.game_id, ProcessedSchema.team_id,
+                                                            GamesRawSchema.season,
+                                                            ProcessedSchema.phase]].itertuples(index=False):
+            self._games_teams.setdefault(game_id, []).append((team, season, phase))
+
+        if self._pending_box_score is not None:
+            pending_box_score, self._pending_box_score = self._pending_box_score, None
+            self.add_box_score(pending_box_score)
+
+    def add_box_score(self, box_score):
+        """ Update players PER with new box score lines.
+        :param box_score: raw pandas dataframe with one line per player per game, same format as basket_ref_box_score.
+        """
+        box_score = RawDataLoader.parse_decimals(box_score.copy(), [BoxScoreRawSchema.mp])
+        is_known_game = box_score[BoxScoreRawSchema.game_id].isin(self._games_teams.keys()).to_numpy()
+        if not is_known_game.all():
+            self._pending_box_score = pd.concat([self._pending_box_score, box_score[~is_known_game]],
+                                                ignore_index=True)
+        box_score = box_score[is_known_game]
+        if box_score.empty:
+            return
+
+        games_teams = pd.DataFrame(
+            [(game_id, team, season, phase) for game_id in box_score[BoxScoreRawSchema.game_id].unique()
+             for team, season, phase in self._games_teams[game_id]],
+            columns=[GamesRawSchema.game_id, ProcessedSchema.team_id, GamesRawSchema.season, ProcessedSchema.phase]
+        )
+        # one line per game per team per player, as PlayersData
+        players_games_with_both_teams = pd.merge(box_score[[BoxScoreRawSchema.game_id, BoxScoreRawSchema.player_id]],
+                                                 games_teams, on=GamesRawSchema.game_id, how='inner')
+        games_season = games_teams.drop_duplicates(GamesRawSchema.game_id).drop(columns=ProcessedSchema.team_id)
+        players_stats = pd.merge(box_score, games_season, on=GamesRawSchema.game_id, how='inner')
+
+        per_by_game = PER.compute_per_by_game(players_stats)
+        per_by_game[ProcessedSchema.phase] = players_stats[ProcessedSchema.phase].to_numpy()
+        self.per.add(per_by_game, players_games_with_both_teams)
+
+    def features(self, phase=ProcessedSchema.regular_season):
+        """ Current features of each team and season : team stats, PER by team and last elo.
+        :param phase: phase of the games used for team stats and PER, all games if None.
+        :return: pandas dataframe with one line per team per season.
+        """
+        features = self.teams_stats.features(phase=phase)
+        elo = pd.DataFrame([(team, elo, season) for team, (elo, season) in self.elo_state.items()],
+                           columns=[ProcessedSchema.team_id, 'elo', GamesRawSchema.season])
+        features = pd.merge(features, elo, on=[ProcessedSchema.team_id, GamesRawSchema.season], how='left')
+        if not self.per.is_empty:
+            features = pd.merge(features, self.per.team_per(phase=phase),
+                                on=[ProcessedSchema.team_id, GamesRawSchema.season], how='left')
+        return features
+
+    def _compute_phase(self, games_per_team):
+        """ Phase of new games_per_team lines, with the same rule as SplitPlayoff.compute_phase : the regular season
+        ends on the date of the nb_teams * 82-th line of the season."""
+        dates = games_per_team[GamesRawSchema.date_col].to_numpy()
+        seasons = games_per_team[GamesRawSchema.season].to_numpy()
+        is_playoff = np.zeros(len(games_per_team), dtype=bool)
+        for season in np.unique(seasons):
+            nb_lines, last_regular_season_date = self._seasons_lines.get(season, (0, None))
+            season_lines = np.flatnonzero(seasons == season)
+            nb_teams = SplitPlayoff.nb_teams_before_2004 if season < 2004 else SplitPlayoff.nb_teams_after_2004
+            nb_regular_season_lines = nb_teams * SplitPlayoff.nb_games_per_team_regular
+
+            if last_regular_season_date is None and nb_lines + len(season_lines) >= nb_regular_season_lines:
+                sorted_dates = np.sort(dates[season_lines], kind='stable')
+                last_regular_season_date = sorted_dates[nb_regular_season_lines - nb_lines - 1]
+            if last_regular_season_date is not None:
+                is_playoff[season_lines] = dates[season_lines] > last_regular_season_date
+            self._seasons_lines[season] = (nb_lines + len(season_lines), last_regular_season_date)
+
+        return pd.Categorical(np.where(is_playoff, ProcessedSchema.playoff, ProcessedSchema.regular_season),
+                              categories=[ProcessedSchema.regular_season, ProcessedSchema.playoff])
+
+    @staticmethod
+    async def watch_directory(directory, queue, poll_interval=1.0, stop_event=None):
+        """ Put the parquet files added to a directory on the queue, in file name order.
+        Files starting with 'games' are games, files starting with 'box_score' are box scores. A file must be complete
+        when it appears in the directory (written elsewhere, then moved).
+        :param directory: directory to watch.
+        :param queue: asyncio queue consumed by run.
+        :param poll_interval: seconds between two directory listings.
+        :param stop_event: optional asyncio event, the watcher returns when it is set.
+        """
+        loop = asyncio.get_running_loop()
+        seen = set()
+        columns = {'games': GamesRawSchema.columns, 'box_score': BoxScoreRawSchema.columns}
+        while stop_event is None or not stop_event.is_set():
+            for filename in sorted(os.listdir(directory)):
+                kind = next((kind for kind in columns if filename.startswith(kind)), None)
+                if filename in seen or kind is None or not filename.endswith('.parquet'):
+                    continue
+                seen.add(filename)
+                path = os.path.join(directory, filename)
+                # parquet files are read in a thread, so that the queue keeps being consumed
+                records = await loop.run_in_executor(None, lambda: pd.read_parquet(path, columns=columns[kind]))
+                logging.info(f"{filename} : {len(records)} {kind} lines.")
+                await queue.put((kind, records))
+            await asyncio.sleep(poll_interval)
@@ -0,0 +1,218 @@
+""" Generate synthetic basket reference raw data, to test and benchmark the pipeline at any scale."""
+import os
+
+import numpy as np
+import pandas as pd
+
+from nba_odds.config.config import BoxScoreRawSchema, GamesRawSchema
+
+
+class SyntheticData:
+    """Games and box score raw data with the same columns and types as the basket reference parquet files.
+
+    Each regular season every team plays nb_games_per_team games, one per round (every two days), against random
+    opponents. The nb_playoff_teams teams with the most wins then play best of seven series (2-2-1-1-1 home court
+    pattern), the winner of the last game of the season is the champion. Results depend on a strength of each team,
+    carried over from a season to the next. Players mostly stay in their team, some change team between seasons.
+    SplitPlayoff and Labels find the regular season and the champion when nb_teams * nb_games_per_team is their number
+    of regular season lines (30 teams and 82 games since 2004).
+
+    :attributes first_season, last_season: range of seasons.
+    :attributes nb_teams: number of teams, even.
+    :attributes nb_games_per_team: number of regular season games of each team.
+    :attributes nb_playoff_teams: number of teams in the playoff, a power of 2.
+    :attributes nb_players_per_game: number of players of each team in the box score of a game.
+    :attributes seed: seed of the random generator.
+    :methods build, write
+    """
+    games_filename = 'BasketrefGames.parquet'
+    box_score_filename = 'BasketrefBoxscores.parquet'
+
+    home_court_advantage = 0.3  # in strength units
+    nb_extra_players = 3  # players of the roster that are not in the box score of a game
+    players_transfer_rate = 0.1  # share of players changing team between two seasons
+
+    def __init__(self, first_season=2009, last_season=2018, nb_teams=30, nb_games_per_team=82, nb_playoff_teams=16,
+                 nb_players_per_game=10, seed=0):
+        if nb_teams % 2:
+            raise ValueError(f"nb_teams must be even, got {nb_teams}.")
+        if nb_playoff_teams > nb_teams or nb_playoff_teams & (nb_playoff_teams - 1):
+            raise ValueError(f"nb_playoff_teams must be a power of 2 lower than nb_teams, got {nb_playoff_teams}.")
+        self.first_season = first_season
+        self.last_season = last_season
+        self.nb_teams = nb_teams
+        self.nb_games_per_team = nb_games_per_team
+        self.nb_playoff_teams = nb_playoff_teams
+        self.nb_players_per_game = nb_players_per_game
+        self.seed = seed
+        self.teams = np.array([self._team_name(team) for team in range(nb_teams)])
+
+    def build(self):
+        """ Generate the raw data.
+        :return: games dataframe with one line per game, box score dataframe with one line per player per game.
+        """
+        rng = np.random.default_rng(self.seed)
+        roster_size = self.nb_players_per_game + self.nb_extra_players
+        rosters = np.arange(self.nb_teams * roster_size).reshape(self.nb_teams, roster_size)
+        strength = rng.normal(size=self.nb_teams)
+
+        games, seasons_rosters = [], []
+        for season in range(self.first_season, self.last_season + 1):
+            strength = 0.7 * strength + 0.3 * rng.normal(size=self.nb_teams)
+            if season > self.first_season:
+                rosters = self._transfer_players(rosters, rng)
+            seasons_rosters.append(rosters)
+
+            season_games = self._regular_season(season, strength, rng)
+            games.extend([season_games, self._playoff(season, season_games, strength, rng)])
+
+        games = pd.concat(games, ignore_index=True)
+        raw_games = self._games_columns(games, rng)
+        box_score = self._box_score(games, raw_games[GamesRawSchema.game_id].to_numpy(), np.stack(seasons_rosters),
+                                    rng)
+        return raw_games, box_score
+
+    def write(self, directory):
+        """ Generate the raw data and write it as BasketrefGames.parquet and BasketrefBoxscores.parquet.
+        :param directory: output directory, created if needed.
+        :return: paths of the games and box score files.
+        """
+        os.makedirs(directory, exist_ok=True)
+        games, box_score = self.build()
+        path_games = os.path.join(directory, self.games_filename)
+        path_box_score = os.path.join(directory, self.box_score_filename)
+        games.to_parquet(path_games, index=False)
+        box_score.to_parquet(path_box_score, index=False)
+        return path_games, path_box_score
+
+    def _regular_season(self, season, strength, rng):
+        """ One round every two days, every team plays once per round."""
+        rounds = rng.permuted(np.tile(np.arange(self.nb_teams), (self.nb_games_per_team, 1)), axis=1)
+        home, away = rounds[:, 0::2].ravel(), rounds[:, 1::2].ravel()
+        day = np.repeat(2 * np.arange(self.nb_games_per_team), self.nb_teams // 2)
+        return self._play_games(season, home, away, day, strength, rng)
+
+    def _playoff(self, season, regular_season, strength, rng):
+        """ Best of seven series between seeds 1 and n, 2 and n-1, ..., the winners meet in the next round."""
+        wins = np.bincount(np.where(regular_season['ylabel'] == 1, regular_season['home'], regular_season['away']),
+                           minlength=self.nb_teams)
+        ranking = np.argsort(-wins - 1e-3 * strength, kind='stable')[:self.nb_playoff_teams]
+        seeds = np.empty(self.nb_teams, dtype=int)
+        seeds[ranking] = np.arange(self.nb_playoff_teams)
+        series = np.stack([ranking[:len(ranking) // 2], ranking[::-1][:len(ranking) // 2]], axis=1)  # best seed first
+        series = series[self._bracket_order(len(series))]
+
+        first_day = 2 * self.nb_games_per_team + 5
+        playoff_games = []
+        while True:
+            # home court of the better seed on games 1, 2, 5, 7
+            is_top_seed_home = np.array([True, True, False, False, True, False, True])
+            top_seed, bottom_seed = np.repeat(series[:, :1], 7, axis=1), np.repeat(series[:, 1:], 7, axis=1)
+            home = np.where(is_top_seed_home, top_seed, bottom_seed)
+            away = np.where(is_top_seed_home, bottom_seed, top_seed)
+            day = np.broadcast_to(first_day + np.arange(7), home.shape)
+            round_games = self._play_games(season, home.ravel(), away.ravel(), day.ravel(), strength, rng)
+
+            top_seed_won = ((round_games['home'] == top_seed.ravel()) == (round_games['ylabel'] == 1)).to_numpy()
+            top_seed_won = top_seed_won.reshape(-1, 7)
+            top_seed_wins = np.cumsum(top_seed_won, axis=1)
+            bottom_seed_wins = np.arange(1, 8) - top_seed_wins
+            # a game is played while no team has won 4 games
+            is_played = np.maximum(top_seed_wins - top_seed_won, bottom_seed_wins - ~top_seed_won) < 4
+            playoff_games.append(round_games[is_played.ravel()])
+            if len(series) == 1:
+                return pd.concat(playoff_games, ignore_index=True)
+
+            winners = np.where(top_seed_wins[:, -1] >= 4, series[:, 0], series[:, 1]).reshape(-1, 2)
+            series = np.take_along_axis(winners, np.argsort(seeds[winners], axis=1), axis=1)
+            first_day += 8
+
+    def _play_games(self, season, home, away, day, strength, rng):
+        """ Winner of each game from the teams strength."""
+        home_win_proba = 1 / (1 + np.exp(-(strength[home] - strength[away] + self.home_court_advantage)))
+        ylabel = (rng.random(len(home)) < home_win_proba).astype(int)
+        return pd.DataFrame({'season': season, 'home': home, 'away': away, 'day': day, 'ylabel': ylabel})
+
+    def _games_columns(self, games, rng):
+        """ Raw games columns : ids, dates, points, four factors as decimal strings."""
+        nb_games = len(games)
+        is_home_win = games['ylabel'].to_numpy() == 1
+
+        home_points = rng.integers(18, 36, size=(nb_games, 4))
+        away_points = rng.integers(18, 36, size=(nb_games, 4))
+        # the winner of the game scores more points : swap the quarters of games won by the team with fewer points
+        is_swapped = (home_points.sum(axis=1) < away_points.sum(axis=1)) == is_home_win
+        home_points[is_swapped], away_points[is_swapped] = away_points[is_swapped], home_points[is_swapped].copy()
+        is_overtime = home_points.sum(axis=1) == away_points.sum(axis=1)
+        winner_ot_points = rng.integers(8, 16, size=nb_games)
+        loser_ot_points = winner_ot_points - rng.integers(1, 6, size=nb_games)
+
+        start_dates = pd.to_datetime(games['season'].astype(str) + '-10-20') - pd.DateOffset(years=1)
+        dates = (start_dates + pd.to_timedelta(games['day'], unit='D')).dt.strftime('%Y-%m-%d')
+        home_ids, away_ids = self.teams[games['home']], self.teams[games['away']]
+
+        raw_games = pd.DataFrame({
+            GamesRawSchema.date_col: dates, GamesRawSchema.season: games['season'].to_numpy(),
+            GamesRawSchema.game_id: dates.str.replace('-', '', regex=False) + '0' + home_ids,
+            GamesRawSchema.home: home_ids, GamesRawSchema.away: away_ids, GamesRawSchema.ylabel: games['ylabel']
+        })
+        for quarter in range(4):
+            raw_games[f'home{quarter + 1}'] = home_points[:, quarter]
+            raw_games[f'away{quarter + 1}'] = away_points[:, quarter]
+        for column in GamesRawSchema.overtime_points:
+            raw_games[column] = np.nan
+        raw_games.loc[is_overtime, 'home1_ot'] = np.where(is_home_win, winner_ot_points, loser_ot_points)[is_overtime]
+        raw_games.loc[is_overtime, 'away1_ot'] = np.where(is_home_win, loser_ot_points, winner_ot_points)[is_overtime]
+
+        four_factors = {'pace': (88, 104), 'efg': (0.42, 0.60), 'tov': (9, 17), 'orb': (18, 34), 'ftfga': (0.12, 0.32),
+                        'ortg': (95, 125)}
+        for side in ('away', 'home'):
+            for factor, (low, high) in four_factors.items():
+                raw_games[f'{side}_{factor}'] = self._decimal_strings(rng.uniform(low, high, size=nb_games))
+        for column in GamesRawSchema.other_stats:
+            raw_games[column] = rng.integers(60, 130, size=nb_games)
+        return raw_games[GamesRawSchema.columns]
+
+    def _box_score(self, games, game_ids, seasons_rosters, rng):
+        """ nb_players_per_game random players of the roster of each team of each game.
+        :param seasons_rosters: array with the players of each team, by season.
+        """
+        season_index = np.repeat(games['season'].to_numpy() - self.first_season, 2)
+        teams = np.stack([games['home'].to_numpy(), games['away'].to_numpy()], axis=1).ravel()
+        rosters = seasons_rosters[season_index, teams]  # one line per game per team
+        players_order = np.argsort(rng.random(rosters.shape), axis=1)[:, :self.nb_players_per_game]
+        players = np.take_along_axis(rosters, players_order, axis=1).ravel()
+        nb_lines = len(players)
+
+        box_score = pd.DataFrame({
+            BoxScoreRawSchema.game_id: np.repeat(game_ids, 2 * self.nb_players_per_game),
+            BoxScoreRawSchema.player_id: pd.Series(players).map('p{:05d}'.format),
+            BoxScoreRawSchema.mp: self._decimal_strings(rng.uniform(0, 45, size=nb_lines), decimals=2),
+        })
+        for column in BoxScoreRawSchema.stats:
+            box_score[column] = rng.integers(0, 10, size=nb_lines)
+        return box_score
+
+    def _transfer_players(self, rosters, rng):
+        """ Swap a share of the players between random teams."""
+        rosters = rosters.copy().ravel()
+        nb_transfers = int(self.players_transfer_rate * len(rosters))
+        moved = rng.choice(len(rosters), size=nb_transfers, replace=False)
+        rosters[moved] = rosters[rng.permutation(moved)]
+        return rosters.reshape(self.nb_teams, -1)
+
+    @staticmethod
+    def _bracket_order(nb_series):
+        """ Order of the series (by seed of the best team) so that the best seeds meet as late as possible."""
+        order = np.array([0])
+        while len(order) < nb_series:
+            order = np.stack([order, 2 * len(order) - 1 - order], axis=1).ravel()
+        return order
+
+    @staticmethod
+    def _decimal_strings(values, decimals=3):
+        return pd.Series(np.round(values, decimals)).astype(str).str.replace('.', ',', regex=False)
+
+    @staticmethod
+    def _team_name(team):
+        return ''.join(chr(ord('A') + (team // 26 ** position) % 26) for position in (2, 1, 0))
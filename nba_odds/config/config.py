@@ -8,12 +8,25 @@ class Paths:
     path_basket_ref_box_score = os.path.join(project_dir, "data/BasketrefBoxscores.parquet")
     path_basket_ref_games = os.path.join(project_dir, "data/BasketrefGames.parquet")
 
-    output_preseason_features = os.path.join(project_dir, 'data/preseason_dataset.csv')
-    output_preplayoff_features = os.path.join(project_dir, 'data/preplayoff_dataset.csv')
+    output_preseason_features = os.path.join(project_dir, 'data/preseason_dataset.parquet')
+    output_preplayoff_features = os.path.join(project_dir, 'data/preplayoff_dataset.parquet')
+    output_preseason_features_csv = os.path.join(project_dir, 'data/preseason_dataset.csv')
+    output_preplayoff_features_csv = os.path.join(project_dir, 'data/preplayoff_dataset.csv')
+
+    elo_checkpoint_dir = os.path.join(project_dir, 'data/elo_checkpoint/')
+    cache_dir = os.path.join(project_dir, 'data/cache/')
+    id_dictionary = os.path.join(project_dir, 'data/game_ids.parquet')
 
     model_dir = os.path.join(project_dir, 'model/')
-    output_preseason_odds_path = os.path.join(project_dir, 'predictions/nba_preseason_predictions.csv')
-    output_playoff_odds_path = os.path.join(project_dir, 'predictions/nba_playoff_predictions.csv')
+    model_params_dir = os.path.join(project_dir, 'model/params/')
+    output_preseason_odds_path = os.path.join(project_dir, 'predictions/nba_preseason_predictions.parquet')
+    output_playoff_odds_path = os.path.join(project_dir, 'predictions/nba_playoff_predictions.parquet')
+    output_preseason_odds_csv_path = os.path.join(project_dir, 'predictions/nba_preseason_predictions.csv')
+    output_playoff_odds_csv_path = os.path.join(project_dir, 'predictions/nba_playoff_predictions.csv')
+
+    run_report = os.path.join(project_dir, 'data/run_report.jsonl')
+    benchmark_results = os.path.join(project_dir, 'benchmark/results.json')
+    benchmark_baseline = os.path.join(project_dir, 'benchmark/baseline.json')
 
 
 class GamesRawSchema:
@@ -34,6 +47,28 @@ class GamesRawSchema:
     away2 = 'away2'
     away3 = 'away3'
     away4 = 'away4'
+    quarter_points = [home1, home2, home3, home4, away1, away2, away3, away4]
+    overtime_points = ['home1_ot', 'home2_ot', 'home3_ot', 'home4_ot', 'away1_ot', 'away2_ot', 'away3_ot', 'away4_ot']
+
+    # Four factors stats, stored as strings with a comma as decimal separator
+    decimal_columns = ['away_pace', 'away_efg', 'away_tov', 'away_orb', 'away_ftfga', 'away_ortg',
+                       'home_pace', 'home_efg', 'home_tov', 'home_orb', 'home_ftfga', 'home_ortg']
+    other_stats = ['home_ftscore', 'away_ftscore']
+
+    columns = ([date_col, season, game_id, home, away, ylabel] + quarter_points + overtime_points + decimal_columns
+               + other_stats)
+
+
+class BoxScoreRawSchema:
+    """ Columns used in the box score raw data."""
+    game_id = 'game_id'
+    player_id = 'player_id'
+
+    # minutes played, stored as string with a comma as decimal separator
+    mp = 'mp'
+    stats = ['fg', 'stl', '_3p', 'ft', 'blk', 'orb', 'ast', 'drb', 'pf', 'fta', 'fga', 'tov']
+
+    columns = [game_id, player_id, mp] + stats
 
 
 class ProcessedSchema:
@@ -41,3 +76,8 @@ class ProcessedSchema:
     team_id = 'id'
     points_before_ot = 'points_before_ot'  # ot means overtime.
     won = 'won'
+
+    # phase of the season of a game
+    phase = 'phase'
+    regular_season = 'regular'
+    playoff = 'playoff'
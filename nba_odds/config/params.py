@@ -9,6 +9,18 @@ class PerParams:
 
     good_player_per_threshold = 0.85
 
+
+class EloParams:
+    """ Parameters used for Elo rating computation. """
+    k = 20
+    home_court_advantage = 100
+    initial_elo = 1500.0
+
+    # elo of a team at the start of a season is pulled back toward the mean elo.
+    mean_elo = 1505
+    season_carry_over = 0.75
+
+
 class LogisticRegressionParams:
     """ Model parameters """
     C = 0.75
@@ -17,3 +29,25 @@ class LogisticRegressionParams:
     penalty = 'l1'
     solver = 'liblinear'
 
+
+
+class RandomForestParams:
+    """ Playoff model parameters """
+    n_estimators = 100
+    max_depth = None
+    min_samples_leaf = 1
+    max_features = 'sqrt'
+
+
+class LogisticRegressionSearchParams:
+    """ Candidate values of the preseason model parameters for the hyperparameter search. """
+    C = [0.01, 0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 2.0, 5.0]
+    penalty = ['l1', 'l2']
+
+
+class RandomForestSearchParams:
+    """ Candidate values of the playoff model parameters for the hyperparameter search. """
+    n_estimators = [50, 100, 200, 400]
+    max_depth = [None, 3, 5, 8]
+    min_samples_leaf = [1, 2, 5, 10]
+    max_features = ['sqrt', 0.5, None]
@@ -0,0 +1,74 @@
+""" Class to look up teams elo ratings at any date."""
+import numpy as np
+import pandas as pd
+
+
+class EloIndex:
+    """Point in time elo lookup, built from EloRating.compute output.
+
+    Ratings are stored sorted by team and date, in one array with the start position of each team, queries are binary
+    searches in the team slice.
+    With direction 'backward', the rating as of a date is the elo after the last game on or before this date : the
+    result of this game is included. With direction 'forward', it is the elo before the first game on or after this
+    date, i.e. the elo the team has before its next game.
+
+    :attributes teams_elo_df: dataframe with elo before (elo) and after (elo_after) each game of each team.
+    :methods as_of, as_of_many, ratings_on
+    """
+
+    def __init__(self, teams_elo_df):
+        sorted_elo = teams_elo_df.sort_values(by=['id', 'date'], kind='stable')
+        team_codes, self.teams = pd.factorize(sorted_elo['id'], sort=True)
+        self._team_codes = {team: code for code, team in enumerate(self.teams)}
+        self._team_starts = np.searchsorted(team_codes, np.arange(len(self.teams) + 1))
+        self._dates = pd.to_datetime(sorted_elo['date']).to_numpy(dtype='datetime64[ns]')
+        self._elo = sorted_elo['elo'].to_numpy(dtype=float)
+        self._elo_after = sorted_elo['elo_after'].to_numpy(dtype=float)
+
+    def as_of(self, team, date, direction='backward'):
+        """ Elo rating of a team at a date.
+        :param team: team id.
+        :param date: date of the rating.
+        :param direction: 'backward' or 'forward'.
+        :return: elo, nan if the team has no game before (backward) or after (forward) the date.
+        """
+        return self.as_of_many(teams=[team], dates=[date], direction=direction)[0]
+
+    def as_of_many(self, teams, dates, direction='backward'):
+        """ Elo ratings for pairs of teams and dates.
+        :param teams: list-like of team ids.
+        :param dates: list-like of dates, same length as teams.
+        :param direction: 'backward' or 'forward'.
+        :return: numpy array of elo, nan when there is no game to read the rating from.
+        """
+        if direction not in ('backward', 'forward'):
+            raise ValueError(f"direction must be 'backward' or 'forward', got {direction}.")
+        teams = pd.Series(teams).map(self._team_codes).to_numpy()
+        dates = pd.to_datetime(pd.Series(dates)).to_numpy(dtype='datetime64[ns]')
+
+        elo = np.full(len(dates), np.nan)
+        for team_code in pd.unique(teams[~pd.isna(teams)]):
+            queries = np.flatnonzero(teams == team_code)
+            start, end = self._team_starts[int(team_code)], self._team_starts[int(team_code) + 1]
+            if direction == 'backward':
+                positions = np.searchsorted(self._dates[start:end], dates[queries], side='right') - 1
+                found = positions >= 0
+                elo[queries[found]] = self._elo_after[start + positions[found]]
+            else:
+                positions = np.searchsorted(self._dates[start:end], dates[queries], side='left')
+                found = positions < end - start
+                elo[queries[found]] = self._elo[start + positions[found]]
+        return elo
+
+    def ratings_on(self, dates, teams=None, direction='backward'):
+        """ Elo ratings of every team on every date.
+        :param dates: list-like of dates.
+        :param teams: list-like of team ids, all the teams of the index by default.
+        :param direction: 'backward' or 'forward'.
+        :return: pandas dataframe with one line per date and one column per team.
+        """
+        teams = self.teams if teams is None else pd.Index(teams)
+        dates = pd.DatetimeIndex(pd.to_datetime(pd.Series(dates)), name='date')
+        elo = self.as_of_many(teams=np.tile(teams, len(dates)), dates=np.repeat(dates, len(teams)),
+                              direction=direction)
+        return pd.DataFrame(elo.reshape(len(dates), len(teams)), index=dates, columns=pd.Index(teams, name='id'))
@@ -2,26 +2,37 @@
 Class to compute Elo rating feature.
 https://towardsdatascience.com/predicting-the-outcome-of-nba-games-with-machine-learning-a810bb768f20
 """
+import json
 import math
+import os
 
+import numpy as np
 import pandas as pd
 
 from nba_odds.config.config import GamesRawSchema
+from nba_odds.config.params import EloParams
 
 
 class EloRating:
     """Class to compute elo rating feature.
 
     :attributes basket_ref_games: raw pandas dataframe with one line per game.
-    :methods compute
+    :attributes checkpoint_dir: optional directory where the elo of processed games, the last elo of each team and
+        the EloParams values are saved by update, for the next update.
+    :methods compute, update, apply_games
     """
-    def __init__(self, basket_ref_games):
+    params_names = ['k', 'home_court_advantage', 'initial_elo', 'mean_elo', 'season_carry_over']
+
+    def __init__(self, basket_ref_games, checkpoint_dir=None):
         self.basket_ref_games = basket_ref_games
+        self.checkpoint_dir = checkpoint_dir
 
     home_pts_col = 'home_points'
     away_pts_col = 'away_points'
 
-    HOME_COURT_ADVANTAGE = 100
+    elo_games_filename = 'elo_games.parquet'
+    teams_state_filename = 'teams_state.parquet'
+    last_game_filename = 'last_game.json'
 
     def compute(self):
         """
@@ -29,17 +40,62 @@ class EloRating:
 
         :return: elo_rating dataframe
         """
-        basket_ref_games = self.basket_ref_games
-
-        # already done in games_per_team - todo
-        basket_ref_games[GamesRawSchema.date_col] = pd.to_datetime(basket_ref_games[GamesRawSchema.date_col])
+        games_with_total_pts = self._prepare_games(self.basket_ref_games)
+        teams_elo_df = self._calculate_elo_ratings(games_with_total_pts)
+        return teams_elo_df
 
-        games_with_total_pts = self._get_total_points(basket_ref_games)
+    def update(self, new_games):
+        """ Apply only new games on top of the checkpoint saved by the previous run.
 
-        team_stats_cols = ['game_id', 'home_id', 'away_id', 'season', 'datetime',
-                           self.home_pts_col, self.away_pts_col, GamesRawSchema.ylabel]
-        teams_elo_df = self._calculate_elo_ratings(games_with_total_pts[team_stats_cols])
-        return teams_elo_df
+        Games already in the checkpoint with the same teams, season, date and score are skipped. New games dated
+        before the last processed date and corrected games (known game_id, different content) trigger a replay of the
+        checkpointed games from the earliest affected date only. Without a checkpoint, with a checkpoint computed with
+        other EloParams values, or with a checkpoint of game ids of another type (raw ids or IdDictionary codes), all
+        games are computed.
+        :param new_games: raw pandas dataframe with one line per game, same format as basket_ref_games.
+        :return: elo_rating dataframe with all the games of the checkpoint and the new ones.
+        """
+        games_to_add = self._prepare_games(new_games)
+        checkpoint = self._load_checkpoint()
+        if checkpoint is not None and checkpoint[0]['game_id'].dtype.kind != games_to_add['game_id'].dtype.kind:
+            # checkpoint written with raw game ids and new games with IdDictionary codes, or the other way around
+            checkpoint = None
+        if checkpoint is None:
+            elo_games = self._run_elo(games=games_to_add.sort_values(by=GamesRawSchema.date_col).reset_index(drop=True),
+                                      teams_state={})
+            self._save_checkpoint(elo_games)
+            return self._to_teams_elo(elo_games)
+
+        elo_games, teams_state, last_date = checkpoint
+        games_to_add = self._drop_known_games(games_to_add, elo_games)
+        games_to_add = games_to_add.sort_values(by=GamesRawSchema.date_col).reset_index(drop=True)
+
+        affected = games_to_add[(games_to_add[GamesRawSchema.date_col] <= last_date)
+                                | games_to_add['game_id'].isin(elo_games['game_id'])]
+        if not affected.empty:
+            replay_from = affected[GamesRawSchema.date_col].min()
+            replayed_games = elo_games[(elo_games[GamesRawSchema.date_col] >= replay_from)
+                                       & ~elo_games['game_id'].isin(games_to_add['game_id'])]
+            elo_games = elo_games[elo_games[GamesRawSchema.date_col] < replay_from]
+            teams_state = self._get_teams_state(elo_games)
+            games_to_add = (pd.concat([replayed_games[self.team_stats_cols], games_to_add], ignore_index=True)
+                            .sort_values(by=GamesRawSchema.date_col).reset_index(drop=True))
+
+        new_elo_games = self._run_elo(games=games_to_add, teams_state=teams_state)
+        elo_games = pd.concat([elo_games, new_elo_games], ignore_index=True)
+        self._save_checkpoint(elo_games)
+        return self._to_teams_elo(elo_games)
+
+    def apply_games(self, new_games, teams_state):
+        """ Apply games on top of an in memory elo state, without checkpoint. Games are applied in date order, after
+        the games already in the state.
+        :param new_games: raw pandas dataframe with one line per game, same format as basket_ref_games.
+        :param teams_state: dict team -> (last elo, last season), updated in place.
+        :return: elo_rating dataframe of the new games.
+        """
+        games = self._prepare_games(new_games).sort_values(by=GamesRawSchema.date_col, kind='stable')
+        elo_games = self._run_elo(games=games.reset_index(drop=True), teams_state=teams_state)
+        return self._to_teams_elo(elo_games)
 
     @staticmethod
     def get_first_elo_season(teams_elo_df):
@@ -52,52 +108,143 @@ class EloRating:
                      .drop_duplicates(['id', 'season'], keep='first'))
         return first_elo[['id', 'elo', 'season']]
 
-    def _calculate_elo_ratings(self, games_with_total_pts):
+    @property
+    def team_stats_cols(self):
+        return ['game_id', 'home_id', 'away_id', 'season', 'datetime',
+                self.home_pts_col, self.away_pts_col, GamesRawSchema.ylabel]
+
+    def _prepare_games(self, basket_ref_games):
+        # already done in games_per_team - todo
+        basket_ref_games[GamesRawSchema.date_col] = pd.to_datetime(basket_ref_games[GamesRawSchema.date_col])
+
+        games_with_total_pts = self._get_total_points(basket_ref_games)
+        return games_with_total_pts[self.team_stats_cols]
 
+    def _calculate_elo_ratings(self, games_with_total_pts):
         team_stats = (games_with_total_pts
                       .sort_values(by=GamesRawSchema.date_col).reset_index(drop=True))
-        elo_df = pd.DataFrame(
-            columns=['game_id', 'home_id', 'away_id', 'h_team_elo_before', 'a_team_elo_before', 'h_team_elo_after',
-                     'a_team_elo_after']
-        )
-        teams_elo_df = pd.DataFrame(columns=['game_id', 'id', 'elo', 'date', 'season'])
-        for index, row in (team_stats.iterrows()):
-            game_id = row['game_id']
-            game_date = row['datetime']
-            season = row['season']
-            h_team, a_team = row['home_id'], row['away_id']
-            h_score, a_score = row['home_points'], row['away_points']
-            ylabel = row['ylabel']
-
-            if h_team not in elo_df['home_id'].values and h_team not in elo_df['away_id'].values:
-                h_team_elo_before = 1500.0
-            else:
-                h_team_elo_before = self._get_prev_elo(h_team, game_date, season, team_stats, elo_df)
-
-            if a_team not in elo_df['home_id'].values and a_team not in elo_df['away_id'].values:
-                a_team_elo_before = 1500.0
-            else:
-                a_team_elo_before = self._get_prev_elo(a_team, game_date, season, team_stats, elo_df)
+        elo_games = self._run_elo(games=team_stats, teams_state={})
+        return self._to_teams_elo(elo_games)
+
+    def _run_elo(self, games, teams_state):
+        """ Walk date sorted games once and keep the last elo and season of each team.
+
+        Games of a same date all use the ratings known at the end of the previous date, updates are applied once
+        the date is over.
+        :param games: date sorted dataframe with one line per game.
+        :param teams_state: dict team -> (last elo, last season), updated in place.
+        :return: games dataframe with elo of both teams before and after the game.
+        """
+        nb_games = len(games)
+        h_elo_before, a_elo_before = np.empty(nb_games), np.empty(nb_games)
+        h_elo_after, a_elo_after = np.empty(nb_games), np.empty(nb_games)
+
+        pending_state = {}
+        current_date = None
+        rows = zip(games['datetime'].to_numpy(), games['season'].to_numpy(),
+                   games['home_id'].to_numpy(), games['away_id'].to_numpy(),
+                   games[self.home_pts_col].to_numpy(), games[self.away_pts_col].to_numpy(),
+                   games[GamesRawSchema.ylabel].to_numpy())
+        for index, (game_date, season, h_team, a_team, h_score, a_score, ylabel) in enumerate(rows):
+            if game_date != current_date:
+                teams_state.update(pending_state)
+                pending_state = {}
+                current_date = game_date
+
+            h_team_elo_before = self._get_prev_elo(h_team, season, teams_state)
+            a_team_elo_before = self._get_prev_elo(a_team, season, teams_state)
 
             h_team_elo_after, a_team_elo_after = self._update_elo(
                 home_score=h_score, away_score=a_score,
                 home_elo=h_team_elo_before, away_elo=a_team_elo_before, ylabel=ylabel
             )
+            pending_state[h_team] = (h_team_elo_after, season)
+            pending_state[a_team] = (a_team_elo_after, season)
 
-            new_row = {'game_id': game_id, 'home_id': h_team, 'away_id': a_team,
-                       'h_team_elo_before': h_team_elo_before, 'a_team_elo_before': a_team_elo_before,
-                       'h_team_elo_after': h_team_elo_after, 'a_team_elo_after': a_team_elo_after}
+            h_elo_before[index], a_elo_before[index] = h_team_elo_before, a_team_elo_before
+            h_elo_after[index], a_elo_after[index] = h_team_elo_after, a_team_elo_after
+        teams_state.update(pending_state)
 
-            teams_row_one = {'game_id': game_id, 'id': h_team, 'elo': h_team_elo_before,
-                             'date': game_date, 'season': season}
-            teams_row_two = {'game_id': game_id, 'id': a_team, 'elo': a_team_elo_before,
-                             'date': game_date, 'season': season}
+        elo_games = games.copy()
+        elo_games['h_team_elo_before'], elo_games['a_team_elo_before'] = h_elo_before, a_elo_before
+        elo_games['h_team_elo_after'], elo_games['a_team_elo_after'] = h_elo_after, a_elo_after
+        return elo_games
 
-            elo_df = elo_df.append(new_row, ignore_index=True)
-            teams_elo_df = teams_elo_df.append(teams_row_one, ignore_index=True)
-            teams_elo_df = teams_elo_df.append(teams_row_two, ignore_index=True)
+    @staticmethod
+    def _to_teams_elo(elo_games):
+        """ One line per team per game, home team first, with the elo before (elo) and after (elo_after) the game."""
+        def interleave(home_values, away_values):
+            values = np.empty(2 * len(home_values), dtype=np.result_type(home_values, away_values))
+            values[0::2], values[1::2] = home_values, away_values
+            return values
+
+        teams_elo_df = pd.DataFrame({
+            'game_id': np.repeat(elo_games['game_id'].to_numpy(), 2),
+            'id': interleave(elo_games['home_id'].to_numpy(), elo_games['away_id'].to_numpy()),
+            'elo': interleave(elo_games['h_team_elo_before'].to_numpy(), elo_games['a_team_elo_before'].to_numpy()),
+            'elo_after': interleave(elo_games['h_team_elo_after'].to_numpy(), elo_games['a_team_elo_after'].to_numpy()),
+            'date': np.repeat(elo_games['datetime'].to_numpy(), 2),
+            'season': np.repeat(elo_games['season'].to_numpy(), 2),
+        })
         return teams_elo_df
 
+    def _save_checkpoint(self, elo_games):
+        """ Save the elo of processed games, the last elo and season of each team, the last processed game and the
+        elo parameters."""
+        if self.checkpoint_dir is None:
+            return
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        elo_games.to_parquet(os.path.join(self.checkpoint_dir, self.elo_games_filename), index=False)
+
+        teams_state = self._get_teams_state(elo_games)
+        (pd.DataFrame([(team, elo, season) for team, (elo, season) in teams_state.items()],
+                      columns=['id', 'elo', 'season'])
+         .to_parquet(os.path.join(self.checkpoint_dir, self.teams_state_filename), index=False))
+
+        last_game = elo_games.iloc[-1] if not elo_games.empty else None
+        with open(os.path.join(self.checkpoint_dir, self.last_game_filename), 'w') as last_game_file:
+            json.dump({'game_id': None if last_game is None else str(last_game['game_id']),
+                       'date': None if last_game is None else last_game[GamesRawSchema.date_col].isoformat(),
+                       'params': self._elo_params()},
+                      last_game_file)
+
+    def _load_checkpoint(self):
+        """ Load the checkpoint saved by the previous run, None if there is none or if it was computed with other
+        EloParams values.
+        :return: processed games with elo, dict team -> (last elo, last season), last processed date.
+        """
+        if self.checkpoint_dir is None:
+            return None
+        if not os.path.exists(os.path.join(self.checkpoint_dir, self.last_game_filename)):
+            return None
+        with open(os.path.join(self.checkpoint_dir, self.last_game_filename)) as last_game_file:
+            last_game = json.load(last_game_file)
+        if last_game.get('params') != self._elo_params():
+            return None
+        elo_games = pd.read_parquet(os.path.join(self.checkpoint_dir, self.elo_games_filename))
+        teams_state_df = pd.read_parquet(os.path.join(self.checkpoint_dir, self.teams_state_filename))
+        teams_state = {team: (elo, season) for team, elo, season in teams_state_df.itertuples(index=False)}
+        return elo_games, teams_state, pd.Timestamp(last_game['date'])
+
+    @classmethod
+    def _elo_params(cls):
+        return {name: float(getattr(EloParams, name)) for name in cls.params_names}
+
+    @staticmethod
+    def _get_teams_state(elo_games):
+        """ Last elo and season of each team after the provided games."""
+        home = elo_games[['home_id', 'h_team_elo_after', 'season']].set_axis(['id', 'elo', 'season'], axis=1)
+        away = elo_games[['away_id', 'a_team_elo_after', 'season']].set_axis(['id', 'elo', 'season'], axis=1)
+        # home and away lines are interleaved to keep the games order
+        last_elo = (pd.concat([home, away]).sort_index(kind='stable')
+                    .drop_duplicates('id', keep='last'))
+        return {team: (elo, season) for team, elo, season in last_elo.itertuples(index=False)}
+
+    def _drop_known_games(self, new_games, elo_games):
+        """ Remove new games that are already in the checkpoint with the same content."""
+        known_games = pd.merge(new_games, elo_games[self.team_stats_cols], on=self.team_stats_cols, how='inner')
+        return new_games[~new_games['game_id'].isin(known_games['game_id'])]
+
     def _get_total_points(self, basket_ref_games):
         home_pts_cols = ['home1', 'home2', 'home3', 'home4', 'home1_ot', 'home2_ot', 'home3_ot', 'home4_ot']
         basket_ref_games[self.home_pts_col] = sum(
@@ -109,21 +256,15 @@ class EloRating:
         )
         return basket_ref_games
 
-    # takes into account prev season elo
+    # takes into account prev season elo, parameters are read from EloParams at each call
     @staticmethod
-    def _get_prev_elo(team, date, season, team_stats, elo_df):
-        prev_game = (team_stats[
-            (team_stats['datetime'] < date) &
-            ((team_stats['home_id'] == team) | (team_stats['away_id'] == team))
-            ].copy().sort_values(by='datetime').tail(1).iloc[0])
-
-        if team == prev_game['home_id']:
-            elo_rating = elo_df[elo_df['game_id'] == prev_game['game_id']]['h_team_elo_after'].values[0]
-        else:
-            elo_rating = elo_df[elo_df['game_id'] == prev_game['game_id']]['a_team_elo_after'].values[0]
+    def _get_prev_elo(team, season, teams_state):
+        if team not in teams_state:
+            return EloParams.initial_elo
 
-        if prev_game['season'] != season:
-            return (0.75 * elo_rating) + (0.25 * 1505)
+        elo_rating, prev_season = teams_state[team]
+        if prev_season != season:
+            return (EloParams.season_carry_over * elo_rating) + ((1 - EloParams.season_carry_over) * EloParams.mean_elo)
         else:
             return elo_rating
 
@@ -146,21 +287,36 @@ class EloRating:
         return updated_home_elo, updated_away_elo
 
     # Home and road team win probabilities implied by Elo ratings and home court adjustment
-    def _win_probs(self, home_elo, away_elo):
+    @staticmethod
+    def _win_probs(home_elo, away_elo):
         h = math.pow(10, home_elo / 400)
         r = math.pow(10, away_elo / 400)
-        a = math.pow(10, self.HOME_COURT_ADVANTAGE / 400)
+        a = math.pow(10, EloParams.home_court_advantage / 400)
 
         denom = r + a * h
         home_prob = a * h / denom
         away_prob = r / denom
         return home_prob, away_prob
 
+    @staticmethod
+    def batch_win_probs(home_elo, away_elo, home_court_advantage=None):
+        """ Same as _win_probs for numpy arrays of elo.
+        :param home_court_advantage: elo points given to the home team, EloParams.home_court_advantage by default.
+        :return: home win probabilities, away win probabilities.
+        """
+        home_court_advantage = EloParams.home_court_advantage if home_court_advantage is None else home_court_advantage
+        h = np.power(10, home_elo / 400)
+        r = np.power(10, away_elo / 400)
+        a = np.power(10, home_court_advantage / 400)
+
+        denom = r + a * h
+        return a * h / denom, r / denom
+
     # this function determines the constant used in the elo rating,
     # based on margin of victory and difference in elo ratings
     @staticmethod
     def _elo_k(mov, elo_diff):
-        k = 20
+        k = EloParams.k
         if mov > 0:
             multiplier = (mov + 3) ** 0.8 / (7.5 + 0.006 * elo_diff)
         else:
@@ -0,0 +1,103 @@
+"""
+Class to compute Elo ratings for a grid of parameters in one pass over the games.
+"""
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import ParameterGrid
+
+from nba_odds.config.config import GamesRawSchema
+from nba_odds.config.params import EloParams
+from nba_odds.features.elo_rating import EloRating
+
+
+class EloSweep(EloRating):
+    """Compute elo ratings for every parameter set of a grid.
+
+    Ratings are held in a matrix with one line per parameter set and one column per team, games of a same date are
+    updated together.
+
+    :attributes basket_ref_games: raw pandas dataframe with one line per game.
+    :attributes param_grid: dict (or list of dicts) of lists of values for k, home_court_advantage, initial_elo,
+        mean_elo and season_carry_over. Missing parameters take their EloParams value.
+    :methods compute, parameter_sets
+    """
+    def __init__(self, basket_ref_games, param_grid):
+        super().__init__(basket_ref_games=basket_ref_games)
+        self.param_grid = param_grid
+
+    @property
+    def parameter_sets(self):
+        """ Dataframe with one line per parameter set, indexed by param_set."""
+        grid = list(ParameterGrid(self.param_grid))
+        unknown_params = set().union(*grid) - set(self.params_names)
+        if unknown_params:
+            raise ValueError(f"Unknown elo parameters {sorted(unknown_params)}, expected some of {self.params_names}.")
+        parameter_sets = pd.DataFrame(grid, columns=self.params_names)
+        for param in self.params_names:
+            parameter_sets[param] = parameter_sets[param].fillna(getattr(EloParams, param))
+        parameter_sets.index.name = 'param_set'
+        return parameter_sets[self.params_names]
+
+    def _calculate_elo_ratings(self, games_with_total_pts):
+        games = (games_with_total_pts
+                 .sort_values(by=GamesRawSchema.date_col).reset_index(drop=True))
+        parameter_sets = self.parameter_sets
+        params = {param: parameter_sets[param].to_numpy(dtype=float)[:, None] for param in self.params_names}
+
+        team_codes, teams = pd.factorize(pd.concat([games['home_id'], games['away_id']]))
+        home_codes, away_codes = team_codes[:len(games)], team_codes[len(games):]
+        seasons = games['season'].to_numpy()
+        home_win = (games[GamesRawSchema.ylabel].to_numpy().astype(int) == 1).astype(float)
+        mov = (games[self.home_pts_col] - games[self.away_pts_col]).to_numpy(dtype=float)
+
+        ratings = np.repeat(params['initial_elo'], len(teams), axis=1)
+        last_season = np.empty(len(teams), dtype=seasons.dtype)
+        has_played = np.zeros(len(teams), dtype=bool)
+        h_elo_before = np.empty((len(parameter_sets), len(games)))
+        a_elo_before = np.empty((len(parameter_sets), len(games)))
+        h_elo_after, a_elo_after = np.empty_like(h_elo_before), np.empty_like(a_elo_before)
+
+        dates = games[GamesRawSchema.date_col].to_numpy()
+        date_starts = np.flatnonzero(np.r_[True, dates[1:] != dates[:-1]])
+        for start, end in zip(date_starts, np.r_[date_starts[1:], len(games)]):
+            home, away, season = home_codes[start:end], away_codes[start:end], seasons[start:end]
+            home_elo = self._carry_over(ratings[:, home], has_played[home] & (last_season[home] != season), params)
+            away_elo = self._carry_over(ratings[:, away], has_played[away] & (last_season[away] != season), params)
+
+            home_prob, away_prob = self.batch_win_probs(home_elo, away_elo, params['home_court_advantage'])
+            k = params['k'] * self._batch_elo_k_multiplier(mov[start:end], home_elo - away_elo)
+            ratings[:, home] = home_elo + k * (home_win[start:end] - home_prob)
+            ratings[:, away] = away_elo + k * ((1 - home_win[start:end]) - away_prob)
+            last_season[home], last_season[away] = season, season
+            has_played[home], has_played[away] = True, True
+
+            h_elo_before[:, start:end], a_elo_before[:, start:end] = home_elo, away_elo
+            h_elo_after[:, start:end], a_elo_after[:, start:end] = ratings[:, home], ratings[:, away]
+
+        return self._to_sweep_teams_elo(games, (h_elo_before, a_elo_before), (h_elo_after, a_elo_after))
+
+    @staticmethod
+    def _carry_over(elo, new_season, params):
+        carried_over = params['season_carry_over'] * elo + (1 - params['season_carry_over']) * params['mean_elo']
+        return np.where(new_season, carried_over, elo)
+
+    @staticmethod
+    def _batch_elo_k_multiplier(mov, elo_diff):
+        signed_elo_diff = np.where(mov > 0, elo_diff, -elo_diff)
+        return (np.abs(mov) + 3) ** 0.8 / (7.5 + 0.006 * signed_elo_diff)
+
+    def _to_sweep_teams_elo(self, games, elo_before, elo_after):
+        """ Same lines as EloRating._to_teams_elo for every parameter set, elo_before and elo_after are (home, away)
+        arrays with one line per parameter set."""
+        nb_param_sets = elo_before[0].shape[0]
+        elo_games = games[['game_id', 'home_id', 'away_id', 'season', 'datetime']]
+        teams_elo_df = self._to_teams_elo(elo_games.assign(h_team_elo_before=np.nan, a_team_elo_before=np.nan,
+                                                           h_team_elo_after=np.nan, a_team_elo_after=np.nan))
+
+        sweep_teams_elo = pd.concat([teams_elo_df] * nb_param_sets, ignore_index=True)
+        for column, (home_elo, away_elo) in (('elo', elo_before), ('elo_after', elo_after)):
+            elo = np.empty((nb_param_sets, 2 * len(games)))
+            elo[:, 0::2], elo[:, 1::2] = home_elo, away_elo
+            sweep_teams_elo[column] = elo.ravel()
+        sweep_teams_elo.insert(0, 'param_set', np.repeat(np.arange(nb_param_sets), 2 * len(games)))
+        return sweep_teams_elo
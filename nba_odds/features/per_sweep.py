@@ -0,0 +1,143 @@
+"""
+Class to compute PER features by team for a grid of parameters, from one pass over the players games.
+"""
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import ParameterGrid
+
+from nba_odds.config.params import PerParams
+from nba_odds.features.player_efficiency_rating import PER
+
+
+class PerSweep(PER):
+    """Compute the PER features by team and season for every parameter set of a grid.
+
+    The PER of each player game is computed once, without the minutes filter. The games are sorted by player and
+    season once, and the players seasons aggregates of every min_mp value are masked sums, counts and maxima over
+    them. Relevant players, good players and team aggregates of every parameter set are then masks and grouped
+    reductions on arrays with one line per parameter set.
+
+    :attributes players_stats: dataframe from odds.preprocessing.players_stats, with the box score stats.
+    :attributes players_team: dataframe from odds.preprocessing.players_stats.
+    :attributes param_grid: dict (or list of dicts) of lists of values for min_mp, min_sum_mp, min_games_played and
+        good_player_per_threshold. Missing parameters take their PerParams value.
+    :methods previous_season_per, preplayoff_season_per, parameter_sets
+    """
+    params_names = ['min_mp', 'min_sum_mp', 'min_games_played', 'good_player_per_threshold']
+
+    def __init__(self, players_stats, players_team, param_grid):
+        super().__init__(players_stats=players_stats, players_team=players_team)
+        self.param_grid = param_grid
+        self._players_seasons = None
+
+    @property
+    def parameter_sets(self):
+        """ Dataframe with one line per parameter set, indexed by param_set."""
+        grid = list(ParameterGrid(self.param_grid))
+        unknown_params = set().union(*grid) - set(self.params_names)
+        if unknown_params:
+            raise ValueError(f"Unknown PER parameters {sorted(unknown_params)}, expected some of {self.params_names}.")
+        parameter_sets = pd.DataFrame(grid, columns=self.params_names)
+        for param in self.params_names:
+            parameter_sets[param] = parameter_sets[param].fillna(getattr(PerParams, param))
+        parameter_sets.index.name = 'param_set'
+        return parameter_sets[self.params_names]
+
+    def previous_season_per(self):
+        """ Same as PER.previous_season_per for every parameter set.
+        :return: dataframe with param_set and the PER features of each team and season.
+        """
+        players_seasons, relevant_per, is_good_player = self._compute_good_players()
+        players_seasons = self.next_season_per(players_seasons)
+        is_kept = players_seasons.index.to_numpy()  # players_seasons has a range index
+        return self._aggregate_by_season_team_sweep(players_seasons, relevant_per[:, is_kept],
+                                                    is_good_player[:, is_kept])
+
+    def preplayoff_season_per(self):
+        """ Same as PER.preplayoff_season_per for every parameter set, players_stats are the regular season games.
+        :return: dataframe with param_set and the PER features of each team and season.
+        """
+        return self._aggregate_by_season_team_sweep(*self._compute_good_players())
+
+    def _compute_players_seasons(self):
+        """ PER aggregates by player and season for each distinct min_mp, computed once per instance.
+        :return: dataframe of the players seasons, array of the min_mp values and arrays (one line per min_mp value,
+            one column per player season) of the PER mean, mp sum and number of games.
+        """
+        if self._players_seasons is None:
+            per = self._calculate_unfiltered_per(self.players_stats).to_numpy(dtype=float)
+            mp = self.players_stats['mp'].to_numpy(dtype=float)
+            keys = self.players_stats[['player_id', 'season', 'game_id']]
+            is_valid = ~np.isnan(per) & keys.notna().all(axis=1).to_numpy()
+            per, mp, keys = per[is_valid], mp[is_valid], keys[is_valid]
+
+            grouped = keys.groupby(['player_id', 'season'], observed=True)
+            players_seasons = grouped.size().reset_index()[['player_id', 'season']]
+            per, mp, starts = self._sort_by_group(grouped.ngroup().to_numpy(), per, mp)
+
+            min_mps = np.unique(self.parameter_sets['min_mp'].to_numpy(dtype=float))
+            is_played = mp > min_mps[:, None]  # one line per min_mp value
+            nb_games = np.add.reduceat(is_played, starts, axis=1)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                per_mean = np.add.reduceat(np.where(is_played, per, 0), starts, axis=1) / nb_games
+            mp_sum = np.add.reduceat(np.where(is_played, mp, 0), starts, axis=1)
+            self._players_seasons = players_seasons, min_mps, per_mean, mp_sum, nb_games
+        return self._players_seasons
+
+    def _compute_good_players(self):
+        """ Relevant players and good players of each parameter set.
+        :return: dataframe of the players seasons, arrays (one line per parameter set, one column per player season)
+            of the PER mean of relevant players (nan for the others) and of whether they are good players.
+        """
+        players_seasons, min_mps, per_mean, mp_sum, nb_games = self._compute_players_seasons()
+        parameter_sets = self.parameter_sets
+        min_mp_index = np.searchsorted(min_mps, parameter_sets['min_mp'].to_numpy(dtype=float))
+        nb_games, mp_sum, per_mean = nb_games[min_mp_index], mp_sum[min_mp_index], per_mean[min_mp_index]
+
+        is_relevant = ((nb_games > 0)
+                       & (nb_games > parameter_sets['min_games_played'].to_numpy()[:, None])
+                       & (mp_sum > parameter_sets['min_sum_mp'].to_numpy()[:, None]))
+        relevant_per = np.where(is_relevant, per_mean, np.nan)
+        thresholds = np.array([
+            np.quantile(param_set_per[~np.isnan(param_set_per)], threshold) if is_relevant[index].any() else np.nan
+            for index, (param_set_per, threshold)
+            in enumerate(zip(relevant_per, parameter_sets['good_player_per_threshold']))
+        ])
+        with np.errstate(invalid='ignore'):
+            is_good_player = relevant_per > thresholds[:, None]
+        return players_seasons, relevant_per, is_good_player
+
+    def _aggregate_by_season_team_sweep(self, players_seasons, relevant_per, is_good_player):
+        """ Aggregate the relevant players of each parameter set by team and season."""
+        teams = pd.merge(players_seasons, self.players_team, on=['player_id', 'season'], how='left')
+        has_team = teams['id'].notna().to_numpy()
+        teams = teams[has_team]
+
+        grouped = teams.groupby(['season', 'id'], observed=True)
+        teams_seasons = grouped.size().reset_index()[['season', 'id']]
+        relevant_per, is_good_player, starts = self._sort_by_group(
+            grouped.ngroup().to_numpy(), relevant_per[:, has_team], is_good_player[:, has_team]
+        )
+        is_relevant = ~np.isnan(relevant_per)
+
+        nb_relevant = np.add.reduceat(is_relevant, starts, axis=1)
+        per_sum = np.add.reduceat(np.where(is_relevant, relevant_per, 0), starts, axis=1)
+        per_max = np.maximum.reduceat(np.where(is_relevant, relevant_per, -np.inf), starts, axis=1)
+        nb_good_players = np.add.reduceat(is_good_player.astype('int64'), starts, axis=1)
+
+        # a team season is in the features of a parameter set when it has relevant players
+        param_sets, teams_seasons_index = np.nonzero(nb_relevant)
+        sweep_per = teams_seasons.iloc[teams_seasons_index].reset_index(drop=True)
+        sweep_per.insert(0, 'param_set', param_sets)
+        sweep_per['PER_mean_max'] = per_max[param_sets, teams_seasons_index]
+        sweep_per['PER_mean_mean'] = (per_sum / np.maximum(nb_relevant, 1))[param_sets, teams_seasons_index]
+        sweep_per['PER_mean_sum'] = per_sum[param_sets, teams_seasons_index]
+        sweep_per['is_good_player_sum'] = nb_good_players[param_sets, teams_seasons_index]
+        return sweep_per
+
+    @staticmethod
+    def _sort_by_group(group_codes, *arrays):
+        """ Columns of the arrays sorted by group, and the start of each group, for reduceat."""
+        order = np.argsort(group_codes, kind='stable')
+        starts = np.flatnonzero(np.r_[True, np.diff(group_codes[order]) != 0])
+        return tuple(array[..., order] for array in arrays) + (starts,)
@@ -9,28 +9,50 @@ class PER:
 
     :attributes players_stats dataframe from odds.preprocessing.players_stats
     :attributes players_teams dataframe from odds.preprocessing.players_stats
-    :methods compute_simplified_per
+    :attributes per_by_game optional dataframe from PER.compute_per_by_game, to reuse the PER of each game
+    :attributes per_by_player optional dataframe from PER.aggregate_by_player_on_season, to reuse the PER aggregated
+        by player and season (computed season by season by ChunkedPlayersData)
+    :methods previous_season_per, preplayoff_season_per, next_season_per, compute_per_by_player_on_season,
+        compute_per_by_game, aggregate_by_player_on_season, feature_columns
     """
+    # aggregations of the players features by team and season
+    team_aggregations = {'PER_mean': ['max', 'mean', 'sum'], 'is_good_player': ['sum']}
 
-    def __init__(self, players_stats, players_team):
+    def __init__(self, players_stats, players_team, per_by_game=None, per_by_player=None):
         self.players_stats = players_stats
         self.players_team = players_team
+        self.per_by_game = per_by_game
+        self.per_by_player = per_by_player
+        self._player_season_per = None
+
+    @classmethod
+    def feature_columns(cls):
+        """ Names of the features by team and season, in the order of the computed dataset."""
+        return [f'{column}_{aggregation}' for column, aggregations in cls.team_aggregations.items()
+                for aggregation in aggregations]
 
     def previous_season_per(self):
         """Use previous season player performances and team compositions to get PER by team for next season.
 
         :return: dataframe aggregated PER on a each team by season.
         """
-        player_season_per = self.compute_per_by_player_on_season()
-
-        player_season_per['season'] += 1
-        player_season_per = player_season_per.query('season < 2019')
+        player_season_per = self.next_season_per(self.compute_per_by_player_on_season())
 
         player_by_team = pd.merge(player_season_per, self.players_team, on=['player_id', 'season'], how='left')
 
         agg_per_team = self._aggregate_by_season_team(per_with_features=player_by_team)
         return agg_per_team
 
+    @staticmethod
+    def next_season_per(player_season_per):
+        """Players PER of a season as features of the next season, seasons to predict (before 2019) only.
+
+        :param player_season_per: dataframe from PER.compute_per_by_player_on_season.
+        :return: same dataframe with season + 1.
+        """
+        player_season_per = player_season_per.assign(season=player_season_per['season'] + 1)
+        return player_season_per.query('season < 2019')
+
     def preplayoff_season_per(self):
         """Use preplayoff season player performances and team compositions to get PER by team for the playoff.
         :return: dataframe aggregated PER on a each team by season.
@@ -42,34 +64,58 @@ class PER:
 
     def compute_per_by_player_on_season(self):
         """Calculate a simplified per over players games and aggregate it by season.
+        The table is computed once per instance and shared by previous_season_per and preplayoff_season_per.
 
         :return: dataframe with mean, max per per team and number of nba top players in the team.
         """
-        players_data = self.players_stats
-
-        players_data['PER'] = players_data.apply(lambda x: self._calculate_simplified_per(x), axis=1)
+        if self._player_season_per is None:
+            mean_per_by_player = self.per_by_player
+            if mean_per_by_player is None:
+                per_by_game = self.per_by_game
+                if per_by_game is None:
+                    per_by_game = self.compute_per_by_game(self.players_stats)
+                mean_per_by_player = self.aggregate_by_player_on_season(per_by_game)
+
+            filtered_per_by_player = self._keep_only_relevant_players(mean_per_by_player)
+            self._player_season_per = self._is_good_player_feature(filtered_per_by_player)
+        return self._player_season_per.copy()
+
+    @classmethod
+    def compute_per_by_game(cls, players_stats):
+        """Calculate a simplified per of each player on each game, without modifying players_stats.
+
+        :param players_stats: dataframe with one line per player per game, with season and box score stats.
+        :return: dataframe with player_id, season, game_id, mp and PER.
+        """
+        per_by_game = players_stats[['player_id', 'season', 'game_id', 'mp']].copy()
+        per_by_game['PER'] = cls._calculate_simplified_per(players_stats)
+        return per_by_game
 
-        mean_per_by_player = self._aggregate_by_player_on_season(players_data)
-        filtered_per_by_player = self._keep_only_relevant_players(mean_per_by_player)
-        per_with_features = self._is_good_player_feature(filtered_per_by_player)
-        return per_with_features
+    @classmethod
+    def _calculate_simplified_per(cls, x):
+        per = cls._calculate_unfiltered_per(x)
+        return per.where(x['mp'] > PerParams.min_mp)
 
     @staticmethod
-    def _calculate_simplified_per(x):
-        if x['mp'] > PerParams.min_mp:
-            per = (85.910 * x['fg'] + 53.897 * x['stl'] + 51.757 * x['_3p'] + 46.864 * x['ft'] +
-                   39.190 * x['blk'] + 39.190 * x['orb'] + 34.677 * x['ast'] + 14.707 * x['drb']
-                   - x['pf'] * 17.174
-                   - (x['fta'] - x['ft']) * 20.091
-                   - (x['fga'] - x['fg']) * 39.190
-                   - x['tov'] * 53.897) * (1 / x['mp'])
-            return per
+    def _calculate_unfiltered_per(x):
+        return (85.910 * x['fg'] + 53.897 * x['stl'] + 51.757 * x['_3p'] + 46.864 * x['ft'] +
+                39.190 * x['blk'] + 39.190 * x['orb'] + 34.677 * x['ast'] + 14.707 * x['drb']
+                - x['pf'] * 17.174
+                - (x['fta'] - x['ft']) * 20.091
+                - (x['fga'] - x['fg']) * 39.190
+                - x['tov'] * 53.897) * (1 / x['mp'])
 
     @staticmethod
-    def _aggregate_by_player_on_season(players_data):
+    def aggregate_by_player_on_season(players_data):
+        """Aggregate the PER of each game by player and season. Players and seasons are independent, so the
+        aggregates of separate seasons can be concatenated.
+
+        :param players_data: dataframe from PER.compute_per_by_game.
+        :return: dataframe with player_id, season, PER_mean, PER_max, mp_sum and game_id_count.
+        """
         mean_per = (
             players_data[['player_id', 'season', 'PER', 'game_id', 'mp']].dropna()
-                .groupby(['player_id', 'season'])
+                .groupby(['player_id', 'season'], observed=True)
                 .agg({'PER': ['mean', 'max'], 'mp': ['sum'], 'game_id': ['count']})
         )
         mean_per.columns = ['_'.join(col) for col in mean_per.columns]
@@ -83,18 +129,12 @@ class PER:
     @staticmethod
     def _is_good_player_feature(per_by_player):
         threshold = PerParams.good_player_per_threshold
-        per_by_player.loc[:, 'is_good_player'] = (
-                per_by_player['PER_mean'] > per_by_player['PER_mean'].quantile(q=threshold)
+        return per_by_player.assign(
+            is_good_player=per_by_player['PER_mean'] > per_by_player['PER_mean'].quantile(q=threshold)
         )
-        return per_by_player
 
-    @staticmethod
-    def _aggregate_by_season_team(per_with_features):
-        season_per = per_with_features.groupby(['season', 'id']).agg(
-            {
-                'PER_mean': ['max', 'mean', 'sum'],
-                'is_good_player': ['sum']
-            }
-        )
+    @classmethod
+    def _aggregate_by_season_team(cls, per_with_features):
+        season_per = per_with_features.groupby(['season', 'id'], observed=True).agg(cls.team_aggregations)
         season_per.columns = ['_'.join(col) for col in season_per.columns]
         return season_per.reset_index()
@@ -0,0 +1,159 @@
+""" Class to keep PER by team up to date when new box scores arrive."""
+import numpy as np
+import pandas as pd
+
+from nba_odds.config.config import GamesRawSchema, ProcessedSchema
+from nba_odds.features.player_efficiency_rating import PER
+from nba_odds.preprocessing.players_data import PlayersData
+
+
+class RunningPER:
+    """ Running version of PER.preplayoff_season_per.
+
+    PER sums, max, minutes and games count are kept by player and season, with the number of lines of each team of
+    each player (as in PlayersData) and his team. There is one state for all the games and one for each phase. Adding
+    box scores aggregates the new lines and updates only the players seasons of the batch, in place : it does not
+    depend on the number of past games. Reading the features applies the PER filters and good players threshold (a
+    quantile over all the players) to one line per player and season.
+
+    :methods add, team_per, players_team
+    """
+    keys = ['player_id', GamesRawSchema.season]
+    phases = [None, ProcessedSchema.regular_season, ProcessedSchema.playoff]  # None for all the games
+
+    def __init__(self):
+        self._states = {phase: _PlayersSeasonsState() for phase in self.phases}
+        self._nb_lines = 0
+
+    @property
+    def is_empty(self):
+        return self._states[None].nb_rows == 0
+
+    def add(self, per_by_game, players_games_with_both_teams):
+        """ Add new player games to the aggregates.
+        :param per_by_game: new lines of PER.compute_per_by_game, with the phase column.
+        :param players_games_with_both_teams: one line per new game per player per team of the game, with player_id,
+            season, id and phase columns (box score lines merged with games_per_team).
+        """
+        per_by_game = per_by_game[self.keys + [ProcessedSchema.phase, 'PER', 'game_id', 'mp']].dropna()
+        # positions continue from the previous lines, so that team ties are broken in order of appearance
+        players_games_with_both_teams = players_games_with_both_teams.assign(
+            position=self._nb_lines + np.arange(len(players_games_with_both_teams))
+        )
+        self._nb_lines += len(players_games_with_both_teams)
+
+        for phase, state in self._states.items():
+            if phase is None:
+                state.add(per_by_game, players_games_with_both_teams)
+            else:
+                state.add(per_by_game[per_by_game[ProcessedSchema.phase] == phase],
+                          players_games_with_both_teams[players_games_with_both_teams[ProcessedSchema.phase] == phase])
+
+    def team_per(self, phase=None):
+        """ PER by team and season, same as PER.preplayoff_season_per on the games added so far.
+        :param phase: ProcessedSchema.regular_season or playoff to use only the games of this phase, all games if
+            None.
+        :return: pandas dataframe with aggregated PER of each team by season.
+        """
+        per_by_player = self._states[phase].per_by_player()
+        player_season_per = PER._is_good_player_feature(PER._keep_only_relevant_players(per_by_player))
+        player_by_team = pd.merge(player_season_per, self.players_team(phase), on=self.keys, how='left')
+        return PER._aggregate_by_season_team(per_with_features=player_by_team)
+
+    def players_team(self, phase=None):
+        """ Team of each player and season, same as PlayersData on the games added so far.
+        :param phase: phase of the games used to find the team, all games if None.
+        :return: pandas dataframe with player_id, season and id.
+        """
+        return self._states[phase].players_team()
+
+
+class _PlayersSeasonsState:
+    """ PER aggregates and team counts of each player season, in arrays with one line per player season."""
+    columns = ['PER_sum', 'PER_max', 'mp_sum', 'game_id_count']
+
+    def __init__(self):
+        self.nb_rows = 0
+        self._rows = {}  # (player_id, season) -> line of the arrays
+        self._player_ids, self._seasons = [], []
+        self._values = {column: np.zeros(0) for column in self.columns}
+        self._teams = np.empty(0, dtype=object)
+        self._team_counts = {}  # line -> {team: (count, first position)}
+
+    def add(self, per_by_game, players_games_with_both_teams):
+        grouped = per_by_game.groupby(RunningPER.keys, observed=True)
+        batch = pd.DataFrame({'PER_sum': grouped['PER'].sum(), 'PER_max': grouped['PER'].max(),
+                              'mp_sum': grouped['mp'].sum(), 'game_id_count': grouped['game_id'].count()}).reset_index()
+        rows = self._get_rows(batch['player_id'], batch[GamesRawSchema.season])
+        for column in ('PER_sum', 'mp_sum', 'game_id_count'):
+            self._values[column][rows] += batch[column].to_numpy()
+        self._values['PER_max'][rows] = np.maximum(self._values['PER_max'][rows], batch['PER_max'].to_numpy())
+
+        team_counts = (players_games_with_both_teams
+                       .groupby(RunningPER.keys + [ProcessedSchema.team_id], sort=False, observed=True)
+                       .agg(count=('position', 'size'), first_position=('position', 'min'))
+                       .reset_index())
+        team_rows = self._get_rows(team_counts['player_id'], team_counts[GamesRawSchema.season])
+        for row, team, count, first_position in zip(team_rows, team_counts[ProcessedSchema.team_id],
+                                                    team_counts['count'], team_counts['first_position']):
+            row_counts = self._team_counts.setdefault(row, {})
+            previous_count, previous_position = row_counts.get(team, (0, first_position))
+            row_counts[team] = (previous_count + count, min(previous_position, first_position))
+        self._update_teams(np.unique(team_rows))
+
+    def per_by_player(self):
+        """ Same as PER.aggregate_by_player_on_season, players seasons without PER are left out."""
+        count = self._values['game_id_count'][:self.nb_rows]
+        has_per = count > 0
+        per_by_player = pd.DataFrame({
+            'player_id': np.array(self._player_ids, dtype=object)[has_per],
+            GamesRawSchema.season: np.array(self._seasons)[has_per],
+            'PER_mean': self._values['PER_sum'][:self.nb_rows][has_per] / count[has_per],
+            'PER_max': self._values['PER_max'][:self.nb_rows][has_per],
+            'mp_sum': self._values['mp_sum'][:self.nb_rows][has_per],
+            'game_id_count': count[has_per].astype('int64'),
+        })
+        return per_by_player
+
+    def players_team(self):
+        has_team = np.array([team is not None for team in self._teams[:self.nb_rows]], dtype=bool)
+        return pd.DataFrame({'player_id': np.array(self._player_ids, dtype=object)[has_team],
+                             GamesRawSchema.season: np.array(self._seasons)[has_team],
+                             ProcessedSchema.team_id: self._teams[:self.nb_rows][has_team]})
+
+    def _get_rows(self, player_ids, seasons):
+        """ Lines of the players seasons, new players seasons are added at the end."""
+        rows = np.empty(len(player_ids), dtype='int64')
+        for index, key in enumerate(zip(player_ids, seasons)):
+            row = self._rows.get(key)
+            if row is None:
+                row = self._rows[key] = len(self._player_ids)
+                self._player_ids.append(key[0])
+                self._seasons.append(key[1])
+            rows[index] = row
+        self._reserve(len(self._player_ids))
+        return rows
+
+    def _reserve(self, nb_rows):
+        """ Arrays with room for nb_rows lines, their size is doubled when they are full."""
+        if nb_rows > len(self._teams):
+            capacity = max(nb_rows, 2 * len(self._teams))
+            for column, values in self._values.items():
+                initial_value = -np.inf if column == 'PER_max' else 0
+                self._values[column] = np.concatenate([values, np.full(capacity - len(values), initial_value)])
+            self._teams = np.concatenate([self._teams, np.full(capacity - len(self._teams), None, dtype=object)])
+        self.nb_rows = nb_rows
+
+    def _update_teams(self, rows):
+        """ Most frequent team of the players seasons at rows, same rule as PlayersData."""
+        team_counts = pd.DataFrame(
+            [(row, 0, team, count, first_position) for row in rows
+             for team, (count, first_position) in self._team_counts[row].items()],
+            columns=['player_id', GamesRawSchema.season, ProcessedSchema.team_id, 'count', 'first_position']
+        )
+        if team_counts.empty:
+            return
+        # players seasons are identified by their line in the arrays
+        players_teams = PlayersData._keep_most_frequent_team(team_counts)
+        rows = players_teams['player_id'].to_numpy(dtype='int64')
+        self._teams[rows] = players_teams[ProcessedSchema.team_id].to_numpy()
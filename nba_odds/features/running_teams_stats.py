@@ -0,0 +1,58 @@
+""" Class to keep season features by team up to date when new games arrive."""
+import pandas as pd
+
+from nba_odds.config.config import GamesRawSchema, ProcessedSchema
+from nba_odds.features.teams_stats import TeamsStats
+
+
+class RunningTeamsStats:
+    """ Running version of TeamsStats.compute_aggregated_features.
+
+    Sums and counts of the aggregated game features are kept by team, season and phase. Adding games only aggregates
+    the new lines, reading the features divides sums by counts : neither depends on the number of past games.
+
+    :attributes state: pandas dataframe of sums and counts by team, season and phase.
+    :methods add, features
+    """
+    keys = [ProcessedSchema.team_id, GamesRawSchema.season, ProcessedSchema.phase]
+
+    def __init__(self):
+        self.state = None
+        self._integer_columns = set()
+
+    def add(self, games_per_team):
+        """ Add new games to the aggregates.
+        :param games_per_team: new lines of the games_per_team dataset, with the phase column.
+        """
+        games_per_team = games_per_team.assign(
+            goal_diff=games_per_team['points_before_ot'] - games_per_team['opp_points_before_ot']
+        )
+        columns = list(TeamsStats.aggregations)
+        self._integer_columns |= {column for column in columns
+                                  if pd.api.types.is_integer_dtype(games_per_team[column])}
+
+        grouped = games_per_team[self.keys + columns].groupby(self.keys, observed=True)
+        batch_state = pd.concat([grouped[columns].sum().add_suffix('_sum'),
+                                 grouped[columns].count().add_suffix('_count')], axis=1)
+        self.state = batch_state if self.state is None else self.state.add(batch_state, fill_value=0)
+
+    def features(self, phase=None):
+        """ Features by team and season, same as TeamsStats.compute_aggregated_features on the games added so far.
+        :param phase: ProcessedSchema.regular_season or playoff to aggregate only the games of this phase, all games
+            if None.
+        :return: pandas dataframe with one line per team per season.
+        """
+        state = self.state
+        if phase is not None:
+            state = state[state.index.get_level_values(ProcessedSchema.phase) == phase]
+        state = state.groupby(level=self.keys[:-1], observed=True).sum()
+
+        features = pd.DataFrame(index=state.index)
+        for column, aggregations in TeamsStats.aggregations.items():
+            for aggregation in aggregations:
+                if aggregation == 'sum':
+                    values = state[f'{column}_sum']
+                    features[f'{column}_sum'] = values.astype('int64') if column in self._integer_columns else values
+                else:
+                    features[f'{column}_mean'] = state[f'{column}_sum'] / state[f'{column}_count']
+        return features.reset_index()
@@ -7,11 +7,26 @@ class TeamsStats:
     """ Aggregate season features from games_per_team dataset.
 
     :attributes games_per_team dataframe from nba_odds.preprocessing.games_per_team
-    :methods compute_previous_season_features, compute_aggregated_features
+    :attributes columns optional list of the aggregated features to compute (e.g. 'won_sum'), all by default.
+    :methods compute_previous_season_features, compute_aggregated_features, feature_columns
     """
 
-    def __init__(self, games_per_team):
+    # aggregations of each game feature by team and season
+    aggregations = {
+        'points_before_ot': ['sum', 'mean'], 'opp_points_before_ot': ['sum'], 'won': ['sum'], 'goal_diff': ['mean'],
+        'efg': ['mean'], 'opp_efg': ['mean'], 'tov': ['mean'], 'opp_tov': ['mean'],
+        'orb': ['sum'], 'opp_orb': ['sum'], 'ortg': ['mean'], 'opp_ortg': ['mean']
+    }
+
+    def __init__(self, games_per_team, columns=None):
         self.games_per_team = games_per_team
+        self.columns = columns
+
+    @classmethod
+    def feature_columns(cls):
+        """ Names of the aggregated features, in the order of the computed dataset."""
+        return [f'{column}_{aggregation}' for column, aggregations in cls.aggregations.items()
+                for aggregation in aggregations]
 
     def compute_previous_season_features(self):
         """ Compute features by team."""
@@ -25,15 +40,27 @@ class TeamsStats:
         """ Aggregate game features to get feature by team on season."""
         games_per_team = self.games_per_team
         games_per_team.loc[:, 'goal_diff'] = games_per_team['points_before_ot'] - games_per_team['opp_points_before_ot']
-        agg_dataset = self._aggregate_dataset(games_per_team=games_per_team)
+        agg_dataset = self._aggregate_dataset(games_per_team=games_per_team, aggregations=self._aggregations())
         return agg_dataset
 
+    def _aggregations(self):
+        """ Aggregations of the requested columns only."""
+        if self.columns is None:
+            return self.aggregations
+        unknown_columns = set(self.columns) - set(self.feature_columns())
+        if unknown_columns:
+            raise ValueError(f"Unknown teams stats columns {sorted(unknown_columns)}.")
+        aggregations = {column: [aggregation for aggregation in column_aggregations
+                                 if f'{column}_{aggregation}' in self.columns]
+                        for column, column_aggregations in self.aggregations.items()}
+        return {column: column_aggregations for column, column_aggregations in aggregations.items()
+                if column_aggregations}
+
     @staticmethod
-    def _aggregate_dataset(games_per_team):
-        dataset = games_per_team.groupby([ProcessedSchema.team_id, GamesRawSchema.season]).agg({
-            'points_before_ot': ['sum', 'mean'], 'opp_points_before_ot': 'sum', 'won': 'sum', 'goal_diff': ['mean'],
-            'efg': 'mean', 'opp_efg': 'mean', 'tov': 'mean', 'opp_tov': 'mean',
-            'orb': 'sum', 'opp_orb': 'sum', 'ortg': 'mean', 'opp_ortg': 'mean'
-        })
+    def _aggregate_dataset(games_per_team, aggregations):
+        grouped = games_per_team.groupby([ProcessedSchema.team_id, GamesRawSchema.season], observed=True)
+        if not aggregations:  # only the teams and seasons
+            return grouped.size().reset_index()[[ProcessedSchema.team_id, GamesRawSchema.season]]
+        dataset = grouped.agg(aggregations)
         dataset.columns = ['_'.join(col) for col in dataset.columns]
         return dataset.reset_index()
@@ -0,0 +1,125 @@
+""" Class to look up teams season features at any date."""
+import numpy as np
+import pandas as pd
+
+from nba_odds.config.config import GamesRawSchema, ProcessedSchema
+from nba_odds.features.teams_stats import TeamsStats
+
+
+class TeamsStatsIndex:
+    """Point in time version of TeamsStats.compute_aggregated_features, built from the games_per_team dataset.
+
+    Games are sorted by team and date, and the cumulative sums and non null counts of every aggregated game feature
+    are computed once, with the position of the first game of each team season. The features of a team as of a date
+    are the aggregates of its games of the season up to this date : the last game on or before the date is found with
+    a binary search in the team slice, and sums and counts are differences of the cumulative ones between this game
+    and the first game of its season. A query does not depend on the number of games.
+    The season of a query is the season of this last game, so between two seasons the features are the ones of the
+    whole previous season. The index aggregates all the games it is built from, built from
+    SplitPlayoff.keep_only_regular_season output it gives regular season features.
+
+    :attributes games_per_team: dataframe from nba_odds.preprocessing.games_per_team.
+    :methods as_of_many, features_on, after_games
+    """
+
+    def __init__(self, games_per_team):
+        sorted_games = games_per_team.sort_values(by=[ProcessedSchema.team_id, GamesRawSchema.date_col],
+                                                  kind='stable')
+        team_codes, self.teams = pd.factorize(sorted_games[ProcessedSchema.team_id], sort=True)
+        self._team_codes = {team: code for code, team in enumerate(self.teams)}
+        self._team_starts = np.searchsorted(team_codes, np.arange(len(self.teams) + 1))
+        self._dates = sorted_games[GamesRawSchema.date_col].to_numpy(dtype='datetime64[ns]')
+        self._seasons = sorted_games[GamesRawSchema.season].to_numpy()
+
+        # position of the first game of the team season of each game
+        seasons = self._seasons
+        is_season_start = np.ones(len(sorted_games), dtype=bool)
+        is_season_start[1:] = (team_codes[1:] != team_codes[:-1]) | (seasons[1:] != seasons[:-1])
+        self._season_starts = np.maximum.accumulate(np.where(is_season_start, np.arange(len(sorted_games)), 0))
+
+        sorted_games = sorted_games.assign(
+            goal_diff=sorted_games['points_before_ot'] - sorted_games['opp_points_before_ot']
+        )
+        self._columns = list(TeamsStats.aggregations)
+        self._integer_dtypes = {column: sorted_games[column].dtype for column in self._columns
+                                if pd.api.types.is_integer_dtype(sorted_games[column])}
+        values = sorted_games[self._columns].to_numpy(dtype=float)
+        # leading zeros : the sums of the lines from start to end are cumulative[end] - cumulative[start]
+        self._cumulative_sums = np.vstack([np.zeros(len(self._columns)), np.nancumsum(values, axis=0)])
+        self._cumulative_counts = np.vstack([np.zeros(len(self._columns), dtype='int64'),
+                                             np.cumsum(~np.isnan(values), axis=0)])
+
+    def as_of_many(self, teams, dates):
+        """ Season features for pairs of teams and dates.
+        :param teams: list-like of team ids.
+        :param dates: list-like of dates, same length as teams. Games on the date are included.
+        :return: pandas dataframe with one line per pair : date, id, season and the features of
+            TeamsStats.compute_aggregated_features, nan when the team has no game on or before the date.
+        """
+        teams = pd.Series(teams).map(self._team_codes).to_numpy()
+        dates = pd.to_datetime(pd.Series(dates)).to_numpy(dtype='datetime64[ns]')
+
+        positions = np.full(len(dates), -1)
+        for team_code in pd.unique(teams[~pd.isna(teams)]):
+            queries = np.flatnonzero(teams == team_code)
+            start, end = self._team_starts[int(team_code)], self._team_starts[int(team_code) + 1]
+            team_positions = np.searchsorted(self._dates[start:end], dates[queries], side='right') - 1
+            positions[queries] = np.where(team_positions >= 0, start + team_positions, -1)
+
+        features = self._features(positions)
+        features.insert(0, GamesRawSchema.date_col, dates)
+        return features
+
+    def features_on(self, dates, teams=None):
+        """ Season features of every team on every date.
+        :param dates: list-like of dates.
+        :param teams: list-like of team ids, all the teams of the index by default.
+        :return: pandas dataframe with one line per date and team, teams without a game before the date are left out.
+        """
+        teams = self.teams if teams is None else pd.Index(teams)
+        dates = pd.to_datetime(pd.Series(dates)).to_numpy(dtype='datetime64[ns]')
+        features = self.as_of_many(teams=np.tile(teams, len(dates)), dates=np.repeat(dates, len(teams)))
+        return self._with_integer_columns(features.dropna(subset=[GamesRawSchema.season]).reset_index(drop=True))
+
+    def after_games(self, nb_games):
+        """ Season features of every team after its first nb_games games of each season.
+        :param nb_games: number of games played in the season, e.g. 20.
+        :return: pandas dataframe with one line per team and season, with the date of the nb_games-th game. Seasons
+            where the team played fewer games are left out.
+        """
+        season_starts = np.flatnonzero(self._season_starts == np.arange(len(self._season_starts)))
+        season_ends = np.append(season_starts[1:], len(self._season_starts))
+        positions = (season_starts + nb_games - 1)[season_starts + nb_games <= season_ends]
+
+        features = self._features(positions)
+        features.insert(0, GamesRawSchema.date_col, self._dates[positions])
+        return features
+
+    def _features(self, positions):
+        """ Features of the team season up to the games at positions, -1 for no game."""
+        found = positions >= 0
+        ends = np.where(found, positions + 1, 0)
+        starts = np.where(found, self._season_starts[positions], 0)
+        sums = self._cumulative_sums[ends] - self._cumulative_sums[starts]
+        counts = self._cumulative_counts[ends] - self._cumulative_counts[starts]
+
+        team_codes = np.searchsorted(self._team_starts, positions, side='right') - 1
+        features = pd.DataFrame({
+            ProcessedSchema.team_id: pd.Categorical.from_codes(np.where(found, team_codes, -1), categories=self.teams),
+            GamesRawSchema.season: np.where(found, self._seasons[positions], np.nan),
+        })
+        for index, column in enumerate(self._columns):
+            for aggregation in TeamsStats.aggregations[column]:
+                if aggregation == 'sum':
+                    values = sums[:, index]
+                else:
+                    with np.errstate(invalid='ignore', divide='ignore'):
+                        values = sums[:, index] / counts[:, index]
+                features[f'{column}_{aggregation}'] = np.where(found, values, np.nan)
+        return self._with_integer_columns(features) if found.all() else features
+
+    def _with_integer_columns(self, features):
+        """ Seasons and sums of integer game features as integers, like the groupby of TeamsStats."""
+        integer_dtypes = {f'{column}_sum': dtype for column, dtype in self._integer_dtypes.items()
+                          if 'sum' in TeamsStats.aggregations[column]}
+        return features.astype({GamesRawSchema.season: 'int64', **integer_dtypes})
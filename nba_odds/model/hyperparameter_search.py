@@ -0,0 +1,149 @@
+""" Class to search the parameters of a model with a walk forward cross validation on seasons."""
+import json
+import logging
+import math
+import os
+import time
+
+import joblib
+import numpy as np
+from sklearn.base import clone
+from sklearn.model_selection import ParameterGrid, ParameterSampler
+
+from nba_odds.model.model_builder import ModelBuilder, fit_predict_fold
+
+logging.basicConfig(level=logging.INFO)
+
+
+class HyperparameterSearch:
+    """Search the best parameters of a model, each candidate is scored on season folds.
+
+    A fold predicts one season with a model trained on all the previous seasons, as in ModelBuilder.backtest, so that
+    a candidate is never trained on seasons after the predicted one. Candidates and folds are evaluated in parallel,
+    fold matrices (scaled and resampled) are cached with joblib.Memory and shared between candidates.
+
+    Methods :
+    - 'grid' : every combination of param_distributions.
+    - 'random' : n_iter combinations sampled from param_distributions (lists or scipy distributions).
+    - 'halving' : successive halving on n_iter sampled combinations (every combination if n_iter is None). All
+    candidates are scored on the most recent folds, only the best 1 / factor go on to factor times more folds.
+
+    The search stops when time_budget seconds are spent, the best candidate evaluated so far is kept. At least one
+    batch of candidates (one round for halving) is evaluated.
+
+    :attributes dataset: features dataset with id, season and won columns.
+    :attributes model: sklearn classifier or imblearn pipeline.
+    :attributes param_distributions: dict parameter name (set_params name) -> candidate values.
+    :attributes scale: whether features are standard scaled.
+    :attributes scoring: ModelBuilder metric, 'mae', 'rmse', 'precision' or 'recall'.
+    :attributes min_train_seasons: number of seasons in the train set of the first fold.
+    :attributes cache_dir: optional directory to cache the fold matrices.
+    :attributes results_: list of dict with params, score and number of folds of each evaluation.
+    :attributes best_params_, best_score_: best candidate after search.
+    :methods search, save
+    """
+    def __init__(self, dataset, model, param_distributions, scale=True, scoring='rmse', min_train_seasons=5,
+                 cache_dir=None):
+        if scoring not in ModelBuilder.greater_is_better:
+            raise ValueError(f"scoring must be one of {list(ModelBuilder.greater_is_better)}, got {scoring}.")
+        self.dataset = dataset
+        self.model = model
+        self.param_distributions = param_distributions
+        self.scale = scale
+        self.scoring = scoring
+        self.min_train_seasons = min_train_seasons
+        self.cache_dir = cache_dir
+        self.results_ = []
+        self.best_params_ = None
+        self.best_score_ = None
+
+    def search(self, method='halving', n_iter=20, factor=3, time_budget=None, n_jobs=-1, random_state=0):
+        """ Evaluate candidates and keep the best one.
+        :param method: 'grid', 'random' or 'halving'.
+        :param n_iter: number of sampled candidates for 'random' and 'halving'.
+        :param factor: proportion of candidates eliminated at each halving round.
+        :param time_budget: maximum duration of the search in seconds, no limit if None.
+        :param n_jobs: number of parallel jobs, -1 to use all the cores.
+        :param random_state: seed of the candidates sampling.
+        :return: best parameters.
+        """
+        deadline = None if time_budget is None else time.time() + time_budget
+        seasons = np.sort(self.dataset['season'].unique())[self.min_train_seasons:][::-1]  # most recent first
+        candidates = self._candidates(method, n_iter, random_state)
+        memory = joblib.Memory(location=self.cache_dir, verbose=0)
+        logging.info(f"Searching {len(candidates)} candidates with {method} on {len(seasons)} folds.")
+
+        if method == 'halving':
+            self._successive_halving(candidates, seasons, factor, deadline, n_jobs, memory)
+        else:
+            # candidates are evaluated by batches, to check the time budget between them
+            batch_size = joblib.effective_n_jobs(n_jobs)
+            for start in range(0, len(candidates), batch_size):
+                if start > 0 and self._out_of_time(deadline):
+                    break
+                self._evaluate(candidates[start:start + batch_size], seasons, n_jobs, memory)
+
+        nb_folds = max(result['nb_folds'] for result in self.results_)
+        best = self._sorted([result for result in self.results_ if result['nb_folds'] == nb_folds])[0]
+        self.best_params_, self.best_score_ = best['params'], best['score']
+        logging.info(f"Best {self.scoring} : {self.best_score_} with {self.best_params_}.")
+        return self.best_params_
+
+    def save(self, path):
+        """ Write the best parameters as a json artifact, read by build_models."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as params_file:
+            json.dump({'params': self.best_params_, 'scoring': self.scoring, 'score': self.best_score_,
+                       'nb_evaluations': len(self.results_), 'created_at': round(time.time())},
+                      params_file, indent=2, default=_to_builtin)
+        logging.info(f"{path} has been created.")
+
+    def _candidates(self, method, n_iter, random_state):
+        if method == 'grid' or (method == 'halving' and n_iter is None):
+            return list(ParameterGrid(self.param_distributions))
+        if method in ('random', 'halving'):
+            return list(ParameterSampler(self.param_distributions, n_iter=n_iter, random_state=random_state))
+        raise ValueError(f"method must be 'grid', 'random' or 'halving', got {method}.")
+
+    def _successive_halving(self, candidates, seasons, factor, deadline, n_jobs, memory):
+        nb_folds = max(1, math.ceil(len(seasons) / factor ** math.floor(math.log(len(candidates), factor))))
+        while True:
+            results = self._evaluate(candidates, seasons[:nb_folds], n_jobs, memory)
+            if len(candidates) == 1 or nb_folds == len(seasons) or self._out_of_time(deadline):
+                break
+            candidates = [result['params'] for result in self._sorted(results)[:math.ceil(len(candidates) / factor)]]
+            nb_folds = min(len(seasons), nb_folds * factor)
+
+    def _evaluate(self, candidates, seasons, n_jobs, memory):
+        folds_proba = joblib.Parallel(n_jobs=n_jobs)(
+            joblib.delayed(fit_predict_fold)(model=clone(self.model).set_params(**params),
+                                             train=self.dataset[self.dataset['season'] < season],
+                                             test=self.dataset[self.dataset['season'] == season],
+                                             scale=self.scale, memory=memory)
+            for params in candidates for season in seasons
+        )
+        y_test = np.concatenate([self.dataset.loc[self.dataset['season'] == season, 'won'] for season in seasons])
+
+        results = []
+        for index, params in enumerate(candidates):
+            proba = np.concatenate(folds_proba[index * len(seasons):(index + 1) * len(seasons)])
+            score = ModelBuilder._compute_metrics(proba=proba, y_test=y_test)[self.scoring]
+            results.append({'params': params, 'score': score, 'nb_folds': len(seasons)})
+        self.results_.extend(results)
+        return results
+
+    def _sorted(self, results):
+        greater_is_better = ModelBuilder.greater_is_better[self.scoring]
+        return sorted(results, key=lambda result: result['score'], reverse=greater_is_better)
+
+    @staticmethod
+    def _out_of_time(deadline):
+        if deadline is not None and time.time() > deadline:
+            logging.info("Time budget spent, search stopped.")
+            return True
+        return False
+
+
+def _to_builtin(value):
+    # numpy scalars sampled by ParameterSampler are not json serializable
+    return value.item() if isinstance(value, np.generic) else str(value)
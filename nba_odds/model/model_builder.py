@@ -1,24 +1,41 @@
 """ Class to build, save and evaluate the model."""
 import logging
-import os
-import time
 
 import joblib
+import numpy as np
+from imblearn.pipeline import Pipeline
+from sklearn.base import clone
 from sklearn.metrics import mean_absolute_error, mean_squared_error, precision_score, recall_score
 from sklearn.preprocessing import StandardScaler
 
 from nba_odds.config.config import Paths
+from nba_odds.model.model_registry import ModelRegistry
 
 logging.basicConfig(level=logging.INFO)
 
 class ModelBuilder:
-    """Class to build the model from a provided dataset."""
-
-    def __init__(self, dataset, model, scale, model_name):
+    """Class to build the model from a provided dataset.
+
+    :attributes dataset: features dataset with id, season and won columns.
+    :attributes model: sklearn classifier or imblearn pipeline.
+    :attributes scale: whether features are standard scaled.
+    :attributes model_name: name used for the saved model files.
+    :attributes cache_dir: optional directory where backtest folds scaled and resampled matrices are cached.
+    :attributes compress: joblib compression of the saved model, 0 to load it memory mapped (see ModelRegistry).
+    :attributes scaler: StandardScaler fitted by build, saved with the model.
+    :methods build, backtest
+    """
+    threshold = 0.4
+    greater_is_better = {'mae': False, 'rmse': False, 'precision': True, 'recall': True}
+
+    def __init__(self, dataset, model, scale, model_name, cache_dir=None, compress=0):
         self.dataset = dataset
         self.scale = scale
         self.model = model
         self.model_name = model_name
+        self.cache_dir = cache_dir
+        self.compress = compress
+        self.scaler = None
         self.mae = None
         self.rmse = None
         self.precision = None
@@ -35,7 +52,7 @@ class ModelBuilder:
         x_test, y_test = self._extract_features_and_target(season_to_pred)
 
         if self.scale:
-            x_train_scaled, x_test_scaled = self._scale_data(x_test, x_train)
+            x_train_scaled, x_test_scaled, self.scaler = self._scale_data(x_test, x_train)
         else:
             x_train_scaled, x_test_scaled = x_train, x_test
 
@@ -43,19 +60,48 @@ class ModelBuilder:
         self.model.fit(X=x_train_scaled, y=y_train)
 
         predictions = self._model_performances(x_test=x_test_scaled, y_test=y_test)
-        self._save_model(processed_df_columns=self.dataset.columns)
+        self._save_model(train_seasons=train['season'].unique(), feature_columns=x_train.columns)
 
         season_to_pred.loc[:, 'predictions'] = predictions
         season_to_pred.loc[:, 'odds'] = season_to_pred['predictions'].apply(lambda x: 1 / x if x > 0 else None)
         return season_to_pred[['season', 'id', 'predictions', 'odds']]
 
+    def backtest(self, min_train_seasons=1, n_jobs=-1):
+        """ Walk forward backtest : each season is predicted by a model trained on all the previous seasons.
+        Seasons are processed in parallel. With a cache_dir, scaled and resampled train matrices of a fold are
+        loaded from the cache when the fold data, the scaling and the samplers did not change.
+        :param min_train_seasons: number of seasons in the first train set.
+        :param n_jobs: number of parallel jobs, -1 to use all the cores.
+        :return: predictions dataframe (season, id, won, predictions, odds) and dict of metrics on all the seasons.
+        """
+        seasons = np.sort(self.dataset['season'].unique())[min_train_seasons:]
+        memory = joblib.Memory(location=self.cache_dir, verbose=0)
+        logging.info(f"Backtesting {self.model_name} on {len(seasons)} seasons.")
+
+        folds_proba = joblib.Parallel(n_jobs=n_jobs)(
+            joblib.delayed(fit_predict_fold)(model=self.model, train=self.dataset[self.dataset['season'] < season],
+                                             test=self.dataset[self.dataset['season'] == season],
+                                             scale=self.scale, memory=memory)
+            for season in seasons
+        )
+
+        predictions = self.dataset[self.dataset['season'].isin(seasons)].sort_values('season', kind='stable')
+        predictions = predictions[['season', 'id', 'won']].assign(predictions=np.concatenate(folds_proba))
+        predictions['odds'] = predictions['predictions'].apply(lambda x: 1 / x if x > 0 else None)
+
+        metrics = self._compute_metrics(proba=predictions['predictions'], y_test=predictions['won'])
+        self.mae, self.rmse, self.precision, self.recall = (metrics['mae'], metrics['rmse'], metrics['precision'],
+                                                            metrics['recall'])
+        for name, value in metrics.items():
+            logging.info(f"backtest {name} : {value}")
+        return predictions, metrics
+
     @staticmethod
     def _scale_data(x_test, x_train):
-        # todo - save the scaler
         scaler = StandardScaler()
         x_train_scaled = scaler.fit_transform(x_train)
         x_test_scaled = scaler.transform(x_test)
-        return x_train_scaled, x_test_scaled
+        return x_train_scaled, x_test_scaled, scaler
 
     @staticmethod
     def _extract_features_and_target(df):
@@ -66,24 +112,65 @@ class ModelBuilder:
     def _model_performances(self, x_test, y_test):
         predictions = self.model.predict_proba(x_test)
         proba = predictions[:, 1]
-        threshold = 0.4
-        pred = [1 if x >= threshold else 0 for x in proba]
-        self.mae = mean_absolute_error(y_pred=proba, y_true=y_test)
-        self.rmse = mean_squared_error(y_pred=proba, y_true=y_test)
-        self.precision = precision_score(y_pred=pred, y_true=y_test)
-        self.recall = recall_score(y_pred=pred, y_true=y_test)
+        metrics = self._compute_metrics(proba=proba, y_test=y_test)
+        self.mae, self.rmse, self.precision, self.recall = (metrics['mae'], metrics['rmse'], metrics['precision'],
+                                                            metrics['recall'])
         logging.info(f"mae : {self.mae}")
         logging.info(f"rmse : {self.rmse}")
         logging.info(f"precision : {self.precision}")
         logging.info(f"recall : {self.recall}")
         return proba
 
-    def _save_model(self, processed_df_columns):
-        current_ts = round(time.time())
-        model_filename = f"{self.model_name}_{current_ts}.pkl"
-        model_columns_filename = f"{self.model_name}_columns_{current_ts}.pkl"
-
-        joblib.dump(self.model, os.path.join(Paths.model_dir, model_filename))
-        model_columns = list(processed_df_columns)
-        joblib.dump(model_columns, os.path.join(Paths.model_dir, model_columns_filename))
-        logging.info(f"{model_filename} and {model_columns_filename} have been created.")
+    @classmethod
+    def _compute_metrics(cls, proba, y_test):
+        pred = [1 if x >= cls.threshold else 0 for x in proba]
+        return {'mae': mean_absolute_error(y_pred=proba, y_true=y_test),
+                'rmse': mean_squared_error(y_pred=proba, y_true=y_test),
+                'precision': precision_score(y_pred=pred, y_true=y_test, zero_division=0),
+                'recall': recall_score(y_pred=pred, y_true=y_test, zero_division=0)}
+
+    def _save_model(self, train_seasons, feature_columns):
+        # everything needed to score new features rows, loaded by OddsPredictor
+        bundle = {'model': self.model, 'scaler': self.scaler, 'columns': list(feature_columns)}
+        metrics = {'mae': self.mae, 'rmse': self.rmse, 'precision': self.precision, 'recall': self.recall}
+        ModelRegistry(registry_dir=Paths.model_dir, compress=self.compress).register(
+            self.model_name, bundle, metrics=metrics, greater_is_better=self.greater_is_better,
+            training_seasons=sorted(train_seasons), columns=feature_columns)
+
+
+def fit_predict_fold(model, train, test, scale, memory):
+    """ Fit a copy of the model on train and predict test, samplers of a pipeline are applied on the cached data.
+    :param model: sklearn classifier or imblearn pipeline, not modified.
+    :param train: train dataset with id, season and won columns.
+    :param test: dataset to predict.
+    :param scale: whether features are standard scaled.
+    :param memory: joblib.Memory caching the scaled and resampled matrices.
+    :return: numpy array of predicted probabilities to win.
+    """
+    x_train, y_train = ModelBuilder._extract_features_and_target(train)
+    x_test, _ = ModelBuilder._extract_features_and_target(test)
+    samplers, model = _split_samplers(model)
+
+    x_train, y_train, x_test = memory.cache(_prepare_fold)(x_train=x_train, y_train=y_train, x_test=x_test,
+                                                           scale=scale, samplers=samplers)
+    model = clone(model).fit(X=x_train, y=y_train)
+    return model.predict_proba(x_test)[:, 1]
+
+
+def _prepare_fold(x_train, y_train, x_test, scale, samplers):
+    if scale:
+        x_train, x_test, _ = ModelBuilder._scale_data(x_test=x_test, x_train=x_train)
+    for sampler in samplers:
+        x_train, y_train = clone(sampler).fit_resample(x_train, y_train)
+    return x_train, y_train, x_test
+
+
+def _split_samplers(model):
+    """ Samplers steps of a pipeline and the pipeline without them (or its final estimator if nothing is left)."""
+    if not isinstance(model, Pipeline):
+        return [], model
+    samplers = [step for _, step in model.steps[:-1] if hasattr(step, 'fit_resample')]
+    other_steps = [(name, step) for name, step in model.steps[:-1] if not hasattr(step, 'fit_resample')]
+    if not other_steps:
+        return samplers, model.steps[-1][1]
+    return samplers, Pipeline(other_steps + [model.steps[-1]])
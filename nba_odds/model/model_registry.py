@@ -0,0 +1,156 @@
+""" Class to store model bundles with a manifest per model name."""
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from contextlib import contextmanager
+
+import joblib
+
+logging.basicConfig(level=logging.INFO)
+
+
+class ModelRegistry:
+    """Versioned model bundles, described by one manifest per model name.
+
+    The manifest of a model lists its versions (training seasons, metrics, features columns, file hash) and keeps a
+    pointer to the latest version and to the best version for each metric, so that resolving them reads one small
+    json file, without listing or unpickling artifacts.
+
+    Bundles are saved with joblib. Uncompressed bundles (compress=0, the default) can be loaded with mmap_mode='r' :
+    numpy arrays (the trees of a random forest) are mapped from the file instead of copied, so worker processes share
+    the same pages and large models load without reading the whole file. Each array costs one mapping : small models
+    load faster without it. Compressed bundles are smaller on disk but always fully read in memory.
+
+    Registering holds an exclusive lock (flock on a lock file next to the manifest) from the manifest read to its
+    write, so that concurrent registrations of a model, from several processes, each get their own version.
+
+    :attributes registry_dir: directory of the registry, one sub directory per model name.
+    :attributes compress: joblib compression level of new bundles, 0 for memory mappable bundles.
+    :methods register, manifest, resolve, load
+    """
+    manifest_filename = 'manifest.json'
+    lock_filename = 'manifest.lock'
+    bundle_filename = 'bundle.joblib'
+
+    def __init__(self, registry_dir, compress=0):
+        self.registry_dir = registry_dir
+        self.compress = compress
+
+    def register(self, model_name, bundle, metrics=None, greater_is_better=None, training_seasons=None,
+                 columns=None):
+        """ Save a new version of a model and update its manifest.
+        :param model_name: name of the model.
+        :param bundle: object to save (dict with model, scaler and columns for ModelBuilder).
+        :param metrics: dict metric name -> value.
+        :param greater_is_better: dict metric name -> bool, metrics with a direction get a best version pointer.
+        :param training_seasons: seasons of the train dataset.
+        :param columns: features columns.
+        :return: version number.
+        """
+        with self._manifest_lock(model_name):
+            version = self._register(model_name, bundle, metrics, greater_is_better, training_seasons, columns)
+        logging.info(f"{model_name} version {version} has been registered in {self.registry_dir}.")
+        return version
+
+    def _register(self, model_name, bundle, metrics, greater_is_better, training_seasons, columns):
+        """ Same as register, called with the manifest lock held."""
+        manifest = self.manifest(model_name)
+        version = manifest['latest'] + 1 if manifest['latest'] is not None else 1
+        version_dir = os.path.join(self.registry_dir, model_name, str(version))
+        os.makedirs(version_dir, exist_ok=True)
+
+        bundle_path = os.path.join(version_dir, self.bundle_filename)
+        joblib.dump(bundle, bundle_path, compress=self.compress)
+
+        metrics = {name: float(value) for name, value in (metrics or {}).items()}
+        manifest['versions'][str(version)] = {
+            'version': version, 'created_at': round(time.time()),
+            'path': os.path.relpath(bundle_path, self.registry_dir), 'sha256': self._file_hash(bundle_path),
+            'compress': self.compress, 'metrics': metrics,
+            'training_seasons': [] if training_seasons is None else [int(season) for season in training_seasons],
+            'columns': [] if columns is None else list(columns),
+        }
+        manifest['latest'] = version
+        for name, value in metrics.items():
+            if name not in (greater_is_better or {}):
+                continue
+            best = manifest['best'].get(name)
+            best_value = None if best is None else manifest['versions'][str(best)]['metrics'][name]
+            if best_value is None or (value > best_value if greater_is_better[name] else value < best_value):
+                manifest['best'][name] = version
+
+        self._write_manifest(model_name, manifest)
+        return version
+
+    def manifest(self, model_name):
+        """ Manifest of a model, empty if the model has no version.
+        :return: dict with latest version, best version by metric and versions descriptions.
+        """
+        path = os.path.join(self.registry_dir, model_name, self.manifest_filename)
+        if not os.path.exists(path):
+            return {'model_name': model_name, 'latest': None, 'best': {}, 'versions': {}}
+        with open(path) as manifest_file:
+            return json.load(manifest_file)
+
+    def resolve(self, model_name, version='latest'):
+        """ Description of a model version.
+        :param version: version number, 'latest' or 'best:<metric>' (for example 'best:rmse').
+        :return: dict with the version description (path, metrics, columns ...).
+        """
+        manifest = self.manifest(model_name)
+        if version == 'latest':
+            version = manifest['latest']
+        elif isinstance(version, str) and version.startswith('best:'):
+            version = manifest['best'].get(version[len('best:'):])
+        if version is None or str(version) not in manifest['versions']:
+            raise FileNotFoundError(f"No version {version} for {model_name} in {self.registry_dir}.")
+        return manifest['versions'][str(version)]
+
+    def load(self, model_name, version='latest', mmap_mode=None, check_hash=False):
+        """ Load a bundle.
+        :param version: version number, 'latest' or 'best:<metric>'.
+        :param mmap_mode: joblib mmap mode for uncompressed bundles ('r'), None to read them in memory.
+        :param check_hash: compare the file hash to the manifest one before loading.
+        :return: saved bundle.
+        """
+        entry = self.resolve(model_name, version)
+        bundle_path = os.path.join(self.registry_dir, entry['path'])
+        if check_hash and self._file_hash(bundle_path) != entry['sha256']:
+            raise ValueError(f"{bundle_path} does not match the hash of its manifest.")
+        return joblib.load(bundle_path, mmap_mode=mmap_mode if entry['compress'] == 0 else None)
+
+    @contextmanager
+    def _manifest_lock(self, model_name):
+        """ Exclusive lock on the manifest of a model, released when the block exits."""
+        model_dir = os.path.join(self.registry_dir, model_name)
+        os.makedirs(model_dir, exist_ok=True)
+        with open(os.path.join(model_dir, self.lock_filename), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write_manifest(self, model_name, manifest):
+        # written in a temporary file of this writer then renamed, readers never see a partial manifest
+        path = os.path.join(self.registry_dir, model_name, self.manifest_filename)
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        try:
+            with open(tmp_path, 'x') as manifest_file:
+                json.dump(manifest, manifest_file, indent=2)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @staticmethod
+    def _file_hash(path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as bundle_file:
+            for block in iter(lambda: bundle_file.read(1024 ** 2), b''):
+                digest.update(block)
+        return digest.hexdigest()
@@ -0,0 +1,58 @@
+""" Class to predict odds from a saved model bundle."""
+import numpy as np
+import pandas as pd
+
+from nba_odds.config.config import Paths
+from nba_odds.model.model_registry import ModelRegistry
+
+
+class OddsPredictor:
+    """Predict odds of new features rows with a model bundle (scaler, model and feature columns) saved by
+    ModelBuilder.
+
+    The bundle is loaded once, scaler mean and scale are kept as arrays : a prediction is a column reindexing, a
+    vectorized scaling and one predict_proba call, without disk access.
+
+    :attributes model: fitted model.
+    :attributes columns: features columns, in the order used to fit the model.
+    :methods from_registry, predict_odds
+    """
+
+    def __init__(self, bundle):
+        self.model = bundle['model']
+        self.columns = pd.Index(bundle['columns'])
+        scaler = bundle['scaler']
+        self._mean = None if scaler is None else scaler.mean_
+        self._scale = None if scaler is None else scaler.scale_
+
+    @classmethod
+    def from_registry(cls, model_name, version='latest', registry_dir=None, mmap_mode=None):
+        """ Predictor with a bundle of the model registry.
+        :param model_name: name of the model, as given to ModelBuilder.
+        :param version: version number, 'latest' or 'best:<metric>'.
+        :param registry_dir: directory of the registry, Paths.model_dir by default.
+        :param mmap_mode: 'r' to memory map the model arrays, see ModelRegistry.
+        :return: OddsPredictor.
+        """
+        registry = ModelRegistry(registry_dir=Paths.model_dir if registry_dir is None else registry_dir)
+        return cls(registry.load(model_name, version=version, mmap_mode=mmap_mode))
+
+    def predict_odds(self, features_df):
+        """ Predict the probability to win and the odds of each row.
+        :param features_df: pandas dataframe with at least the model columns, other columns are ignored.
+        :return: pandas dataframe with id and season (when given), predictions and odds, same index as features_df.
+        """
+        missing_columns = self.columns.difference(features_df.columns)
+        if len(missing_columns) > 0:
+            raise ValueError(f"Missing features columns : {list(missing_columns)}.")
+
+        x = features_df.reindex(columns=self.columns)
+        if self._mean is not None:
+            x = (x.to_numpy(dtype=float) - self._mean) / self._scale
+        proba = self.model.predict_proba(x)[:, 1]
+
+        predictions = features_df[[column for column in ('season', 'id') if column in features_df.columns]].copy()
+        predictions['predictions'] = proba
+        with np.errstate(divide='ignore'):
+            predictions['odds'] = np.where(proba > 0, 1 / proba, np.nan)
+        return predictions
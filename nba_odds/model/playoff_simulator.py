@@ -0,0 +1,140 @@
+""" Class to simulate playoffs from elo ratings."""
+import joblib
+import numpy as np
+import pandas as pd
+
+from nba_odds.config.params import EloParams
+from nba_odds.features.elo_rating import EloRating
+
+
+class PlayoffSimulator:
+    """Monte Carlo simulation of the playoffs (and optionally of the end of the regular season) with elo win
+    probabilities.
+
+    Teams are seeded on the whole league (1 against 16, 8 against 9 ...) as there is no conference data, by wins then
+    elo. Each series is a best of seven where the best seed is at home for games 1, 2, 5 and 7 : games are independent
+    and their probability only depends on the venue, so the best seed wins the series when it wins at least 4 of 4
+    home and 3 away games. This probability is computed once for every pair of teams, a series is one random draw.
+    Elo ratings do not change during the simulation.
+
+    Simulations are run by chunks of chunk_size, vectorized on the simulations of the chunk. Each chunk has its own
+    random generator spawned from seed, so results only depend on seed and chunk_size, not on n_jobs.
+
+    :attributes teams_elo: pandas dataframe with id and elo of each team before the playoffs (or before the remaining
+        regular season games), e.g. EloRating.get_first_elo_season on playoff elo, for one season.
+    :attributes wins: optional pandas series of wins by team id, used for seeding. Elo is used when not given.
+    :attributes remaining_games: optional pandas dataframe with home_id and away_id of the regular season games left.
+    :attributes nb_playoff_teams: number of teams in the playoffs, a power of 2.
+    :attributes home_court_advantage: elo points of the home team, EloParams.home_court_advantage by default.
+    :methods simulate
+    """
+    rounds = ['second_round', 'conference_finals', 'finals', 'title']
+    # number of ways to win k of the 4 home games and of the 3 away games of a series
+    home_games_combinations = [1, 4, 6, 4, 1]
+    away_games_combinations = [1, 3, 3, 1]
+
+    def __init__(self, teams_elo, wins=None, remaining_games=None, nb_playoff_teams=16,
+                 home_court_advantage=None):
+        if nb_playoff_teams < 2 or nb_playoff_teams & (nb_playoff_teams - 1) or nb_playoff_teams > len(teams_elo):
+            raise ValueError(f"nb_playoff_teams must be a power of 2 lower than the number of teams, "
+                             f"got {nb_playoff_teams}.")
+        self.teams = pd.Index(teams_elo['id'])
+        self.elo = teams_elo['elo'].to_numpy(dtype=float)
+        self.wins = (np.zeros(len(self.teams)) if wins is None
+                     else wins.reindex(self.teams).fillna(0).to_numpy(dtype=float))
+        self.remaining_games = remaining_games
+        self.nb_playoff_teams = nb_playoff_teams
+        self.home_court_advantage = (EloParams.home_court_advantage if home_court_advantage is None
+                                     else home_court_advantage)
+        self._series_probs = self._compute_series_probs()
+        # probability to reach each round, last rounds names when there are less than 16 teams
+        self.columns = ['playoffs'] + self.rounds[len(self.rounds) - int(np.log2(nb_playoff_teams)):]
+
+    def simulate(self, n_simulations=100000, seed=0, chunk_size=100000, n_jobs=1):
+        """ Simulate the playoffs.
+        :param n_simulations: number of simulated postseasons.
+        :param seed: seed of the random generators.
+        :param chunk_size: number of simulations vectorized together.
+        :param n_jobs: number of parallel jobs, -1 to use all the cores.
+        :return: pandas dataframe with one line per team, the probability to reach each round, the title odds.
+        """
+        chunks = [min(chunk_size, n_simulations - start) for start in range(0, n_simulations, chunk_size)]
+        seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+        counts = joblib.Parallel(n_jobs=n_jobs)(
+            joblib.delayed(self._simulate_chunk)(nb_simulations, np.random.default_rng(chunk_seed))
+            for nb_simulations, chunk_seed in zip(chunks, seeds)
+        )
+
+        probabilities = pd.DataFrame(np.sum(counts, axis=0) / n_simulations, columns=self.columns)
+        probabilities.insert(0, 'id', self.teams)
+        with np.errstate(divide='ignore'):
+            probabilities['odds'] = np.where(probabilities['title'] > 0, 1 / probabilities['title'], np.nan)
+        return probabilities.sort_values('title', ascending=False, ignore_index=True)
+
+    def _simulate_chunk(self, nb_simulations, rng):
+        """ Number of times each team reaches each round in nb_simulations simulations."""
+        # seeds : teams sorted by wins then elo, for each simulation
+        if self.remaining_games is not None and len(self.remaining_games) > 0:
+            wins = self.wins + self._simulate_remaining_games(nb_simulations, rng)
+            seeds = np.lexsort((np.broadcast_to(-self.elo, wins.shape), -wins), axis=1)[:, :self.nb_playoff_teams]
+        else:
+            seeds = np.broadcast_to(np.lexsort((-self.elo, -self.wins))[:self.nb_playoff_teams],
+                                    (nb_simulations, self.nb_playoff_teams))
+
+        # bracket positions, best seeds meet as late as possible
+        slots = self._bracket_order(self.nb_playoff_teams)
+        teams, teams_seed = seeds[:, slots], np.broadcast_to(slots, (nb_simulations, self.nb_playoff_teams))
+
+        counts = np.zeros((len(self.teams), len(self.columns)))
+        for round_index in range(len(self.columns)):
+            counts[:, round_index] = np.bincount(teams.ravel(), minlength=len(self.teams))
+            if round_index < len(self.columns) - 1:
+                teams, teams_seed = self._play_series(teams, teams_seed, rng)
+        return counts
+
+    def _play_series(self, teams, teams_seed, rng):
+        """ Winners of the series between consecutive bracket positions."""
+        first, second = teams[:, 0::2], teams[:, 1::2]
+        first_is_home = teams_seed[:, 0::2] < teams_seed[:, 1::2]
+        home = np.where(first_is_home, first, second)
+        away = np.where(first_is_home, second, first)
+
+        home_won = rng.random(home.shape) < self._series_probs[home, away]
+        winners_seed = np.where(home_won == first_is_home, teams_seed[:, 0::2], teams_seed[:, 1::2])
+        return np.where(home_won, home, away), winners_seed
+
+    def _compute_series_probs(self):
+        """ Probability that the team with home court advantage (rows) wins a best of seven against each team."""
+        home_elo, away_elo = np.meshgrid(self.elo, self.elo, indexing='ij')
+        prob_at_home, _ = EloRating.batch_win_probs(home_elo, away_elo, self.home_court_advantage)
+        _, prob_away = EloRating.batch_win_probs(away_elo, home_elo, self.home_court_advantage)
+
+        series_probs = np.zeros_like(prob_at_home)
+        for home_wins in range(5):
+            for away_wins in range(4 - home_wins, 4):
+                series_probs += (self.home_games_combinations[home_wins]
+                                 * prob_at_home ** home_wins * (1 - prob_at_home) ** (4 - home_wins)
+                                 * self.away_games_combinations[away_wins]
+                                 * prob_away ** away_wins * (1 - prob_away) ** (3 - away_wins))
+        return series_probs
+
+    def _simulate_remaining_games(self, nb_simulations, rng):
+        home = self.teams.get_indexer(self.remaining_games['home_id'])
+        away = self.teams.get_indexer(self.remaining_games['away_id'])
+        home_prob, _ = EloRating.batch_win_probs(self.elo[home], self.elo[away], self.home_court_advantage)
+
+        # one vectorized draw over the simulations for each game
+        wins = np.zeros((nb_simulations, len(self.teams)))
+        for game_home, game_away, game_home_prob in zip(home, away, home_prob):
+            home_won = rng.random(nb_simulations) < game_home_prob
+            wins[:, game_home] += home_won
+            wins[:, game_away] += ~home_won
+        return wins
+
+    @staticmethod
+    def _bracket_order(nb_teams):
+        """ Seeds (from 0) of each bracket position, e.g. 1, 16, 8, 9, 4, 13, 5, 12 ... for 16 teams."""
+        order = [0]
+        while len(order) < nb_teams:
+            order = [seed for top_seed in order for seed in (top_seed, 2 * len(order) - 1 - top_seed)]
+        return np.array(order)
@@ -0,0 +1,177 @@
+""" Class to predict odds of hypothetical rosters (trades, injuries) with a saved model."""
+import numpy as np
+import pandas as pd
+
+from nba_odds.config.config import GamesRawSchema, ProcessedSchema
+from nba_odds.features.player_efficiency_rating import PER
+
+
+class RosterWhatIf:
+    """Odds of teams after roster edits, with the PER features of the edited teams updated incrementally.
+
+    A scenario is a batch of edits : a player is moved to another team of the season or removed from his team. Only
+    the team seasons losing or getting a player change, their PER sums, counts and good players counts are the base
+    ones plus the contributions of the moved players. The PER max of a team losing players is the first player of its
+    base roster (sorted by PER) who is not removed in the scenario, compared to the players it gets. The good player
+    threshold is a quantile over all the players, it does not depend on the teams and is unchanged.
+    Edits of all the scenarios are processed together with array operations, and the changed team seasons of all the
+    scenarios are scored with one predictor call.
+
+    :attributes players_per: dataframe of the players PER as aggregated into teams, from
+        PER.compute_per_by_player_on_season (and PER.next_season_per for preseason features).
+    :attributes players_team: dataframe from odds.preprocessing.players_stats, team of each player and season.
+    :attributes features: features dataset of the predictor (e.g. preseason features), with id and season.
+    :attributes predictor: OddsPredictor of a model using PER features.
+    :methods from_per, team_per, predict_odds
+    """
+    keys = [GamesRawSchema.season, ProcessedSchema.team_id]
+    per_columns = PER.feature_columns()
+
+    def __init__(self, players_per, players_team, features, predictor):
+        self.players_per = players_per.reset_index(drop=True)
+        self.players_team = players_team
+        self.features = features.reset_index(drop=True)
+        self.predictor = predictor
+
+        self._players_index = pd.MultiIndex.from_frame(self.players_per[['player_id', GamesRawSchema.season]])
+        self._per = self.players_per['PER_mean'].to_numpy(dtype=float)
+        self._is_good_player = self.players_per['is_good_player'].to_numpy(dtype='int64')
+
+        # team seasons of the features and of the players, the team season of each player (-1 without team)
+        players_teams = pd.merge(self.players_per[['player_id', GamesRawSchema.season]], players_team,
+                                 on=['player_id', GamesRawSchema.season], how='left')
+        self._team_seasons = (pd.concat([self.features[self.keys], players_teams[self.keys].dropna()])
+                              .drop_duplicates().reset_index(drop=True))
+        self._team_seasons_index = pd.MultiIndex.from_frame(self._team_seasons)
+        self._player_team_season = self._team_seasons_index.get_indexer(
+            pd.MultiIndex.from_frame(players_teams[self.keys])
+        )
+
+        nb_team_seasons = len(self._team_seasons)
+        has_team = self._player_team_season >= 0
+        team_seasons = self._player_team_season[has_team]
+        self._per_sum = np.bincount(team_seasons, weights=self._per[has_team], minlength=nb_team_seasons)
+        self._count = np.bincount(team_seasons, minlength=nb_team_seasons)
+        self._good_count = np.bincount(team_seasons, weights=self._is_good_player[has_team],
+                                       minlength=nb_team_seasons).astype('int64')
+
+        # players of each team season sorted by decreasing PER
+        players = np.flatnonzero(has_team)
+        self._rosters = players[np.lexsort((-self._per[players], team_seasons))]
+        self._roster_starts = np.searchsorted(self._player_team_season[self._rosters], np.arange(nb_team_seasons + 1))
+
+        # features row of each team season, -1 for team seasons without features
+        self._team_season_rows = np.full(nb_team_seasons, -1)
+        self._team_season_rows[self._team_seasons_index.get_indexer(
+            pd.MultiIndex.from_frame(self.features[self.keys]))] = np.arange(len(self.features))
+        self._base_predictions = self._score(self.features)['predictions'].to_numpy()
+
+    @classmethod
+    def from_per(cls, per, features, predictor, previous_season=True):
+        """ What-if engine using the cached PER by player of a PER object.
+        :param per: PER with players_stats and players_team.
+        :param features: features dataset of the predictor.
+        :param predictor: OddsPredictor.
+        :param previous_season: True for PER.previous_season_per features (preseason), False for
+            PER.preplayoff_season_per ones.
+        :return: RosterWhatIf.
+        """
+        players_per = per.compute_per_by_player_on_season()
+        if previous_season:
+            players_per = per.next_season_per(players_per)
+        return cls(players_per=players_per, players_team=per.players_team, features=features, predictor=predictor)
+
+    def team_per(self, edits):
+        """ PER features of the team seasons changed by each scenario.
+        :param edits: dataframe with one line per edit : scenario, player_id, season and id, the new team of the
+            player, missing to remove the player from his team. The last edit of a player in a scenario is kept.
+            Players without PER features (not relevant) do not change the features and are ignored, a move to a team
+            season unknown to the features and the players is a removal.
+        :return: dataframe with scenario, season, id and the PER features of each changed team season, nan when the
+            team season has no relevant player left.
+        """
+        edits = edits.drop_duplicates(subset=['scenario', 'player_id', GamesRawSchema.season], keep='last')
+        players = self._players_index.get_indexer(pd.MultiIndex.from_frame(edits[['player_id',
+                                                                                  GamesRawSchema.season]]))
+        edits, players = edits[players >= 0], players[players >= 0]
+        scenario_codes, scenarios = pd.factorize(edits['scenario'])
+        old_team_seasons = self._player_team_season[players]
+        new_team_seasons = self._team_seasons_index.get_indexer(pd.MultiIndex.from_frame(edits[self.keys]))
+
+        # contributions of the moved players : removed from their old team, added to their new one
+        nb_team_seasons = len(self._team_seasons)
+        is_removed, is_added = old_team_seasons >= 0, new_team_seasons >= 0
+        changes = np.concatenate([scenario_codes[is_removed] * nb_team_seasons + old_team_seasons[is_removed],
+                                  scenario_codes[is_added] * nb_team_seasons + new_team_seasons[is_added]])
+        signs = np.repeat([-1, 1], [is_removed.sum(), is_added.sum()])
+        moved_players = np.concatenate([players[is_removed], players[is_added]])
+        changes, change_codes = np.unique(changes, return_inverse=True)
+        change_scenarios, team_seasons = changes // nb_team_seasons, changes % nb_team_seasons
+
+        per_sum = self._per_sum[team_seasons] + np.bincount(change_codes, weights=signs * self._per[moved_players],
+                                                            minlength=len(changes))
+        count = self._count[team_seasons] + np.bincount(change_codes, weights=signs, minlength=len(changes))
+        good_count = self._good_count[team_seasons] + np.bincount(
+            change_codes, weights=signs * self._is_good_player[moved_players], minlength=len(changes)
+        ).astype('int64')
+
+        per_max = self._remaining_max(change_scenarios, team_seasons, scenario_codes[is_removed], players[is_removed])
+        np.maximum.at(per_max, change_codes[signs > 0], self._per[moved_players[signs > 0]])
+
+        team_per = self._team_seasons.iloc[team_seasons].reset_index(drop=True)
+        team_per.insert(0, 'scenario', scenarios[change_scenarios])
+        has_players = count > 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            team_per['PER_mean_max'] = np.where(has_players, per_max, np.nan)
+            team_per['PER_mean_mean'] = np.where(has_players, per_sum / count, np.nan)
+        team_per['PER_mean_sum'] = np.where(has_players, per_sum, np.nan)
+        team_per['is_good_player_sum'] = np.where(has_players, good_count, np.nan)
+        return team_per
+
+    def predict_odds(self, edits):
+        """ Odds of the team seasons changed by each scenario, with the predictor.
+        :param edits: dataframe of edits, see team_per.
+        :return: dataframe with scenario, season, id, PER features, predictions and odds of each changed team season
+            of the features dataset, and base_predictions, the prediction without edits. Predictions are nan when
+            the team season has no relevant player left.
+        """
+        team_per = self.team_per(edits)
+        rows = self._team_season_rows[self._team_seasons_index.get_indexer(pd.MultiIndex.from_frame(
+            team_per[self.keys]))]
+        team_per, rows = team_per[rows >= 0].reset_index(drop=True), rows[rows >= 0]
+
+        scenario_features = self.features.iloc[rows].reset_index(drop=True)
+        per_columns = [column for column in self.per_columns if column in scenario_features.columns]
+        scenario_features[per_columns] = team_per[per_columns]
+        predictions = self._score(scenario_features)
+        team_per['predictions'] = predictions['predictions'].to_numpy()
+        team_per['odds'] = predictions['odds'].to_numpy()
+        team_per['base_predictions'] = self._base_predictions[rows]
+        return team_per
+
+    def _remaining_max(self, change_scenarios, team_seasons, removed_scenarios, removed_players):
+        """ Max PER of the base roster of each changed team season without the players removed in its scenario,
+        -inf when no player is left."""
+        nb_players = len(self.players_per)
+        removed = removed_scenarios * nb_players + removed_players
+        per_max = np.full(len(team_seasons), -np.inf)
+        positions = self._roster_starts[team_seasons]
+        pending = np.arange(len(team_seasons))
+        while len(pending) > 0:
+            in_roster = positions[pending] < self._roster_starts[team_seasons[pending] + 1]
+            pending = pending[in_roster]
+            players = self._rosters[positions[pending]]
+            is_removed = np.isin(change_scenarios[pending] * nb_players + players, removed)
+            per_max[pending[~is_removed]] = self._per[players[~is_removed]]
+            pending = pending[is_removed]
+            positions[pending] += 1
+        return per_max
+
+    def _score(self, features):
+        """ Predictions of the features rows with complete model features, nan for the others."""
+        is_complete = features[self.predictor.columns].notna().all(axis=1).to_numpy()
+        predictions = pd.DataFrame({'predictions': np.nan, 'odds': np.nan}, index=features.index)
+        if is_complete.any():
+            scored = self.predictor.predict_odds(features[is_complete])
+            predictions.loc[is_complete, ['predictions', 'odds']] = scored[['predictions', 'odds']].to_numpy()
+        return predictions
@@ -0,0 +1,65 @@
+"""Process players data season by season, with a memory bounded by one season of box score."""
+import logging
+
+import pandas as pd
+
+from nba_odds.config.config import GamesRawSchema
+from nba_odds.preprocessing.players_data import PlayersData
+
+logging.basicConfig(level=logging.INFO)
+
+
+class ChunkedPlayersData:
+    """Same players teams as PlayersData.build_data_with_regular_season_teams, computed season by season.
+
+    The box score lines of each season are read from the parquet file (RawDataLoader.iter_box_score_by_season), merged
+    with the teams of the games and aggregated by player and season, then dropped before the next season. Team
+    assignments and aggregates by player and season do not depend on the other seasons, so concatenating the seasons
+    gives the same lines as processing the whole box score, while the whole box score and its merge with the games
+    are never in memory. Player ids categories are sorted, and the lines sorted by player and season.
+
+    :attributes games_per_team: dataframe from GamesPerTeam.build_dataset.
+    :attributes raw_data_loader: RawDataLoader reading the box score parquet file.
+    :methods build_data
+    """
+
+    def __init__(self, games_per_team, raw_data_loader):
+        self.games_per_team = games_per_team
+        self.raw_data_loader = raw_data_loader
+
+    def build_data(self, regular_season_game_ids, aggregate=None):
+        """
+        Determine the team of each player on all games and on regular season games, and aggregate the players stats
+        of each season.
+        :param regular_season_game_ids: list-like of regular season game ids.
+        :param aggregate: optional function(players_stats, regular_season_game_ids) returning a tuple of dataframes
+            aggregated by player_id and season, e.g. PER aggregates. players_stats are the lines of one season, as
+            returned by PlayersData.build_data.
+        :return: players team on all games, players team on regular season games and the concatenated aggregate
+            outputs, sorted by player and season.
+        """
+        regular_season_game_ids = pd.Series(regular_season_game_ids).unique()
+        games_seasons = self.games_per_team.set_index(GamesRawSchema.game_id)[GamesRawSchema.season]
+        seasons_games = dict(tuple(self.games_per_team.groupby(GamesRawSchema.season, sort=False)))
+
+        seasons_outputs = []
+        for season, season_box_score in self.raw_data_loader.iter_box_score_by_season(games_seasons=games_seasons):
+            players_data = PlayersData(games_per_team=seasons_games[season], basket_ref_box_score=season_box_score)
+            players_stats, players_team, regular_season_players_team = (
+                players_data.build_data_with_regular_season_teams(regular_season_game_ids=regular_season_game_ids)
+            )
+            aggregates = () if aggregate is None else aggregate(players_stats, regular_season_game_ids)
+            seasons_outputs.append((players_team, regular_season_players_team) + tuple(aggregates))
+            logging.info(f"Players data of season {season} : {len(season_box_score)} box score lines.")
+            del players_data, players_stats, season_box_score
+
+        return tuple(self._concat_seasons(list(outputs)) for outputs in zip(*seasons_outputs))
+
+    @staticmethod
+    def _concat_seasons(seasons_frames):
+        """ Concatenate tables by player and season, with the player ids categories of all seasons."""
+        frames = pd.concat(seasons_frames, ignore_index=True)
+        if isinstance(seasons_frames[0]['player_id'].dtype, pd.CategoricalDtype):
+            frames['player_id'] = pd.api.types.union_categoricals([frame['player_id'] for frame in seasons_frames],
+                                                                  sort_categories=True)
+        return frames.sort_values(by=['player_id', GamesRawSchema.season], kind='stable').reset_index(drop=True)
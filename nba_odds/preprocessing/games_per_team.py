@@ -2,10 +2,13 @@
 import pandas as pd
 
 from nba_odds.config.config import GamesRawSchema, ProcessedSchema
+from nba_odds.preprocessing.raw_data_loader import RawDataLoader
+from nba_odds.preprocessing.split_on_playoffs import SplitPlayoff
 
 
 class GamesPerTeam:
-    """Clean data (floats and dates) and create a dataset with one row per team per game.
+    """Clean data (floats and dates) and create a dataset with one row per team per game, with the phase of the season
+    (regular season or playoff) of each game.
 
     :attribute basket_ref_games: raw pandas dataframe with one line per game.
     :method build_dataset
@@ -14,9 +17,10 @@ class GamesPerTeam:
     def __init__(self, basket_ref_games):
         self.basket_ref_games = basket_ref_games
 
-    def build_dataset(self):
+    def build_dataset(self, with_phase=True):
         """Clean and transform the dataframe with one line per game into a dataframe with one line per game per team.
 
+        :param with_phase: add the phase column, computed from all the games of each season.
         :return: pandas dataframe with one line per team per game
         """
         basket_ref_games = self.basket_ref_games
@@ -29,6 +33,8 @@ class GamesPerTeam:
         games_with_floats = self._process_floats(basket_ref_games=basket_ref_games)
 
         games_per_team = self._build_games_per_team(games_with_floats)
+        if with_phase:
+            games_per_team[ProcessedSchema.phase] = SplitPlayoff.compute_phase(games_per_team)
         return games_per_team
 
     @staticmethod
@@ -52,14 +58,7 @@ class GamesPerTeam:
 
     @staticmethod
     def _process_floats(basket_ref_games):
-        float_features = [
-            'away_pace', 'away_efg', 'away_tov', 'away_orb',
-            'away_ftfga', 'away_ortg', 'home_pace', 'home_efg', 'home_tov',
-            'home_orb', 'home_ftfga', 'home_ortg']
-
-        for feature in float_features:
-            basket_ref_games[feature] = basket_ref_games[feature].apply(lambda x: x.replace(',', '.')).astype(float)
-        return basket_ref_games
+        return RawDataLoader.parse_decimals(basket_ref_games, GamesRawSchema.decimal_columns)
 
     @staticmethod
     def _build_games_per_team(basket_ref_games):
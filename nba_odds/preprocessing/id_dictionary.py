@@ -0,0 +1,63 @@
+""" Class to encode ids as dense integer codes."""
+import os
+
+import numpy as np
+import pandas as pd
+
+
+class IdDictionary:
+    """Dense int32 codes of raw ids, e.g. game ids, for joins and groupbys on integers instead of strings.
+
+    The code of an id is its position in `ids`. New ids are appended (sorted) after the known ones, so codes do not
+    change between runs as long as the dictionary is saved and loaded again : outputs kept between runs (elo
+    checkpoint, stage cache) stay valid.
+
+    :attributes ids: pandas index of the raw ids, the code of an id is its position.
+    :methods load, save, update, encode, decode
+    """
+    column = 'id'
+
+    def __init__(self, ids=()):
+        self.ids = pd.Index(ids, dtype=object)
+
+    @classmethod
+    def load(cls, path):
+        """ Dictionary saved at path, an empty one if there is no file."""
+        if not os.path.exists(path):
+            return cls()
+        return cls(pd.read_parquet(path)[cls.column])
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        pd.DataFrame({self.column: self.ids}).to_parquet(path, index=False)
+
+    def update(self, raw_ids):
+        """ Add the unknown ids of raw_ids at the end of the dictionary.
+        :param raw_ids: list-like of raw ids.
+        :return: number of added ids.
+        """
+        raw_ids = pd.Index(pd.unique(pd.Series(raw_ids, dtype=object).dropna()))
+        new_ids = raw_ids[self.ids.get_indexer(raw_ids) < 0].sort_values()
+        self.ids = self.ids.append(new_ids)
+        return len(new_ids)
+
+    def encode(self, raw_ids):
+        """ Codes of raw ids.
+        :param raw_ids: list-like of raw ids, categoricals (e.g. dictionary encoded parquet columns) are encoded by
+            category.
+        :return: numpy int32 array, -1 for unknown ids.
+        """
+        if isinstance(getattr(raw_ids, 'dtype', None), pd.CategoricalDtype):
+            categorical = pd.Categorical(raw_ids)
+            categories_codes = np.append(self.ids.get_indexer(categorical.categories), -1).astype('int32')
+            return categories_codes[categorical.codes]  # missing values have code -1, the last one
+        return self.ids.get_indexer(pd.Index(raw_ids, dtype=object)).astype('int32')
+
+    def decode(self, codes):
+        """ Raw ids of codes.
+        :param codes: list-like of codes.
+        :return: numpy object array, None for -1.
+        """
+        codes = np.asarray(codes)
+        raw_ids = np.append(self.ids.to_numpy(dtype=object), None)
+        return raw_ids[np.where(codes >= 0, codes, len(self.ids))]
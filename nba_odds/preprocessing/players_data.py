@@ -1,6 +1,10 @@
 """Clean and process players data."""
+import numpy as np
 import pandas as pd
 
+from nba_odds.config.config import BoxScoreRawSchema
+from nba_odds.preprocessing.raw_data_loader import RawDataLoader
+
 
 class PlayersData:
     """ Clean and process players data"""
@@ -13,15 +17,44 @@ class PlayersData:
         Determine the team of each player for each season and add to provided players data.
         :return: player data with team
         """
+        players_games_with_both_teams = self._merge_players_with_games()
+
+        players_stats = self._build_cleaned_players_data_with_season(players_games_with_both_teams)
+        players_with_teams = self._build_players_team(players_games_with_both_teams)
+        return players_stats, players_with_teams
+
+    def build_data_with_regular_season_teams(self, regular_season_game_ids):
+        """
+        Same as build_data, and also determine the team of each player on regular season games only, from the same
+        merge and team counts.
+        :param regular_season_game_ids: list-like of regular season game ids.
+        :return: player data with season, player team on all games, player team on regular season games
+        """
+        players_games_with_both_teams = self._merge_players_with_games()
+        players_games_with_both_teams['is_regular_season'] = (players_games_with_both_teams['game_id']
+                                                              .isin(regular_season_game_ids))
+
+        players_stats = self._build_cleaned_players_data_with_season(players_games_with_both_teams)
+
+        team_counts = self._count_players_team(players_games_with_both_teams, by=['is_regular_season'])
+        all_games_team_counts = (team_counts
+                                 .groupby(['player_id', 'season', 'id'], sort=False, observed=True)
+                                 .agg(count=('count', 'sum'), first_position=('first_position', 'min'))
+                                 .reset_index())
+        all_games_team_counts = self._with_categories_order(all_games_team_counts, team_counts['id'])
+        players_with_teams = self._keep_most_frequent_team(all_games_team_counts)
+        regular_season_players_with_teams = self._keep_most_frequent_team(
+            team_counts[team_counts['is_regular_season']]
+        )
+        return players_stats, players_with_teams, regular_season_players_with_teams
+
+    def _merge_players_with_games(self):
         players = self.players_data[['game_id', 'player_id']].copy()
         games_with_team = self.games_per_team[['game_id', 'id', 'season']].copy()
 
         # one line per game per team per player
         players_games_with_both_teams = pd.merge(players, games_with_team, on='game_id', how='inner')
-
-        players_stats = self._build_cleaned_players_data_with_season(players_games_with_both_teams)
-        players_with_teams = self._build_players_team(players_games_with_both_teams)
-        return players_stats, players_with_teams
+        return players_games_with_both_teams
 
     def _build_cleaned_players_data_with_season(self, players_games_with_both_teams):
         players_games_with_season = (players_games_with_both_teams[['game_id', 'player_id', 'season']]
@@ -35,18 +68,41 @@ class PlayersData:
         players_stats = self._process_mp_float(players_stats_with_season)
         return players_stats
 
-    @staticmethod
-    def _build_players_team(players_games_with_both_teams):
-        players_with_teams = (players_games_with_both_teams.groupby(['player_id', 'season'])
-                              .agg(lambda x: (x.value_counts().index[0]))[['id']]
-                              .reset_index())  # for each player keep the team that appears most
-        return players_with_teams
+    @classmethod
+    def _build_players_team(cls, players_games_with_both_teams):
+        team_counts = cls._count_players_team(players_games_with_both_teams)
+        return cls._keep_most_frequent_team(team_counts)
 
     @staticmethod
-    def _process_mp_float(df):
-        df['mp'] = df['mp'].apply(lambda x: x.replace(',', '.')).astype(float)
-        return df
-
+    def _count_players_team(players_games_with_both_teams, by=()):
+        """ Number of lines of each team for each player and season, with the position of the first line."""
+        keys = ['player_id', 'season', 'id'] + list(by)
+        team_counts = (players_games_with_both_teams[keys]
+                       .assign(position=np.arange(len(players_games_with_both_teams)))
+                       .groupby(keys, sort=False, observed=True)
+                       .agg(count=('position', 'size'), first_position=('position', 'min'))
+                       .reset_index())
+        return PlayersData._with_categories_order(team_counts, players_games_with_both_teams['id'])
 
+    @staticmethod
+    def _with_categories_order(team_counts, ids):
+        # groupby orders the categories as they appear, the teams keep the categories of the input ids
+        if not isinstance(ids.dtype, pd.CategoricalDtype):
+            return team_counts
+        return team_counts.assign(id=team_counts['id'].cat.set_categories(ids.cat.categories))
 
+    @staticmethod
+    def _keep_most_frequent_team(team_counts):
+        """ For each player and season keep the team with the most lines. On ties, the team whose first line comes
+        first (lowest first_position) is kept. The first positions of a player season are distinct, so the kept team
+        does not depend on the sort algorithm nor on the dtype of the ids."""
+        keys = ['player_id', 'season']
+        players_with_teams = (team_counts
+                              .sort_values(by=keys + ['count', 'first_position'], ascending=[True, True, False, True])
+                              .drop_duplicates(subset=keys)[keys + ['id']]
+                              .reset_index(drop=True))
+        return players_with_teams
 
+    @staticmethod
+    def _process_mp_float(df):
+        return RawDataLoader.parse_decimals(df, [BoxScoreRawSchema.mp])
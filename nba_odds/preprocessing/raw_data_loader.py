@@ -0,0 +1,145 @@
+""" Class to load basket reference raw parquet files."""
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from pandas.api.types import is_integer_dtype, is_object_dtype
+
+from nba_odds.config.config import BoxScoreRawSchema, GamesRawSchema
+
+
+class RawDataLoader:
+    """Load games and box score raw data with only the used columns, typed once.
+
+    Decimal strings and dates are parsed with vectorized conversions, small integers are downcast and team and player
+    ids are categoricals (home and away teams share the same categories). With an id_dictionary, game ids are int32
+    codes of the dictionary in games and box score : the box score game ids are read dictionary encoded and only their
+    distinct values are looked up.
+
+    :attributes path_basket_ref_games: path to games parquet file.
+    :attributes path_basket_ref_box_score: path to box score parquet file.
+    :attributes first_season, last_season: optional range of seasons to load, pushed down to the parquet reader.
+    :attributes id_dictionary: optional IdDictionary encoding game ids, updated with the ids of the loaded games.
+    :methods load_games, load_box_score, iter_box_score_by_season
+    """
+
+    def __init__(self, path_basket_ref_games, path_basket_ref_box_score, first_season=None, last_season=None,
+                 id_dictionary=None):
+        self.path_basket_ref_games = path_basket_ref_games
+        self.path_basket_ref_box_score = path_basket_ref_box_score
+        self.first_season = first_season
+        self.last_season = last_season
+        self.id_dictionary = id_dictionary
+        self._game_ids = None
+
+    def load_games(self):
+        """ Load games raw data.
+        :return: pandas dataframe with one line per game.
+        """
+        filters = []
+        if self.first_season is not None:
+            filters.append((GamesRawSchema.season, '>=', self.first_season))
+        if self.last_season is not None:
+            filters.append((GamesRawSchema.season, '<=', self.last_season))
+
+        games = pd.read_parquet(self.path_basket_ref_games, columns=GamesRawSchema.columns,
+                                filters=filters or None)
+
+        games[GamesRawSchema.date_col] = pd.to_datetime(games[GamesRawSchema.date_col])
+        games = self.parse_decimals(games, GamesRawSchema.decimal_columns)
+        games = self._downcast_integers(games, [GamesRawSchema.season, GamesRawSchema.ylabel]
+                                        + GamesRawSchema.quarter_points + GamesRawSchema.other_stats)
+
+        teams = pd.api.types.union_categoricals(
+            [pd.Categorical(games[GamesRawSchema.home]), pd.Categorical(games[GamesRawSchema.away])],
+            sort_categories=True
+        ).categories
+        for team_col in (GamesRawSchema.home, GamesRawSchema.away):
+            games[team_col] = pd.Categorical(games[team_col], categories=teams)
+
+        self._game_ids = games[GamesRawSchema.game_id]
+        if self.id_dictionary is not None:
+            self.id_dictionary.update(self._game_ids)
+            games[GamesRawSchema.game_id] = self.id_dictionary.encode(self._game_ids)
+        return games
+
+    def load_box_score(self):
+        """ Load box score raw data, only for the games of the loaded seasons when a seasons range is set.
+        :return: pandas dataframe with one line per player per game.
+        """
+        filters = None
+        if self.first_season is not None or self.last_season is not None:
+            if self._game_ids is None:
+                self.load_games()
+            # raw game ids, the filter is applied by the parquet reader
+            filters = [(BoxScoreRawSchema.game_id, 'in', set(self._game_ids))]
+
+        box_score = pd.read_parquet(self.path_basket_ref_box_score, columns=BoxScoreRawSchema.columns,
+                                    filters=filters, read_dictionary=self._read_dictionary)
+        return self._process_box_score(box_score)
+
+    def iter_box_score_by_season(self, games_seasons, batch_size=2 ** 16):
+        """ Read the box score file once, by batches, and yield the lines of each season as soon as its last line
+        is read. Lines keep their order in the file.
+
+        A first pass reads only the game ids (dictionary encoded) to find the last line of each season. When the file
+        is ordered by date, only the lines of one season and one batch are in memory at a time.
+        :param games_seasons: pandas series of the season of each game, indexed by game id. Lines of other games are
+            skipped.
+        :param batch_size: number of lines read at a time.
+        :return: iterator of (season, box score dataframe of the season).
+        """
+        parquet_file = pq.ParquetFile(self.path_basket_ref_box_score,
+                                      read_dictionary=[BoxScoreRawSchema.game_id])
+        game_ids = parquet_file.read(columns=[BoxScoreRawSchema.game_id])[BoxScoreRawSchema.game_id].combine_chunks()
+        distinct_game_ids = game_ids.dictionary.to_pandas()
+        if self.id_dictionary is not None:
+            distinct_game_ids = self.id_dictionary.encode(distinct_game_ids)
+        seasons_of_ids = (games_seasons[~games_seasons.index.duplicated()]
+                          .reindex(distinct_game_ids).fillna(-1).to_numpy(dtype='int64'))
+        lines_season = seasons_of_ids[game_ids.indices.to_numpy(zero_copy_only=False)]
+        del game_ids
+        last_line = pd.Series(np.arange(len(lines_season))).groupby(lines_season).max().drop(-1, errors='ignore')
+
+        seasons_lines, position = {}, 0
+        for batch in pq.ParquetFile(self.path_basket_ref_box_score, read_dictionary=self._read_dictionary).iter_batches(
+                batch_size=batch_size, columns=BoxScoreRawSchema.columns):
+            batch = batch.to_pandas()
+            batch_seasons = lines_season[position:position + len(batch)]
+            position += len(batch)
+            for season in np.unique(batch_seasons[batch_seasons >= 0]):
+                seasons_lines.setdefault(season, []).append(batch[batch_seasons == season])
+            for season in [season for season in seasons_lines if last_line[season] < position]:
+                yield season, self._process_box_score(pd.concat(seasons_lines.pop(season), ignore_index=True))
+
+    @property
+    def _read_dictionary(self):
+        # game ids read as categoricals are encoded by distinct value
+        return None if self.id_dictionary is None else [BoxScoreRawSchema.game_id]
+
+    def _process_box_score(self, box_score):
+        if self.id_dictionary is not None:
+            box_score[BoxScoreRawSchema.game_id] = self.id_dictionary.encode(box_score[BoxScoreRawSchema.game_id])
+        box_score = self.parse_decimals(box_score, [BoxScoreRawSchema.mp])
+        box_score = self._downcast_integers(box_score, BoxScoreRawSchema.stats)
+        box_score[BoxScoreRawSchema.player_id] = box_score[BoxScoreRawSchema.player_id].astype('category')
+        return box_score
+
+    @staticmethod
+    def parse_decimals(df, columns):
+        """ Convert strings with a comma as decimal separator to floats, columns already numeric are kept.
+        :param df: pandas dataframe, modified in place.
+        :param columns: columns to convert.
+        :return: the dataframe.
+        """
+        for column in columns:
+            if is_object_dtype(df[column]):
+                df[column] = df[column].str.replace(',', '.', regex=False).astype(float)
+        return df
+
+    @staticmethod
+    def _downcast_integers(df, columns):
+        # int16 and not smaller : points are summed over quarters and seasons.
+        for column in columns:
+            if is_integer_dtype(df[column]) and df[column].abs().max() < 2 ** 15:
+                df[column] = df[column].astype('int16')
+        return df
@@ -1,41 +1,76 @@
 """ Class to split on playoffs and keep only regular season data."""
+import numpy as np
 import pandas as pd
 
+from nba_odds.config.config import GamesRawSchema, ProcessedSchema
+
 
 class SplitPlayoff:
     """Class to keep only regular season data.
 
-    :method: keep_only_regular_season
+    Uses the phase column of games_per_team (see compute_phase) when it is there, computes it otherwise.
+
+    :method: keep_only_regular_season, compute_phase
     """
 
+    nb_games_per_team_regular = 82
+    nb_teams_before_2004 = 29
+    nb_teams_after_2004 = 30
+
     def __init__(self, games_per_team):
         self.games_per_team = games_per_team
+        self._is_regular_season = None
 
     def keep_only_regular_season(self):
         """Keep only regular season data, extracted from games_per_team dataset.
 
         :return: games_regular_season dataframe
         """
-        games_regular_season = self.games_per_team[self.games_per_team['datetime'].isin(self.regular_season_dates)]
+        games_regular_season = self.games_per_team[self.is_regular_season]
         return games_regular_season
 
+    @property
+    def is_regular_season(self):
+        """ Boolean mask of games_per_team regular season lines."""
+        if self._is_regular_season is None:
+            if ProcessedSchema.phase in self.games_per_team.columns:
+                phase = self.games_per_team[ProcessedSchema.phase]
+            else:
+                phase = self.compute_phase(self.games_per_team)
+            self._is_regular_season = np.asarray(phase == ProcessedSchema.regular_season)
+        return self._is_regular_season
+
     @property
     def regular_season_dates(self):
-        nb_games_per_team_regular = 82
-        nb_teams_before_2004 = 29
-        nb_teams_after_2004 = 30
-        regular_season_dates_before_2004 = (
-            self.games_per_team.query('season < 2004').groupby('season')['datetime'].nsmallest(
-                nb_teams_before_2004 * nb_games_per_team_regular)
-        )
-        regular_season_dates_after_2004 = (
-            self.games_per_team.query('season >= 2004').groupby('season')['datetime'].nsmallest(
-                nb_teams_after_2004 * nb_games_per_team_regular)
-        )
-        regular_season_dates = pd.concat([regular_season_dates_before_2004, regular_season_dates_after_2004], axis=0)
-        return regular_season_dates
+        return self.games_per_team.loc[self.is_regular_season, GamesRawSchema.date_col]
 
     @property
     def playoff_dates(self):
-        games_playoff = self.games_per_team[self.games_per_team['datetime'].isin(self.regular_season_dates) == False]
-        return games_playoff.datetime
+        return self.games_per_team.loc[~self.is_regular_season, GamesRawSchema.date_col]
+
+    @property
+    def playoff_game_ids(self):
+        return self.games_per_team.loc[~self.is_regular_season, GamesRawSchema.game_id]
+
+    @classmethod
+    def compute_phase(cls, games_per_team):
+        """Phase of each line of games_per_team, regular season or playoff.
+
+        The regular season of a season is made of the dates of its first nb_teams * 82 lines, by date.
+        :param games_per_team: dataframe with one line per team per game.
+        :return: categorical with the phase of each line, in the same order.
+        """
+        seasons_dates = (games_per_team[[GamesRawSchema.season, GamesRawSchema.date_col]]
+                         .sort_values(by=[GamesRawSchema.season, GamesRawSchema.date_col]))
+        nb_teams = np.where(seasons_dates[GamesRawSchema.season] < 2004,
+                            cls.nb_teams_before_2004, cls.nb_teams_after_2004)
+        by_season = seasons_dates.groupby(GamesRawSchema.season)
+        last_regular_season_line = np.minimum(nb_teams * cls.nb_games_per_team_regular,
+                                              by_season[GamesRawSchema.date_col].transform('size').to_numpy()) - 1
+
+        last_regular_season_date = (seasons_dates[by_season.cumcount().to_numpy() == last_regular_season_line]
+                                    .set_index(GamesRawSchema.season)[GamesRawSchema.date_col])
+        is_regular_season = (games_per_team[GamesRawSchema.date_col]
+                             <= games_per_team[GamesRawSchema.season].map(last_regular_season_date))
+        return pd.Categorical(np.where(is_regular_season, ProcessedSchema.regular_season, ProcessedSchema.playoff),
+                              categories=[ProcessedSchema.regular_season, ProcessedSchema.playoff])
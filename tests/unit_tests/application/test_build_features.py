@@ -0,0 +1,25 @@
+"""Class to test build_features stages."""
+from unittest import TestCase
+
+from nba_odds.application import build_features
+
+
+class TestBuildFeatures(TestCase):
+    """Class to test build_features stages."""
+
+    def test_build_stages_runs_only_the_stages_of_the_requested_columns(self):
+        # Given
+        columns = ['id', 'season', 'won', 'elo', 'won_sum']
+
+        # When
+        all_stages, _ = build_features._build_stages()
+        stages, columns_values = build_features._build_stages(preseason_columns=columns, playoff_columns=['elo'])
+
+        # Then
+        self.assertIn('PlayersData', [stage.name for stage in all_stages])
+        self.assertListEqual([stage.name for stage in stages],
+                             ['GamesPerTeam', 'Labels', 'EloRating', 'PreseasonTeamsStats', 'PreseasonElo',
+                              'RegularSeasonTeamsStats', 'PreplayoffElo', 'PreseasonFeatures', 'PlayoffFeatures'])
+        self.assertNotIn('basket_ref_box_score', {name for stage in stages for name in stage.dependency_names})
+        self.assertListEqual(columns_values['PreseasonTeamsStats_columns'], ['won_sum'])
+        self.assertListEqual(columns_values['RegularSeasonTeamsStats_columns'], [])
@@ -0,0 +1,51 @@
+"""Class to test DagExecutor class."""
+import tempfile
+from unittest import TestCase
+
+import pandas as pd
+
+from nba_odds.application.dag import DagExecutor, Stage
+from nba_odds.application.stage_cache import StageCache
+
+
+def _split(df):
+    return df.query('points >= 100'), df.query('points < 100')
+
+
+def _count(df):
+    return pd.DataFrame({'count': [len(df)]})
+
+
+def _total(first, second):
+    return pd.DataFrame({'count': first['count'] + second['count']})
+
+
+class TestDagExecutor(TestCase):
+    """Class to test DagExecutor class."""
+
+    def setUp(self):
+        self.stages = [
+            Stage('total', _total, ['count_high', 'count_low']),
+            Stage('count_high', _count, [('split', 0)]),
+            Stage('count_low', _count, [('split', 1)]),
+            Stage('split', _split, ['games']),
+        ]
+        self.games = pd.DataFrame({'id': [1, 2, 3], 'points': [100, 90, 110]})
+
+    def test_run(self):
+        for max_workers in (1, 2):
+            with tempfile.TemporaryDirectory() as cache_dir:
+                # When
+                executor = DagExecutor(stages=self.stages, max_workers=max_workers,
+                                       cache=StageCache(cache_dir=cache_dir))
+                actual = executor.run({'games': self.games})
+                actual_from_cache = DagExecutor(stages=self.stages, max_workers=max_workers,
+                                                cache=StageCache(cache_dir=cache_dir)).run({'games': self.games})
+
+            # Then
+            pd.testing.assert_frame_equal(actual['total'], pd.DataFrame({'count': [3]}))
+            pd.testing.assert_frame_equal(actual_from_cache['count_low'], pd.DataFrame({'count': [1]}))
+
+    def test_run_missing_dependency(self):
+        with self.assertRaises(ValueError):
+            DagExecutor(stages=self.stages, max_workers=1).run({})
@@ -0,0 +1,35 @@
+"""Class to test datasets_io functions."""
+import os
+import tempfile
+from unittest import TestCase
+
+import pandas as pd
+
+from nba_odds.application.datasets_io import read_dataset, read_metadata, write_dataset
+
+
+class TestDatasetsIO(TestCase):
+    """Class to test datasets_io functions."""
+
+    def setUp(self):
+        self.dataset = pd.DataFrame({'id': ['BOS', 'LAL'], 'season': [2018, 2018], 'won': [False, True],
+                                     'elo': [1510.5, 1620.0]})
+
+    def test_write_and_read_dataset(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            # Given
+            path = os.path.join(output_dir, 'features', 'dataset.parquet')
+            csv_path = os.path.join(output_dir, 'dataset.csv')
+
+            # When
+            write_dataset(self.dataset, path, params={'k': 20}, csv_path=csv_path)
+            actual = read_dataset(path)
+            actual_columns = read_dataset(path, columns=['id', 'won'])
+            actual_metadata = read_metadata(path)
+            csv_exported = os.path.exists(csv_path)
+
+        # Then
+        pd.testing.assert_frame_equal(actual, self.dataset)
+        pd.testing.assert_frame_equal(actual_columns, self.dataset[['id', 'won']])
+        self.assertDictEqual(actual_metadata['params'], {'k': 20})
+        self.assertTrue(csv_exported)
@@ -0,0 +1,58 @@
+"""Class to test FeatureRegistry class."""
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from nba_odds.application.feature_registry import Feature, FeatureRegistry
+
+
+class TestFeatureRegistry(TestCase):
+    """Class to test FeatureRegistry class."""
+
+    def setUp(self):
+        self.registry = FeatureRegistry([
+            Feature('TeamsStats', columns=['won_sum', 'orb_sum'], prunable=True),
+            Feature('Labels', columns=['won'], keys=['season']),
+            Feature('Elo', columns=['elo']),
+            Feature('PER', columns=['PER_mean_max', 'PER_mean_sum']),
+        ])
+        self.teams_stats = pd.DataFrame({'id': ['A', 'B', 'A', 'B'], 'season': [2017, 2017, 2018, 2018],
+                                         'won_sum': [40, 42, 50, 30], 'orb_sum': [1, 2, 3, 4]})
+        self.labels = pd.DataFrame({'season': [2018, 2017], 'won': ['A', 'B']})
+        self.elo = pd.DataFrame({'id': ['B', 'A', 'A'], 'season': [2017, 2017, 2018], 'elo': [1510.0, 1490.0, 1520.0]})
+        self.per = pd.DataFrame({'id': ['A', 'B'], 'season': [2018, 2018], 'PER_mean_max': [20.0, 25.0],
+                                 'PER_mean_sum': [100.0, 90.0]})
+
+    def test_select(self):
+        # When
+        actual = self.registry.select(columns=['id', 'season', 'elo', 'PER_mean_sum'])
+
+        # Then
+        self.assertListEqual([(feature.name, columns) for feature, columns in actual],
+                             [('TeamsStats', []), ('Elo', ['elo']), ('PER', ['PER_mean_sum'])])
+        self.assertListEqual(self.registry.dependencies(), ['TeamsStats', 'Labels', 'Elo', 'PER'])
+        with self.assertRaises(ValueError):
+            self.registry.select(columns=['elo', 'unknown'])
+
+    def test_assemble_is_the_same_as_left_merges(self):
+        # Given
+        expected = pd.merge(self.teams_stats, self.labels, on='season', how='left')
+        expected = pd.merge(expected, self.elo, on=['id', 'season'], how='left')
+        expected = pd.merge(expected, self.per, on=['id', 'season'], how='left')
+
+        # When
+        actual = self.registry.assemble([self.teams_stats, self.labels, self.elo, self.per])
+
+        # Then
+        pd.testing.assert_frame_equal(actual, expected)
+
+    def test_assemble_requested_columns(self):
+        # When
+        actual = self.registry.assemble([self.teams_stats[['id', 'season']], self.per],
+                                        columns=['id', 'season', 'PER_mean_max'])
+
+        # Then
+        expected = pd.DataFrame({'id': ['A', 'B', 'A', 'B'], 'season': [2017, 2017, 2018, 2018],
+                                 'PER_mean_max': [np.nan, np.nan, 20.0, 25.0]})
+        pd.testing.assert_frame_equal(actual, expected)
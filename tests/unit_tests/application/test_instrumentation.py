@@ -0,0 +1,91 @@
+"""Class to test Instrumentation class."""
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from nba_odds.application.dag import DagExecutor, Stage
+from nba_odds.application.instrumentation import Instrumentation, read_report
+
+
+def _double(df):
+    return pd.concat([df, df])
+
+
+class TestInstrumentation(TestCase):
+    """Class to test Instrumentation class."""
+
+    def setUp(self):
+        self.games = pd.DataFrame({'id': np.arange(1000), 'points': np.arange(1000, dtype=float)})
+
+    def test_call_appends_stage_record(self):
+        with tempfile.TemporaryDirectory() as report_dir:
+            # Given
+            report_path = os.path.join(report_dir, 'report.jsonl')
+            instrumentation = Instrumentation(report_path=report_path, profile_stages=['double'], run_id='run')
+
+            # When
+            outputs = instrumentation.call('double', _double, self.games)
+            with instrumentation.stage('sum', inputs=[outputs]) as record:
+                record.set_outputs(outputs.sum())
+            report = read_report(report_path, run_id='run')
+
+            # Then
+            self.assertEqual(len(outputs), 2000)
+            self.assertListEqual(list(report['stage']), ['double', 'sum'])
+            double = report.iloc[0]
+            self.assertEqual((double['input_rows'], double['output_rows']), (1000, 2000))
+            self.assertEqual(double['output_bytes'], 2000 * 8 * 3)
+            self.assertGreater(double['peak_memory'], 2000 * 8 * 2)
+            self.assertGreater(double['wall_time'], 0)
+            self.assertTrue(os.path.exists(double['profile']))
+            self.assertTrue(pd.isna(report.iloc[1]['profile']))
+
+    def test_failed_stage_is_recorded(self):
+        with tempfile.TemporaryDirectory() as report_dir:
+            # Given
+            report_path = os.path.join(report_dir, 'report.jsonl')
+            instrumentation = Instrumentation(report_path=report_path, trace_memory=False)
+
+            # When
+            with self.assertRaises(KeyError):
+                with instrumentation.stage('failing', inputs=[self.games]):
+                    self.games['missing_column']
+            report = read_report(report_path)
+
+            # Then
+            self.assertEqual(report.iloc[0]['error'], 'KeyError')
+            self.assertTrue(pd.isna(report.iloc[0]['peak_memory']))
+
+    def test_disabled_instrumentation_writes_nothing(self):
+        # Given
+        instrumentation = Instrumentation()
+
+        # When
+        outputs = instrumentation.wrap('double')(_double)(self.games)
+        with instrumentation.stage('sum', inputs=[outputs]) as record:
+            record.set_outputs(outputs.sum())
+
+        # Then
+        self.assertFalse(instrumentation.enabled)
+        self.assertEqual(len(outputs), 2000)
+
+    def test_dag_executor_stages_are_recorded_in_the_workers(self):
+        for max_workers in (1, 2):
+            with tempfile.TemporaryDirectory() as report_dir:
+                # Given
+                report_path = os.path.join(report_dir, 'report.jsonl')
+                stages = [Stage('double', _double, ['games']), Stage('quadruple', _double, ['double'])]
+                executor = DagExecutor(stages=stages, max_workers=max_workers,
+                                       instrumentation=Instrumentation(report_path=report_path))
+
+                # When
+                outputs = executor.run({'games': self.games})
+                report = read_report(report_path)
+
+                # Then
+                self.assertEqual(len(outputs['quadruple']), 4000)
+                self.assertListEqual(list(report['stage']), ['double', 'quadruple'])
+                self.assertListEqual(list(report['output_rows']), [2000, 4000])
@@ -0,0 +1,57 @@
+"""Class to test the prediction server."""
+import json
+import threading
+from unittest import TestCase
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pandas as pd
+
+from nba_odds.application.prediction_server import build_server
+
+
+class FakePredictor:
+    """Predictor returning the elo divided by 2000 as probability."""
+    columns = pd.Index(['elo'])
+
+    @staticmethod
+    def predict_odds(features_df):
+        if 'elo' not in features_df.columns:
+            raise ValueError("Missing features columns : ['elo'].")
+        return features_df[['id']].assign(predictions=features_df['elo'] / 2000, odds=2000 / features_df['elo'])
+
+
+class TestPredictionServer(TestCase):
+    """Class to test the prediction server."""
+
+    def setUp(self):
+        self.server = build_server({'preseason_lr': FakePredictor()}, port=0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _post(self, path, rows):
+        request = Request(self.url + path, data=json.dumps(rows).encode(), method='POST')
+        with urlopen(request) as response:
+            return json.loads(response.read())
+
+    def test_predict(self):
+        # When
+        actual = self._post('/predict/preseason_lr', [{'id': 'BOS', 'elo': 1000}, {'id': 'LAL', 'elo': 1600}])
+
+        # Then
+        self.assertListEqual(actual, [{'id': 'BOS', 'predictions': 0.5, 'odds': 2.0},
+                                      {'id': 'LAL', 'predictions': 0.8, 'odds': 1.25}])
+
+    def test_predict_errors(self):
+        for path, rows, expected_status in (('/predict/unknown', [], 404),
+                                            ('/predict/preseason_lr', [{'id': 'BOS'}], 400),
+                                            ('/predict/preseason_lr', {'id': 'BOS', 'elo': 1000}, 400),
+                                            ('/predict/preseason_lr', [1000, 1600], 400),
+                                            ('/predict/preseason_lr', 'BOS', 400)):
+            with self.assertRaises(HTTPError) as context:
+                self._post(path, rows)
+            self.assertEqual(context.exception.code, expected_status)
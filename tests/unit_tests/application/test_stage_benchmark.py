@@ -0,0 +1,75 @@
+"""Class to test StageBenchmark class."""
+import json
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from nba_odds.application.stage_benchmark import StageBenchmark
+from nba_odds.application.synthetic_data import SyntheticData
+from nba_odds.config.config import Paths
+from nba_odds.preprocessing.split_on_playoffs import SplitPlayoff
+
+
+class TestStageBenchmark(TestCase):
+    """Class to test StageBenchmark class."""
+
+    def test_run_measures_every_stage(self):
+        # Given
+        scales_params = {'tiny': {'first_season': 2009, 'last_season': 2018, 'nb_teams': 8, 'nb_games_per_team': 14,
+                                  'nb_playoff_teams': 4, 'nb_players_per_game': 6}}
+
+        # When
+        with tempfile.TemporaryDirectory() as model_params_dir, \
+                patch.object(Paths, 'model_params_dir', model_params_dir), \
+                patch.object(StageBenchmark, 'scales_params', scales_params):
+            # parameters saved by a search are not used by the benchmark
+            for model_name, params in (('preseason_lr', {'class__C': -1.0}), ('playoff_lr', {'n_estimators': -1})):
+                with open(os.path.join(model_params_dir, f'{model_name}_params.json'), 'w') as params_file:
+                    json.dump({'params': params}, params_file)
+            results = StageBenchmark(scales=['tiny'], repeat=1).run()
+            restored_params_dir = Paths.model_params_dir
+
+        # Then
+        stages = results['scales']['tiny']['stages']
+        self.assertEqual(restored_params_dir, model_params_dir)
+        self.assertIn('GamesPerTeam.build_dataset', stages)
+        self.assertIn('ModelBuilder.build', stages)
+        self.assertTrue(all(measures['time'] > 0 and measures['peak_memory'] > 0 for measures in stages.values()))
+        self.assertEqual(stages['Labels.compute_winner_by_season']['rows'], 10)
+
+    def test_scales_are_split_on_playoffs_as_real_seasons(self):
+        # Given
+        regular_season_lines = SplitPlayoff.nb_teams_after_2004 * SplitPlayoff.nb_games_per_team_regular
+
+        # When
+        scales_data = {scale: SyntheticData(**params) for scale, params in StageBenchmark.scales_params.items()}
+
+        # Then
+        self.assertGreater(len({(data.nb_teams, data.nb_games_per_team, data.nb_players_per_game)
+                                for data in scales_data.values()}), 2)
+        for scale, data in scales_data.items():
+            self.assertGreaterEqual(data.first_season, 2004, scale)
+            self.assertEqual(data.nb_teams * data.nb_games_per_team, regular_season_lines, scale)
+
+    def test_compare_flags_slower_stages(self):
+        # Given
+        baseline = {'scales': {'small': {'stages': {
+            'EloRating.compute': {'time': 1.0, 'peak_memory': 100},
+            'PER.compute_per_by_game': {'time': 0.001, 'peak_memory': 100},
+            'GamesPerTeam.build_dataset': {'time': 1.0, 'peak_memory': 100},
+        }}}}
+        results = {'scales': {'small': {'stages': {
+            'EloRating.compute': {'time': 1.5, 'peak_memory': 100},
+            'PER.compute_per_by_game': {'time': 0.005, 'peak_memory': 200},
+            'GamesPerTeam.build_dataset': {'time': 1.1, 'peak_memory': 90},
+            'ModelBuilder.build': {'time': 3.0, 'peak_memory': 100},
+        }}}}
+
+        # When
+        regressions = StageBenchmark.compare(results, baseline, tolerance=0.2, min_time=0.01)
+
+        # Then
+        self.assertListEqual([(regression['stage'], regression['metric']) for regression in regressions],
+                             [('EloRating.compute', 'time'), ('PER.compute_per_by_game', 'peak_memory')])
+        self.assertAlmostEqual(regressions[0]['ratio'], 1.5)
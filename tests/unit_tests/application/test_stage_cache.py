@@ -0,0 +1,68 @@
+"""Class to test StageCache class."""
+import tempfile
+from unittest import TestCase
+
+import pandas as pd
+
+from nba_odds.application.stage_cache import StageCache
+
+
+class TestStageCache(TestCase):
+    """Class to test StageCache class."""
+
+    def setUp(self):
+        self.calls = []
+        self.games = pd.DataFrame({'id': [1, 2, 3], 'points': [100, 90, 110]})
+
+    def _add_one(self, df, step):
+        self.calls.append(step)
+        return df.assign(points=df['points'] + 1), df.assign(points=df['points'] - 1)
+
+    def test_run(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            # When
+            first_run = StageCache(cache_dir=cache_dir).run('add', self._add_one, inputs=[self.games, 'first'])
+            second_run = StageCache(cache_dir=cache_dir).run('add', self._add_one, inputs=[self.games, 'first'])
+            StageCache(cache_dir=cache_dir).run('add', self._add_one, inputs=[self.games, 'first'], params={'a': 1})
+            StageCache(cache_dir=cache_dir, refresh=['add']).run('add', self._add_one, inputs=[self.games, 'first'])
+
+        # Then
+        self.assertListEqual(self.calls, ['first', 'first', 'first'])
+        for first_output, second_output in zip(first_run, second_run):
+            pd.testing.assert_frame_equal(first_output, second_output)
+
+    def test_run_evicts_least_recently_used(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            # Given
+            cache = StageCache(cache_dir=cache_dir)
+            cache.run('add', self._add_one, inputs=[self.games, 'first'])
+            cache.max_size_bytes = 1
+
+            # When
+            cache.run('add', self._add_one, inputs=[self.games, 'second'])
+            cache.run('add', self._add_one, inputs=[self.games, 'second'])
+            cache.run('add', self._add_one, inputs=[self.games, 'first'])
+
+        # Then
+        self.assertListEqual(self.calls, ['first', 'second', 'first'])
+
+    def test_run_misses_when_the_stage_code_changes(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            # Given
+            def add_one(df, step):
+                self.calls.append(step)
+                return df.assign(points=df['points'] + 1)
+
+            def add_two(df, step):  # new definition of the same stage
+                self.calls.append(step)
+                return df.assign(points=df['points'] + 2)
+
+            StageCache(cache_dir=cache_dir).run('add', add_one, inputs=[self.games, 'first'])
+
+            # When
+            outputs = StageCache(cache_dir=cache_dir).run('add', add_two, inputs=[self.games, 'first'])
+            StageCache(cache_dir=cache_dir).run('add', add_two, inputs=[self.games, 'first'])
+
+        # Then
+        self.assertListEqual(self.calls, ['first', 'first'])
+        self.assertListEqual(list(outputs['points']), [102, 92, 112])
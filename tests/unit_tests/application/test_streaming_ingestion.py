@@ -0,0 +1,103 @@
+"""Class to test StreamingIngestion class."""
+import asyncio
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from nba_odds.application.streaming_ingestion import StreamingIngestion
+from nba_odds.config.config import BoxScoreRawSchema, GamesRawSchema
+from nba_odds.features.elo_rating import EloRating
+from nba_odds.features.player_efficiency_rating import PER
+from nba_odds.features.teams_stats import TeamsStats
+from nba_odds.preprocessing.games_per_team import GamesPerTeam
+from nba_odds.preprocessing.players_data import PlayersData
+
+
+def build_raw_data(nb_days=12, nb_teams=6, nb_players=4, seed=0):
+    """ Raw games and box scores of one season, every team playing once a day."""
+    rng = np.random.default_rng(seed)
+    games, box_score = [], []
+    for day in range(nb_days):
+        teams = rng.permutation(nb_teams)
+        for home, away in zip(teams[::2], teams[1::2]):
+            game = {GamesRawSchema.date_col: f'2018-11-{day + 1:02d}', GamesRawSchema.season: 2018,
+                    GamesRawSchema.game_id: f'{day}_{home}', GamesRawSchema.home: f'T{home}',
+                    GamesRawSchema.away: f'T{away}'}
+            game.update({column: int(rng.integers(15, 35)) for column in GamesRawSchema.quarter_points})
+            game.update({column: np.nan for column in GamesRawSchema.overtime_points})
+            game.update({column: f'{rng.uniform(0, 100):.3f}'.replace('.', ',')
+                         for column in GamesRawSchema.decimal_columns})
+            game.update({column: int(rng.integers(60, 130)) for column in GamesRawSchema.other_stats})
+            game[GamesRawSchema.ylabel] = int(sum(game[f'home{q}'] for q in range(1, 5))
+                                              > sum(game[f'away{q}'] for q in range(1, 5)))
+            games.append(game)
+            for team in (home, away):
+                for player in range(nb_players):
+                    line = {BoxScoreRawSchema.game_id: game[GamesRawSchema.game_id],
+                            BoxScoreRawSchema.player_id: f'p{team}_{player}',
+                            BoxScoreRawSchema.mp: f'{rng.uniform(15, 45):.2f}'.replace('.', ',')}
+                    line.update({column: int(rng.integers(0, 10)) for column in BoxScoreRawSchema.stats})
+                    box_score.append(line)
+    return pd.DataFrame(games), pd.DataFrame(box_score)
+
+
+class TestStreamingIngestion(TestCase):
+    """Class to test StreamingIngestion class."""
+
+    def setUp(self):
+        self.games, self.box_score = build_raw_data()
+
+    def _batch_features(self):
+        games_per_team = GamesPerTeam(basket_ref_games=self.games.copy()).build_dataset()
+        teams_stats = TeamsStats(games_per_team=games_per_team.copy()).compute_aggregated_features()
+        players_stats, players_team = PlayersData(games_per_team=games_per_team,
+                                                  basket_ref_box_score=self.box_score.copy()).build_data()
+        per = PER(players_stats=players_stats, players_team=players_team).preplayoff_season_per()
+        with tempfile.TemporaryDirectory() as checkpoint_dir:  # elo after the last game, from the checkpoint
+            elo_rating = EloRating(basket_ref_games=None, checkpoint_dir=checkpoint_dir)
+            elo_rating.update(new_games=self.games.copy())
+            elo = pd.read_parquet(os.path.join(checkpoint_dir, elo_rating.teams_state_filename))
+        features = pd.merge(teams_stats, elo, on=['id', 'season'], how='left')
+        return pd.merge(features, per, on=['id', 'season'], how='left')
+
+    @staticmethod
+    def _sorted(features):
+        return features.sort_values(by=['id', 'season']).reset_index(drop=True)
+
+    def test_features_are_the_same_in_one_batch_and_in_several_batches(self):
+        # Given
+        expected_features = self._sorted(self._batch_features())
+        days = self.games[GamesRawSchema.date_col]
+        ingestion = StreamingIngestion()
+
+        # When
+        for day_batch in np.array_split(np.sort(days.unique()), 4):
+            games = self.games[days.isin(day_batch)]
+            ingestion.add_games(games)
+            ingestion.add_box_score(self.box_score[self.box_score[BoxScoreRawSchema.game_id]
+                                                   .isin(games[GamesRawSchema.game_id])])
+        actual_features = self._sorted(ingestion.features(phase=None))
+
+        # Then
+        pd.testing.assert_frame_equal(actual_features, expected_features[actual_features.columns],
+                                      check_dtype=False)
+
+    def test_box_score_before_its_game_is_applied_when_the_game_arrives(self):
+        # Given
+        ingestion = StreamingIngestion()
+        queue = asyncio.Queue()
+        for item in [('box_score', self.box_score), ('games', self.games), None]:
+            queue.put_nowait(item)
+
+        # When
+        asyncio.run(ingestion.run(queue))
+
+        # Then
+        actual_features = self._sorted(ingestion.features(phase=None))
+        expected_features = self._sorted(self._batch_features())
+        self.assertCountEqual(actual_features.columns, expected_features.columns)
+        pd.testing.assert_frame_equal(actual_features, expected_features[actual_features.columns],
+                                      check_dtype=False)
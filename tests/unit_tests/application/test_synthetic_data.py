@@ -0,0 +1,62 @@
+"""Class to test SyntheticData class."""
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from nba_odds.application.synthetic_data import SyntheticData
+from nba_odds.config.config import BoxScoreRawSchema, GamesRawSchema, ProcessedSchema
+from nba_odds.preprocessing.games_per_team import GamesPerTeam
+from nba_odds.preprocessing.labels import Labels
+from nba_odds.preprocessing.raw_data_loader import RawDataLoader
+
+
+class TestSyntheticData(TestCase):
+    """Class to test SyntheticData class."""
+
+    def test_write_raw_data_read_by_the_pipeline(self):
+        # Given
+        synthetic_data = SyntheticData(first_season=2017, last_season=2018, nb_teams=30, nb_games_per_team=82,
+                                       nb_playoff_teams=16, nb_players_per_game=8)
+
+        # When
+        with tempfile.TemporaryDirectory() as data_dir:
+            path_games, path_box_score = synthetic_data.write(data_dir)
+            loader = RawDataLoader(path_basket_ref_games=path_games, path_basket_ref_box_score=path_box_score)
+            games, box_score = loader.load_games(), loader.load_box_score()
+            self.assertListEqual(sorted(os.listdir(data_dir)), ['BasketrefBoxscores.parquet', 'BasketrefGames.parquet'])
+
+        # Then
+        self.assertListEqual(list(games.columns), GamesRawSchema.columns)
+        self.assertListEqual(list(box_score.columns), BoxScoreRawSchema.columns)
+        self.assertTrue(games[GamesRawSchema.game_id].is_unique)
+        self.assertEqual(len(box_score), 2 * 8 * len(games))
+
+        home_points = games[GamesRawSchema.quarter_points[:4]].sum(axis=1) + games['home1_ot'].fillna(0)
+        away_points = games[GamesRawSchema.quarter_points[4:]].sum(axis=1) + games['away1_ot'].fillna(0)
+        np.testing.assert_array_equal((home_points > away_points).astype(int), games[GamesRawSchema.ylabel])
+
+        phases = GamesPerTeam(basket_ref_games=games.copy()).build_dataset().groupby(
+            [GamesRawSchema.season, ProcessedSchema.phase]).size()
+        self.assertEqual(phases[(2018, ProcessedSchema.regular_season)], 30 * 82)
+        # 15 series of 4 to 7 games
+        self.assertTrue(15 * 4 * 2 <= phases[(2018, ProcessedSchema.playoff)] <= 15 * 7 * 2)
+
+        winners = Labels(basket_ref_games=games.copy()).compute_winner_by_season()
+        finals = games[games[GamesRawSchema.date_col] == games[GamesRawSchema.date_col].max()]
+        self.assertIn(winners.set_index(GamesRawSchema.season)[ProcessedSchema.won][2018],
+                      set(finals[[GamesRawSchema.home, GamesRawSchema.away]].values.ravel()))
+
+    def test_same_seed_gives_same_data(self):
+        # Given
+        params = {'first_season': 2018, 'last_season': 2018, 'nb_teams': 8, 'nb_games_per_team': 10,
+                  'nb_playoff_teams': 4, 'seed': 3}
+
+        # When
+        games, box_score = SyntheticData(**params).build()
+        other_games, other_box_score = SyntheticData(**params).build()
+
+        # Then
+        self.assertTrue(games.equals(other_games))
+        self.assertTrue(box_score.equals(other_box_score))
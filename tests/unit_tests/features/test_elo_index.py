@@ -0,0 +1,75 @@
+"""Class to test EloIndex class."""
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from nba_odds.config.params import EloParams
+from nba_odds.features.elo_index import EloIndex
+from nba_odds.features.elo_rating import EloRating
+
+
+class TestEloIndex(TestCase):
+    """Class to test EloIndex class."""
+
+    def setUp(self):
+        teams_elo_df = pd.DataFrame(
+            {'game_id': ['1', '1', '2', '2', '3', '3'],
+             'id': [5, 7, 7, 6, 5, 6],
+             'elo': [1500.0, 1500.0, 1510.0, 1500.0, 1490.0, 1495.0],
+             'elo_after': [1490.0, 1510.0, 1515.0, 1495.0, 1500.0, 1485.0],
+             'date': pd.to_datetime(['2020-01-01', '2020-01-01', '2020-01-03', '2020-01-03',
+                                     '2020-01-05', '2020-01-05']),
+             'season': [2020] * 6}
+        )
+        self.elo_index = EloIndex(teams_elo_df=teams_elo_df)
+
+    def test_as_of_many(self):
+        # When
+        actual_backward = self.elo_index.as_of_many(teams=[5, 5, 5, 7, 8], dates=['2019-12-31', '2020-01-01',
+                                                                                 '2020-01-04', '2020-01-10',
+                                                                                 '2020-01-04'])
+        actual_forward = self.elo_index.as_of_many(teams=[5, 5, 7], dates=['2020-01-02', '2020-01-05', '2020-01-04'],
+                                                   direction='forward')
+
+        # Then
+        np.testing.assert_array_equal(actual_backward, [np.nan, 1490.0, 1490.0, 1515.0, np.nan])
+        np.testing.assert_array_equal(actual_forward, [1490.0, 1490.0, np.nan])
+
+    def test_ratings_on(self):
+        # When
+        actual = self.elo_index.ratings_on(dates=['2020-01-02', '2020-01-06'])
+
+        # Then
+        expected = pd.DataFrame([[1490.0, np.nan, 1510.0], [1500.0, 1485.0, 1515.0]],
+                                index=pd.DatetimeIndex(['2020-01-02', '2020-01-06'], name='date'),
+                                columns=pd.Index([5, 6, 7], name='id'))
+        pd.testing.assert_frame_equal(actual, expected)
+
+    def test_as_of_includes_the_games_of_the_date(self):
+        # Given
+        games_stat = pd.DataFrame(
+            {'datetime': pd.to_datetime(['2020-01-01', '2020-01-01', '2020-01-03', '2020-01-06']),
+             'game_id': ['123', '124', '125', '126'],
+             'season': [2020] * 4,
+             'home_id': [5, 6, 7, 7],
+             'away_id': [7, 8, 6, 5],
+             'home_points': [20, 90, 95, 100],
+             'away_points': [100, 85, 95, 10],
+             'ylabel': [0, 1, 0, 1]}
+        )
+        teams_elo_df = EloRating(basket_ref_games=None)._calculate_elo_ratings(games_stat)
+        elo_index = EloIndex(teams_elo_df=teams_elo_df)
+
+        # When
+        actual_on_game_date = elo_index.as_of_many(teams=[5, 7, 6], dates=['2020-01-01', '2020-01-03', '2020-01-03'])
+        actual_after_game_date = elo_index.as_of_many(teams=[5, 7], dates=['2020-01-02', '2020-01-04'])
+
+        # Then
+        # the rating after a game is the rating the team has before its next game of the season
+        next_game_elo = elo_index.as_of_many(teams=[5, 7, 6], dates=['2020-01-02', '2020-01-04', '2020-01-02'],
+                                             direction='forward')
+        np.testing.assert_array_equal(actual_on_game_date[:2], next_game_elo[:2])
+        np.testing.assert_array_equal(actual_after_game_date, next_game_elo[:2])
+        self.assertNotEqual(actual_on_game_date[2], next_game_elo[2])  # 6 played on 2020-01-03, after 2020-01-02
+        self.assertLess(actual_on_game_date[0], EloParams.initial_elo)  # 5 lost its first game at home
@@ -1,8 +1,13 @@
 """ Class to test Elo rating."""
 import math
-from unittest import TestCase
+import os
+import tempfile
+from unittest import TestCase, mock
+
+import numpy as np
 import pandas as pd
 
+from nba_odds.config.params import EloParams
 from nba_odds.features.elo_rating import EloRating
 
 
@@ -42,13 +47,125 @@ class TestEloRating(TestCase):
         home_updated_after_season = (0.75 * updated_home_elo) + (0.25 * 1505)
         away_updated_after_season = (0.75 * updated_away_elo) + (0.25 * 1505)
 
+        # second game, team 7 at home wins
+        h = math.pow(10, away_updated_after_season / 400)
+        r = math.pow(10, home_updated_after_season / 400)
+        denom = r + a * h
+        elo_diff = away_updated_after_season - home_updated_after_season
+        k = 20 * (90 + 3) ** 0.8 / (7.5 + 0.006 * elo_diff)
+        second_home_elo = away_updated_after_season + k * (1 - a * h / denom)
+        second_away_elo = home_updated_after_season + k * (0 - r / denom)
+
         expected_elo_rating = pd.DataFrame(
             {'date': ['2020-01-01', '2020-01-01', '2021-04-01', '2021-04-01'],
              'game_id': ['123', '123', '456', '456'],
              'season': ['2020', '2020', '2021', '2021'],
              'id': [5, 7, 7, 5],
-             'elo': [1500, 1500, away_updated_after_season, home_updated_after_season]
+             'elo': [1500, 1500, away_updated_after_season, home_updated_after_season],
+             'elo_after': [updated_home_elo, updated_away_elo, second_home_elo, second_away_elo]
              }
         )
         pd.testing.assert_frame_equal(actual_elo_ratings.sort_index(axis=1),
                                       expected_elo_rating.sort_index(axis=1), check_dtype=False)
+
+    def test__calculate_elo_ratings_matches_row_wise_implementation(self):
+        # Given
+        rng = np.random.default_rng(0)
+        nb_games = 300
+        teams = rng.permuted(np.tile(np.arange(8), (nb_games // 4, 1)), axis=1).reshape(-1, 2)
+        games_stat = pd.DataFrame(
+            {'datetime': pd.to_datetime('2015-10-01') + pd.to_timedelta(np.arange(nb_games) // 4, unit='D'),
+             'game_id': [str(i) for i in range(nb_games)],
+             'season': 2016 + np.arange(nb_games) // 100,
+             'home_id': teams[:nb_games, 0],
+             'away_id': teams[:nb_games, 1],
+             'home_points': rng.integers(80, 130, nb_games),
+             'away_points': rng.integers(80, 130, nb_games)}
+        )
+        games_stat['ylabel'] = (games_stat['home_points'] > games_stat['away_points']).astype(int)
+
+        # When
+        actual_elo_ratings = (EloRating(basket_ref_games=None)
+                              ._calculate_elo_ratings(games_with_total_pts=games_stat))
+
+        # Then
+        expected_elo_ratings = _row_wise_elo_ratings(games_stat)
+        pd.testing.assert_frame_equal(actual_elo_ratings, expected_elo_ratings, check_dtype=False)
+
+
+    def test_update(self):
+        # Given
+        basket_ref_games = pd.DataFrame(
+            {'datetime': ['2020-01-01', '2020-01-03', '2020-01-05', '2021-04-01', '2021-04-03'],
+             'game_id': ['123', '124', '125', '456', '457'],
+             'season': [2020, 2020, 2020, 2021, 2021],
+             'home_id': [5, 6, 7, 7, 6],
+             'away_id': [7, 5, 6, 5, 7],
+             'ylabel': [0, 1, 0, 1, 1]}
+        )
+        for team in ('home', 'away'):
+            for quarter in ('1', '2', '3', '4'):
+                basket_ref_games[team + quarter] = 20
+                basket_ref_games[team + quarter + '_ot'] = None
+        basket_ref_games['home1'] = [10, 35, 15, 40, 30]
+        corrected_games = basket_ref_games.copy()
+        corrected_games.loc[1, ['home1', 'ylabel']] = [5, 0]
+        encoded_games = corrected_games.assign(game_id=np.arange(5, dtype='int32'))
+
+        with tempfile.TemporaryDirectory() as checkpoint_dir:
+            # When
+            EloRating(basket_ref_games=basket_ref_games.copy(), checkpoint_dir=checkpoint_dir).compute()
+            files_after_compute = os.listdir(checkpoint_dir)
+            EloRating(basket_ref_games=None, checkpoint_dir=checkpoint_dir).update(
+                new_games=basket_ref_games.iloc[:3].copy())
+            actual_new_games = EloRating(basket_ref_games=None, checkpoint_dir=checkpoint_dir).update(
+                new_games=basket_ref_games.copy())
+            actual_corrected_games = EloRating(basket_ref_games=None, checkpoint_dir=checkpoint_dir).update(
+                new_games=corrected_games.copy())
+            actual_encoded_games = EloRating(basket_ref_games=None, checkpoint_dir=checkpoint_dir).update(
+                new_games=encoded_games.copy())
+            with mock.patch.object(EloParams, 'k', 40):
+                actual_new_params = EloRating(basket_ref_games=None, checkpoint_dir=checkpoint_dir).update(
+                    new_games=encoded_games.copy())
+                expected_new_params = EloRating(basket_ref_games=encoded_games.copy()).compute()
+
+        # Then
+        pd.testing.assert_frame_equal(actual_new_games,
+                                      EloRating(basket_ref_games=basket_ref_games.copy()).compute())
+        pd.testing.assert_frame_equal(actual_corrected_games,
+                                      EloRating(basket_ref_games=corrected_games.copy()).compute())
+        pd.testing.assert_frame_equal(actual_encoded_games,
+                                      EloRating(basket_ref_games=encoded_games.copy()).compute())
+        pd.testing.assert_frame_equal(actual_new_params, expected_new_params)
+        self.assertFalse(actual_new_params['elo'].equals(actual_encoded_games['elo']))
+        self.assertListEqual(files_after_compute, [])
+
+
+def _row_wise_elo_ratings(games_stat):
+    """ Previous implementation, looking for the previous game of each team in the whole history."""
+    elo_rating = EloRating(basket_ref_games=None)
+    team_stats = games_stat.sort_values(by='datetime').reset_index(drop=True)
+    elo_after = {}
+    teams_rows = []
+    for _, row in team_stats.iterrows():
+        elo_before = []
+        for team in (row['home_id'], row['away_id']):
+            previous_games = team_stats[(team_stats['datetime'] < row['datetime']) &
+                                        ((team_stats['home_id'] == team) | (team_stats['away_id'] == team))]
+            if previous_games.empty:
+                elo_before.append(1500.0)
+                continue
+            prev_game = previous_games.sort_values(by='datetime').iloc[-1]
+            elo = elo_after[(prev_game['game_id'], team)]
+            elo_before.append((0.75 * elo) + (0.25 * 1505) if prev_game['season'] != row['season'] else elo)
+
+        h_elo_after, a_elo_after = elo_rating._update_elo(
+            home_score=row['home_points'], away_score=row['away_points'],
+            home_elo=elo_before[0], away_elo=elo_before[1], ylabel=row['ylabel'])
+        elo_after[(row['game_id'], row['home_id'])] = h_elo_after
+        elo_after[(row['game_id'], row['away_id'])] = a_elo_after
+        for team, elo in zip((row['home_id'], row['away_id']), elo_before):
+            teams_rows.append({'game_id': row['game_id'], 'id': team, 'elo': elo,
+                               'elo_after': elo_after[(row['game_id'], team)],
+                               'date': row['datetime'], 'season': row['season']})
+    return pd.DataFrame(teams_rows, columns=['game_id', 'id', 'elo', 'elo_after', 'date', 'season'])
@@ -0,0 +1,42 @@
+"""Class to test EloSweep class."""
+from unittest import TestCase, mock
+
+import pandas as pd
+
+from nba_odds.config.params import EloParams
+from nba_odds.features.elo_rating import EloRating
+from nba_odds.features.elo_sweep import EloSweep
+
+
+class TestEloSweep(TestCase):
+    """Class to test EloSweep class."""
+
+    def test__calculate_elo_ratings(self):
+        # Given
+        games_stat = pd.DataFrame(
+            {'datetime': pd.to_datetime(['2020-01-01', '2020-01-01', '2020-01-03', '2021-04-01']),
+             'game_id': ['123', '124', '125', '456'],
+             'season': [2020, 2020, 2020, 2021],
+             'home_id': [5, 6, 7, 7],
+             'away_id': [7, 8, 6, 5],
+             'home_points': [20, 90, 95, 100],
+             'away_points': [100, 85, 95, 10],
+             'ylabel': [0, 1, 0, 1]}
+        )
+        param_grid = [{'k': [20]}, {'k': [10, 30], 'home_court_advantage': [0, 50], 'season_carry_over': [0.5]}]
+
+        # When
+        elo_sweep = EloSweep(basket_ref_games=None, param_grid=param_grid)
+        actual = elo_sweep._calculate_elo_ratings(games_with_total_pts=games_stat)
+
+        # Then
+        self.assertEqual(actual['param_set'].nunique(), 5)
+        for param_set, params in elo_sweep.parameter_sets.iterrows():
+            with mock.patch.multiple(EloParams, **params.to_dict()):
+                expected = EloRating(basket_ref_games=None)._calculate_elo_ratings(games_stat)
+            pd.testing.assert_frame_equal(
+                actual.query(f'param_set == {param_set}').drop(columns='param_set').reset_index(drop=True),
+                expected
+            )
+        with self.assertRaises(ValueError):
+            _ = EloSweep(basket_ref_games=None, param_grid={'K': [10]}).parameter_sets
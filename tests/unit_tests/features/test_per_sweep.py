@@ -0,0 +1,77 @@
+"""Class to test PerSweep class."""
+from unittest import TestCase, mock
+
+import numpy as np
+import pandas as pd
+
+from nba_odds.config.params import PerParams
+from nba_odds.features.per_sweep import PerSweep
+from nba_odds.features.player_efficiency_rating import PER
+
+BOX_SCORE_COLUMNS = ['fg', 'stl', '_3p', 'ft', 'blk', 'orb', 'ast', 'drb', 'pf', 'fta', 'fga', 'tov']
+
+
+def _players_data(nb_players=12, nb_games=15, seasons=(2017, 2018)):
+    random = np.random.RandomState(0)
+    players_stats = pd.DataFrame(
+        [{'game_id': f'{season}_{game}', 'player_id': f'p{player}', 'season': season}
+         for season in seasons for game in range(nb_games) for player in range(nb_players)]
+    )
+    players_stats['mp'] = random.uniform(0, 40, len(players_stats))
+    for column in BOX_SCORE_COLUMNS:
+        players_stats[column] = random.randint(0, 10, len(players_stats))
+    players_team = pd.DataFrame(
+        [{'player_id': f'p{player}', 'season': season, 'id': f't{player % 3}'}
+         for season in list(seasons) + [seasons[-1] + 1] for player in range(nb_players)]
+    )
+    return players_stats, players_team
+
+
+def _sorted_by_team(per):
+    return per.drop(columns='param_set', errors='ignore').sort_values(['season', 'id']).reset_index(drop=True)
+
+
+class TestPerSweep(TestCase):
+    """Class to test PerSweep class."""
+
+    def test_previous_season_per(self):
+        # Given
+        players_stats, players_team = _players_data()
+        param_grid = [{'min_mp': [PerParams.min_mp]},
+                      {'min_mp': [15], 'min_sum_mp': [100, 250], 'min_games_played': [3],
+                       'good_player_per_threshold': [0.5]}]
+
+        # When
+        per_sweep = PerSweep(players_stats=players_stats, players_team=players_team, param_grid=param_grid)
+        actual = per_sweep.previous_season_per()
+
+        # Then
+        self.assertEqual(actual['param_set'].nunique(), 3)
+        self.assertEqual(list(per_sweep.parameter_sets.loc[2]), [15, 250, 3, 0.5])
+        pd.testing.assert_frame_equal(
+            _sorted_by_team(actual.query('param_set == 0')),
+            _sorted_by_team(PER(players_stats, players_team).previous_season_per())
+        )
+        with mock.patch.multiple(PerParams, min_mp=15, min_sum_mp=250, min_games_played=3,
+                                 good_player_per_threshold=0.5):
+            expected = PER(players_stats, players_team).previous_season_per()
+        pd.testing.assert_frame_equal(_sorted_by_team(actual.query('param_set == 2')), _sorted_by_team(expected))
+        with self.assertRaises(ValueError):
+            _ = PerSweep(players_stats=players_stats, players_team=players_team,
+                         param_grid={'min_minutes': [15]}).parameter_sets
+
+    def test_preplayoff_season_per(self):
+        # Given
+        players_stats, players_team = _players_data()
+        param_grid = {'min_games_played': [5, 20]}
+
+        # When
+        actual = PerSweep(players_stats=players_stats, players_team=players_team,
+                          param_grid=param_grid).preplayoff_season_per()
+
+        # Then
+        with mock.patch.object(PerParams, 'min_games_played', 5):
+            expected = PER(players_stats, players_team).preplayoff_season_per()
+        pd.testing.assert_frame_equal(_sorted_by_team(actual.query('param_set == 0')), _sorted_by_team(expected))
+        # no player plays more than 15 games a season
+        self.assertTrue(actual.query('param_set == 1').empty)
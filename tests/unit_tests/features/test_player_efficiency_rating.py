@@ -0,0 +1,40 @@
+"""Class to test PER class."""
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from nba_odds.features.player_efficiency_rating import PER
+
+
+class TestPER(TestCase):
+    """Class to test PER class."""
+
+    def test_compute_per_by_game(self):
+        # Given
+        players_stats = pd.DataFrame(
+            {'game_id': ['123', '123', '456'],
+             'player_id': ['a', 'b', 'a'],
+             'season': [2020, 2020, 2020],
+             'mp': [30.5, 10.0, 25.0],
+             'fg': [5, 2, 8], 'stl': [1, 0, 2], '_3p': [2, 0, 1], 'ft': [3, 1, 0], 'blk': [0, 1, 1],
+             'orb': [2, 0, 1], 'ast': [4, 1, 6], 'drb': [5, 3, 2], 'pf': [3, 1, 2], 'fta': [4, 2, 1],
+             'fga': [12, 5, 15], 'tov': [2, 1, 3]}
+        )
+        players_stats_before = players_stats.copy()
+
+        # When
+        actual = PER.compute_per_by_game(players_stats)
+
+        # Then
+        def row_per(x):
+            return (85.910 * x['fg'] + 53.897 * x['stl'] + 51.757 * x['_3p'] + 46.864 * x['ft'] +
+                    39.190 * x['blk'] + 39.190 * x['orb'] + 34.677 * x['ast'] + 14.707 * x['drb']
+                    - x['pf'] * 17.174 - (x['fta'] - x['ft']) * 20.091 - (x['fga'] - x['fg']) * 39.190
+                    - x['tov'] * 53.897) * (1 / x['mp'])
+
+        expected = players_stats[['player_id', 'season', 'game_id', 'mp']].assign(
+            PER=[row_per(players_stats.iloc[0]), np.nan, row_per(players_stats.iloc[2])]
+        )
+        pd.testing.assert_frame_equal(actual, expected)
+        pd.testing.assert_frame_equal(players_stats, players_stats_before)
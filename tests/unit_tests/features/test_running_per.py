@@ -0,0 +1,59 @@
+"""Class to test RunningPER class."""
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from nba_odds.features.player_efficiency_rating import PER
+from nba_odds.features.running_per import RunningPER
+from nba_odds.preprocessing.players_data import PlayersData
+
+
+class TestRunningPER(TestCase):
+    """Class to test RunningPER class."""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        nb_lines = 600
+        self.per_by_game = pd.DataFrame({
+            'player_id': rng.choice([f'p{player}' for player in range(12)], nb_lines),
+            'season': rng.choice([2017, 2018], nb_lines),
+            'game_id': np.arange(nb_lines) // 6,
+            'mp': rng.uniform(5, 45, nb_lines),
+            'PER': np.where(rng.uniform(size=nb_lines) < 0.1, np.nan, rng.normal(15, 5, nb_lines)),
+            'phase': np.where(np.arange(nb_lines) < 450, 'regular', 'playoff'),
+        })
+        # players change teams often, so that team counts are tied across batches
+        self.players_games_with_both_teams = self.per_by_game[['player_id', 'season', 'game_id', 'phase']].assign(
+            id=rng.choice(['A', 'B', 'C'], nb_lines)
+        )
+
+    def _expected_team_per(self, phase=None):
+        per_by_game, players_games = self.per_by_game, self.players_games_with_both_teams
+        if phase is not None:
+            per_by_game = per_by_game[per_by_game['phase'] == phase]
+            players_games = players_games[players_games['phase'] == phase]
+        players_team = PlayersData._build_players_team(players_games.reset_index(drop=True))
+        per = PER(players_stats=None, players_team=players_team, per_by_game=per_by_game)
+        return per.preplayoff_season_per(), players_team
+
+    def test_team_per_is_the_same_in_one_batch_and_in_several_batches(self):
+        # Given
+        running_per = RunningPER()
+
+        # When
+        for batch in np.array_split(np.arange(len(self.per_by_game)), 7):
+            running_per.add(self.per_by_game.iloc[batch], self.players_games_with_both_teams.iloc[batch])
+
+        # Then
+        self.assertFalse(running_per.is_empty)
+        self.assertTrue(RunningPER().is_empty)
+        for phase in running_per.phases:
+            expected_team_per, expected_players_team = self._expected_team_per(phase=phase)
+            actual_players_team = running_per.players_team(phase=phase).sort_values(['player_id', 'season'])
+            pd.testing.assert_frame_equal(actual_players_team.reset_index(drop=True), expected_players_team,
+                                          check_dtype=False)
+            actual_team_per = running_per.team_per(phase=phase).sort_values(['season', 'id'])
+            pd.testing.assert_frame_equal(actual_team_per.reset_index(drop=True),
+                                          expected_team_per.sort_values(['season', 'id']).reset_index(drop=True),
+                                          check_dtype=False)
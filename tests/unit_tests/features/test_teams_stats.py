@@ -0,0 +1,30 @@
+"""Class to test TeamsStats class."""
+from unittest import TestCase
+
+import pandas as pd
+
+from nba_odds.features.teams_stats import TeamsStats
+
+
+class TestTeamsStats(TestCase):
+    """Class to test TeamsStats class."""
+
+    def setUp(self):
+        self.games_per_team = pd.DataFrame({'id': ['A', 'B', 'A', 'B'], 'season': [2017, 2017, 2017, 2018]})
+        for column in TeamsStats.aggregations:
+            self.games_per_team[column] = [1.0, 2.0, 3.0, 4.0]
+        self.games_per_team['opp_points_before_ot'] = 0.0
+
+    def test_compute_aggregated_features_with_columns(self):
+        # When
+        actual = TeamsStats(games_per_team=self.games_per_team.copy(),
+                            columns=['goal_diff_mean', 'won_sum']).compute_aggregated_features()
+        actual_keys = TeamsStats(games_per_team=self.games_per_team.copy(), columns=[]).compute_aggregated_features()
+
+        # Then
+        expected = TeamsStats(games_per_team=self.games_per_team.copy()).compute_aggregated_features()
+        pd.testing.assert_frame_equal(actual, expected[['id', 'season', 'won_sum', 'goal_diff_mean']])
+        pd.testing.assert_frame_equal(actual_keys, expected[['id', 'season']])
+        self.assertListEqual(list(expected.columns), ['id', 'season'] + TeamsStats.feature_columns())
+        with self.assertRaises(ValueError):
+            TeamsStats(games_per_team=self.games_per_team, columns=['unknown']).compute_aggregated_features()
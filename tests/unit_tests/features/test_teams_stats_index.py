@@ -0,0 +1,72 @@
+"""Class to test TeamsStatsIndex class."""
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from nba_odds.features.teams_stats import TeamsStats
+from nba_odds.features.teams_stats_index import TeamsStatsIndex
+
+
+class TestTeamsStatsIndex(TestCase):
+    """Class to test TeamsStatsIndex class."""
+
+    def setUp(self):
+        nb_games = 8
+        self.games_per_team = pd.DataFrame({
+            'id': pd.Categorical(['A', 'B', 'A', 'B', 'B', 'A', 'A', 'B']),
+            'season': [2017, 2017, 2017, 2017, 2018, 2018, 2018, 2018],
+            'datetime': pd.to_datetime(['2017-01-01', '2017-01-01', '2017-01-03', '2017-01-05', '2017-11-01',
+                                        '2017-11-02', '2017-11-04', '2017-11-04']),
+            'points_before_ot': np.array([100, 90, 80, 110, 95, 105, 99, 101], dtype='int16'),
+            'opp_points_before_ot': np.array([90, 100, 85, 100, 90, 98, 101, 99], dtype='int16'),
+        })
+        for column in TeamsStats.aggregations:
+            if column not in self.games_per_team and column != 'goal_diff':
+                self.games_per_team[column] = np.arange(nb_games, dtype=float) + len(column)
+        self.games_per_team['won'] = (self.games_per_team['points_before_ot']
+                                      > self.games_per_team['opp_points_before_ot']).astype('int64')
+        self.games_per_team.loc[2, 'efg'] = np.nan
+        self.index = TeamsStatsIndex(games_per_team=self.games_per_team)
+
+    def test_as_of_many_at_season_end_is_the_season_aggregates(self):
+        # Given
+        expected = TeamsStats(games_per_team=self.games_per_team.copy()).compute_aggregated_features()
+
+        # When
+        actual = self.index.as_of_many(teams=expected['id'], dates=['2017-06-01', '2018-06-01', '2017-06-01',
+                                                                    '2018-06-01'])
+
+        # Then
+        pd.testing.assert_frame_equal(actual.drop(columns='datetime'), expected, check_categorical=False)
+
+    def test_as_of_many(self):
+        # When
+        actual = self.index.as_of_many(teams=['A', 'A', 'B', 'A', 'C'],
+                                       dates=['2016-12-31', '2017-01-02', '2017-11-01', '2017-11-03', '2017-11-03'])
+
+        # Then
+        np.testing.assert_array_equal(actual['season'], [np.nan, 2017, 2018, 2018, np.nan])
+        np.testing.assert_array_equal(actual['points_before_ot_sum'], [np.nan, 100, 95, 105, np.nan])
+        np.testing.assert_array_equal(actual['won_sum'], [np.nan, 1, 1, 1, np.nan])
+
+    def test_features_on(self):
+        # When
+        actual = self.index.features_on(dates=['2017-01-02', '2017-01-04'])
+
+        # Then
+        self.assertListEqual(list(actual['id']), ['A', 'B', 'A', 'B'])
+        self.assertListEqual(list(actual['points_before_ot_sum']), [100, 90, 180, 90])
+        self.assertListEqual(list(actual['goal_diff_mean']), [10.0, -10.0, 2.5, -10.0])
+        self.assertEqual(actual['points_before_ot_sum'].dtype, 'int16')
+
+    def test_after_games(self):
+        # When
+        actual = self.index.after_games(nb_games=2)
+
+        # Then
+        self.assertListEqual(list(actual['id']), ['A', 'A', 'B', 'B'])
+        self.assertListEqual(list(actual['season']), [2017, 2018, 2017, 2018])
+        self.assertListEqual(list(actual['datetime']), list(pd.to_datetime(['2017-01-03', '2017-11-04',
+                                                                           '2017-01-05', '2017-11-04'])))
+        self.assertListEqual(list(actual['points_before_ot_sum']), [180, 204, 200, 196])
@@ -0,0 +1,70 @@
+"""Class to test HyperparameterSearch class."""
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+
+from nba_odds.model.hyperparameter_search import HyperparameterSearch
+
+
+class TestHyperparameterSearch(TestCase):
+    """Class to test HyperparameterSearch class."""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        seasons = np.repeat(np.arange(2010, 2016), 10)
+        elo = rng.normal(1500, 50, len(seasons))
+        won = np.zeros(len(seasons), dtype=bool)
+        for season in np.unique(seasons):
+            won[np.flatnonzero(seasons == season)[np.argmax(elo[seasons == season])]] = True
+        self.dataset = pd.DataFrame({'id': np.tile([f'T{i}' for i in range(10)], 6), 'season': seasons,
+                                     'won': won, 'elo': elo, 'noise': rng.normal(size=len(seasons))})
+        self.param_distributions = {'C': [1e-4, 1.0, 10.0]}
+
+    def test_search_grid(self):
+        # Given
+        search = HyperparameterSearch(dataset=self.dataset, model=LogisticRegression(),
+                                      param_distributions=self.param_distributions, min_train_seasons=2)
+
+        # When
+        best_params = search.search(method='grid', n_jobs=1)
+
+        # Then
+        self.assertEqual(len(search.results_), 3)
+        self.assertEqual(search.best_score_, min(result['score'] for result in search.results_))
+        self.assertIn(best_params['C'], self.param_distributions['C'])
+
+    def test_search_halving(self):
+        # Given
+        search = HyperparameterSearch(dataset=self.dataset, model=LogisticRegression(),
+                                      param_distributions=self.param_distributions, min_train_seasons=1)
+
+        # When
+        search.search(method='halving', n_iter=None, factor=2, n_jobs=2)
+
+        # Then
+        nb_folds_by_round = sorted({result['nb_folds'] for result in search.results_})
+        # 3 candidates on the 3 most recent folds, then the best 2 on the 5 folds
+        self.assertListEqual(nb_folds_by_round, [3, 5])
+        self.assertEqual(len([result for result in search.results_ if result['nb_folds'] == 5]), 2)
+
+    def test_search_time_budget_and_save(self):
+        with tempfile.TemporaryDirectory() as params_dir:
+            # Given
+            search = HyperparameterSearch(dataset=self.dataset, model=LogisticRegression(),
+                                          param_distributions=self.param_distributions, min_train_seasons=2)
+            path = os.path.join(params_dir, 'params', 'model_params.json')
+
+            # When
+            best_params = search.search(method='random', n_iter=3, time_budget=0, n_jobs=1)
+            search.save(path)
+            with open(path) as params_file:
+                saved = json.load(params_file)
+
+        # Then
+        self.assertEqual(len(search.results_), 1)
+        self.assertDictEqual(saved['params'], best_params)
@@ -0,0 +1,46 @@
+"""Class to test ModelBuilder class."""
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from imblearn.over_sampling import RandomOverSampler
+from imblearn.pipeline import Pipeline
+from sklearn.linear_model import LogisticRegression
+
+from nba_odds.model.model_builder import ModelBuilder
+
+
+class TestModelBuilder(TestCase):
+    """Class to test ModelBuilder class."""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        seasons = np.repeat(np.arange(2010, 2015), 10)
+        elo = rng.normal(1500, 50, len(seasons))
+        won = np.zeros(len(seasons), dtype=bool)
+        for season in np.unique(seasons):
+            won[np.flatnonzero(seasons == season)[np.argmax(elo[seasons == season])]] = True
+        self.dataset = pd.DataFrame({'id': np.tile([f'T{i}' for i in range(10)], 5), 'season': seasons,
+                                     'won': won, 'elo': elo})
+
+    def test_backtest(self):
+        # Given
+        model = Pipeline([('sampling', RandomOverSampler(random_state=0)), ('class', LogisticRegression())])
+
+        # When
+        with tempfile.TemporaryDirectory() as cache_dir:
+            model_builder = ModelBuilder(dataset=self.dataset, model=model, scale=True, model_name='test',
+                                         cache_dir=cache_dir)
+            predictions, metrics = model_builder.backtest(min_train_seasons=2, n_jobs=2)
+            cached_predictions, _ = model_builder.backtest(min_train_seasons=2, n_jobs=1)
+
+        # Then
+        self.assertListEqual(list(predictions['season'].unique()), [2012, 2013, 2014])
+        self.assertEqual(len(predictions), 30)
+        self.assertSetEqual(set(metrics), {'mae', 'rmse', 'precision', 'recall'})
+        pd.testing.assert_frame_equal(predictions, cached_predictions)
+
+        # the best elo of each season gets the highest probability
+        best_teams = predictions.loc[predictions.groupby('season')['predictions'].idxmax()]
+        self.assertTrue(best_teams['won'].all())
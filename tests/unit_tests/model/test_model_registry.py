@@ -0,0 +1,80 @@
+"""Class to test ModelRegistry class."""
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from unittest import TestCase
+
+import numpy as np
+
+from nba_odds.model.model_registry import ModelRegistry
+
+
+class TestModelRegistry(TestCase):
+    """Class to test ModelRegistry class."""
+
+    def setUp(self):
+        self.greater_is_better = {'rmse': False, 'recall': True}
+        self.versions_metrics = [{'rmse': 0.2, 'recall': 0.5}, {'rmse': 0.1, 'recall': 0.25},
+                                 {'rmse': 0.3, 'recall': 1}]
+
+    def test_register_and_resolve(self):
+        with tempfile.TemporaryDirectory() as registry_dir:
+            # Given
+            registry = ModelRegistry(registry_dir=registry_dir)
+
+            # When
+            for index, metrics in enumerate(self.versions_metrics):
+                registry.register('preseason_lr', {'weights': np.full(10, index)}, metrics=metrics,
+                                  greater_is_better=self.greater_is_better, training_seasons=[2016, 2017],
+                                  columns=['elo'])
+            latest = registry.resolve('preseason_lr')
+            best_rmse = registry.resolve('preseason_lr', 'best:rmse')
+            best_recall = registry.load('preseason_lr', 'best:recall', mmap_mode='r', check_hash=True)
+            first = registry.load('preseason_lr', 1)
+
+            # Then
+            self.assertEqual(latest['version'], 3)
+            self.assertEqual(best_rmse['version'], 2)
+            self.assertListEqual(best_rmse['training_seasons'], [2016, 2017])
+            self.assertIsInstance(best_recall['weights'], np.memmap)
+            np.testing.assert_array_equal(best_recall['weights'], np.full(10, 2))
+            np.testing.assert_array_equal(first['weights'], np.zeros(10))
+            with self.assertRaises(FileNotFoundError):
+                registry.resolve('playoff_lr')
+
+    def test_load_compressed(self):
+        with tempfile.TemporaryDirectory() as registry_dir:
+            # Given
+            registry = ModelRegistry(registry_dir=registry_dir, compress=3)
+            registry.register('preseason_lr', {'weights': np.ones(10)})
+
+            # When
+            actual = registry.load('preseason_lr')
+
+        # Then
+        self.assertNotIsInstance(actual['weights'], np.memmap)
+        np.testing.assert_array_equal(actual['weights'], np.ones(10))
+
+    def test_concurrent_registrations_keep_every_version(self):
+        with tempfile.TemporaryDirectory() as registry_dir:
+            # Given
+            nb_processes, nb_versions = 4, 5
+
+            # When
+            with ProcessPoolExecutor(max_workers=nb_processes) as executor:
+                list(executor.map(_register_versions, [registry_dir] * nb_processes, [nb_versions] * nb_processes))
+            manifest = ModelRegistry(registry_dir=registry_dir).manifest('preseason_lr')
+            files = os.listdir(os.path.join(registry_dir, 'preseason_lr'))
+
+        # Then
+        self.assertEqual(manifest['latest'], nb_processes * nb_versions)
+        self.assertEqual(len(manifest['versions']), nb_processes * nb_versions)
+        self.assertEqual(manifest['best']['rmse'], 1)
+        self.assertFalse([filename for filename in files if filename.endswith('.tmp')])
+
+
+def _register_versions(registry_dir, nb_versions):
+    registry = ModelRegistry(registry_dir=registry_dir)
+    for _ in range(nb_versions):
+        registry.register('preseason_lr', {'weights': np.ones(10)}, metrics={'rmse': 0.1},
+                          greater_is_better={'rmse': False})
@@ -0,0 +1,42 @@
+"""Class to test OddsPredictor class."""
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+
+from nba_odds.config.config import Paths
+from nba_odds.model.model_builder import ModelBuilder
+from nba_odds.model.odds_predictor import OddsPredictor
+
+
+class TestOddsPredictor(TestCase):
+    """Class to test OddsPredictor class."""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        seasons = np.repeat(np.arange(2014, 2019), 10)
+        elo = rng.normal(1500, 50, len(seasons))
+        won = np.zeros(len(seasons), dtype=bool)
+        for season in np.unique(seasons):
+            won[np.flatnonzero(seasons == season)[np.argmax(elo[seasons == season])]] = True
+        self.dataset = pd.DataFrame({'id': np.tile([f'T{i}' for i in range(10)], 5), 'season': seasons,
+                                     'won': won, 'elo': elo, 'won_sum': rng.integers(20, 60, len(seasons))})
+
+    def test_predict_odds(self):
+        with tempfile.TemporaryDirectory() as model_dir, patch.object(Paths, 'model_dir', model_dir):
+            # Given
+            expected = ModelBuilder(dataset=self.dataset, model=LogisticRegression(), scale=True,
+                                    model_name='test').build()
+
+            # When
+            predictor = OddsPredictor.from_registry('test')
+            features = self.dataset.query('season == 2018')[['won_sum', 'elo', 'id', 'season']]
+            actual = predictor.predict_odds(features)
+
+        # Then
+        pd.testing.assert_frame_equal(actual, expected)
+        with self.assertRaises(ValueError):
+            predictor.predict_odds(features.drop(columns='elo'))
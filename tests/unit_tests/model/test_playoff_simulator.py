@@ -0,0 +1,55 @@
+"""Class to test PlayoffSimulator class."""
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from nba_odds.model.playoff_simulator import PlayoffSimulator
+
+
+class TestPlayoffSimulator(TestCase):
+    """Class to test PlayoffSimulator class."""
+
+    def setUp(self):
+        self.teams_elo = pd.DataFrame({'id': ['BOS', 'LAL', 'MIA', 'CHI', 'NYK', 'DAL'],
+                                       'elo': [1700, 1600, 1550, 1500, 1450, 1300]})
+
+    def test_bracket_order(self):
+        # When
+        actual = PlayoffSimulator._bracket_order(16) + 1
+
+        # Then
+        np.testing.assert_array_equal(actual, [1, 16, 8, 9, 4, 13, 5, 12, 2, 15, 7, 10, 3, 14, 6, 11])
+
+    def test_simulate_two_teams(self):
+        # Given
+        simulator = PlayoffSimulator(self.teams_elo, nb_playoff_teams=2, home_court_advantage=0)
+        # probability to win at least 4 of 7 games with a 0.64 probability to win each game
+        game_prob = 1 / (1 + 10 ** (-100 / 400))
+        combinations = {4: 35, 5: 21, 6: 7, 7: 1}  # number of ways to win k of 7 games
+        expected = sum(combinations[wins] * game_prob ** wins * (1 - game_prob) ** (7 - wins) for wins in range(4, 8))
+
+        # When
+        actual = simulator.simulate(n_simulations=200000, seed=1).set_index('id')
+
+        # Then
+        self.assertListEqual(list(actual.columns), ['playoffs', 'title', 'odds'])
+        self.assertAlmostEqual(actual.loc['BOS', 'title'], expected, places=2)
+        self.assertAlmostEqual(actual.loc['LAL', 'title'], 1 - expected, places=2)
+        self.assertTrue(np.isnan(actual.loc['DAL', 'odds']))
+
+    def test_simulate(self):
+        # Given
+        wins = pd.Series({'DAL': 60, 'BOS': 10})
+        remaining_games = pd.DataFrame({'home_id': ['BOS', 'LAL'], 'away_id': ['MIA', 'CHI']})
+        simulator = PlayoffSimulator(self.teams_elo, wins=wins, remaining_games=remaining_games, nb_playoff_teams=4)
+
+        # When
+        actual = simulator.simulate(n_simulations=20000, seed=3, chunk_size=5000)
+        actual_parallel = simulator.simulate(n_simulations=20000, seed=3, chunk_size=5000, n_jobs=2)
+
+        # Then
+        pd.testing.assert_frame_equal(actual, actual_parallel)
+        np.testing.assert_allclose(actual[simulator.columns].sum(), [4, 2, 1])
+        self.assertEqual(actual.set_index('id').loc['DAL', 'playoffs'], 1)
+        self.assertEqual(actual.set_index('id').loc['NYK', 'playoffs'], 0)
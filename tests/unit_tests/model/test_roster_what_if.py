@@ -0,0 +1,75 @@
+"""Class to test RosterWhatIf class."""
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+
+from nba_odds.features.player_efficiency_rating import PER
+from nba_odds.model.odds_predictor import OddsPredictor
+from nba_odds.model.roster_what_if import RosterWhatIf
+
+
+class TestRosterWhatIf(TestCase):
+    """Class to test RosterWhatIf class."""
+
+    def setUp(self):
+        self.players_per = pd.DataFrame(
+            {'player_id': ['a', 'b', 'c', 'd', 'e', 'f'],
+             'season': [2018, 2018, 2018, 2018, 2018, 2017],
+             'PER_mean': [30.0, 20.0, 10.0, 25.0, 5.0, 15.0],
+             'is_good_player': [True, False, False, True, False, False]}
+        )
+        self.players_team = pd.DataFrame(
+            {'player_id': ['a', 'b', 'c', 'd', 'e', 'f'],
+             'season': [2018, 2018, 2018, 2018, 2018, 2017],
+             'id': ['A', 'A', 'B', 'B', 'C', 'A']}
+        )
+        self.features = PER._aggregate_by_season_team(
+            pd.merge(self.players_per, self.players_team, on=['player_id', 'season'], how='left')
+        )
+        columns = PER.feature_columns()
+        model = LogisticRegression().fit(self.features[columns], [1, 0, 1, 0])
+        self.predictor = OddsPredictor({'model': model, 'scaler': None, 'columns': columns})
+
+    def test_team_per(self):
+        # Given
+        edits = pd.DataFrame({'scenario': ['trade', 'trade', 'injury', 'injury', 'unknown'],
+                              'player_id': ['a', 'c', 'd', 'c', 'z'],
+                              'season': [2018, 2018, 2018, 2018, 2018],
+                              'id': ['B', 'A', None, None, 'A']})
+        what_if = RosterWhatIf(self.players_per, self.players_team, self.features, self.predictor)
+
+        # When
+        actual = what_if.team_per(edits)
+
+        # Then
+        def edited_team_per(players_team):
+            return PER._aggregate_by_season_team(
+                pd.merge(self.players_per, players_team, on=['player_id', 'season'], how='left')
+            ).query('season == 2018')
+
+        trade = edited_team_per(self.players_team.assign(id=['B', 'A', 'A', 'B', 'C', 'A']))
+        expected_trade = trade[trade['id'].isin(['A', 'B'])].assign(scenario='trade')
+        expected_injury = pd.DataFrame({'scenario': ['injury'], 'season': [2018], 'id': ['B'], 'PER_mean_max': [np.nan],
+                                        'PER_mean_mean': [np.nan], 'PER_mean_sum': [np.nan],
+                                        'is_good_player_sum': [np.nan]})
+        expected = pd.concat([expected_trade, expected_injury])[actual.columns].reset_index(drop=True)
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+    def test_predict_odds(self):
+        # Given
+        edits = pd.DataFrame({'scenario': [0, 1], 'player_id': ['b', 'c'], 'season': [2018, 2018], 'id': ['C', 'A']})
+        what_if = RosterWhatIf(self.players_per, self.players_team, self.features, self.predictor)
+
+        # When
+        actual = what_if.predict_odds(edits)
+
+        # Then
+        expected = self.predictor.predict_odds(pd.concat([what_if.team_per(edits.iloc[[0]]),
+                                                          what_if.team_per(edits.iloc[[1]])]))
+        self.assertEqual(list(actual['scenario']), [0, 0, 1, 1])
+        np.testing.assert_allclose(actual['predictions'], expected['predictions'])
+        base_predictions = self.predictor.predict_odds(self.features).set_index(['season', 'id'])['predictions']
+        np.testing.assert_allclose(actual['base_predictions'],
+                                   base_predictions.loc[list(zip(actual['season'], actual['id']))])
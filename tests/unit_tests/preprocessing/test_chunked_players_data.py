@@ -0,0 +1,56 @@
+"""Class to test ChunkedPlayersData class."""
+import os
+import tempfile
+from unittest import TestCase
+
+import pandas as pd
+
+from nba_odds.application.synthetic_data import SyntheticData
+from nba_odds.features.player_efficiency_rating import PER
+from nba_odds.preprocessing.chunked_players_data import ChunkedPlayersData
+from nba_odds.preprocessing.games_per_team import GamesPerTeam
+from nba_odds.preprocessing.players_data import PlayersData
+from nba_odds.preprocessing.raw_data_loader import RawDataLoader
+
+
+def _aggregate_per(players_stats, regular_season_game_ids):
+    return (PER.aggregate_by_player_on_season(PER.compute_per_by_game(players_stats)),)
+
+
+def _sorted_by_player(df):
+    # the lines are the same, the order of the player ids categories depends on the order of the groupby
+    df = df.assign(player_id=df['player_id'].astype(str))
+    return df.sort_values(by=['player_id', 'season']).reset_index(drop=True)
+
+
+class TestChunkedPlayersData(TestCase):
+    """Class to test ChunkedPlayersData class."""
+
+    def test_build_data_is_the_same_as_on_the_whole_box_score(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            # Given
+            SyntheticData(first_season=2016, last_season=2018, nb_teams=8, nb_games_per_team=20, nb_playoff_teams=4,
+                          nb_players_per_game=6).write(data_dir)
+            loader = RawDataLoader(path_basket_ref_games=os.path.join(data_dir, SyntheticData.games_filename),
+                                   path_basket_ref_box_score=os.path.join(data_dir, SyntheticData.box_score_filename))
+            games_per_team = GamesPerTeam(basket_ref_games=loader.load_games()).build_dataset()
+            regular_season_game_ids = games_per_team['game_id'].iloc[::3]
+
+            players_stats, expected_players_team, expected_regular_season_players_team = (
+                PlayersData(games_per_team=games_per_team, basket_ref_box_score=loader.load_box_score())
+                .build_data_with_regular_season_teams(regular_season_game_ids=regular_season_game_ids)
+            )
+            expected_per_by_player = PER.aggregate_by_player_on_season(PER.compute_per_by_game(players_stats))
+
+            # When
+            actual_players_team, actual_regular_season_players_team, actual_per_by_player = (
+                ChunkedPlayersData(games_per_team=games_per_team, raw_data_loader=loader)
+                .build_data(regular_season_game_ids=regular_season_game_ids, aggregate=_aggregate_per)
+            )
+
+        # Then
+        pd.testing.assert_frame_equal(_sorted_by_player(actual_players_team), _sorted_by_player(expected_players_team))
+        pd.testing.assert_frame_equal(_sorted_by_player(actual_regular_season_players_team),
+                                      _sorted_by_player(expected_regular_season_players_team))
+        pd.testing.assert_frame_equal(_sorted_by_player(actual_per_by_player),
+                                      _sorted_by_player(expected_per_by_player))
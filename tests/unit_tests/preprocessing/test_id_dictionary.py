@@ -0,0 +1,53 @@
+"""Class to test IdDictionary class."""
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from nba_odds.preprocessing.id_dictionary import IdDictionary
+
+
+class TestIdDictionary(TestCase):
+    """Class to test IdDictionary class."""
+
+    def test_update_keeps_known_codes(self):
+        # Given
+        id_dictionary = IdDictionary(ids=['b', 'd'])
+
+        # When
+        nb_added = id_dictionary.update(['d', 'c', 'a', 'c', None])
+
+        # Then
+        self.assertEqual(nb_added, 2)
+        self.assertListEqual(list(id_dictionary.ids), ['b', 'd', 'a', 'c'])
+
+    def test_encode_and_decode(self):
+        # Given
+        id_dictionary = IdDictionary(ids=['b', 'd', 'a'])
+
+        # When
+        actual_codes = id_dictionary.encode(['a', 'b', 'e', 'a'])
+        actual_categorical_codes = id_dictionary.encode(pd.Categorical(['a', 'e', None, 'd']))
+        actual_ids = id_dictionary.decode(actual_codes)
+
+        # Then
+        np.testing.assert_array_equal(actual_codes, np.array([2, 0, -1, 2], dtype='int32'))
+        self.assertEqual(actual_codes.dtype, 'int32')
+        np.testing.assert_array_equal(actual_categorical_codes, np.array([2, -1, -1, 1], dtype='int32'))
+        self.assertListEqual(list(actual_ids), ['a', 'b', None, 'a'])
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            # Given
+            path = os.path.join(data_dir, 'ids', 'game_ids.parquet')
+            IdDictionary(ids=['b', 'a']).save(path)
+
+            # When
+            actual = IdDictionary.load(path)
+            actual_missing = IdDictionary.load(os.path.join(data_dir, 'missing.parquet'))
+
+        # Then
+        self.assertListEqual(list(actual.ids), ['b', 'a'])
+        self.assertEqual(len(actual_missing.ids), 0)
@@ -0,0 +1,99 @@
+"""Class to test PlayersData class."""
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from nba_odds.preprocessing.players_data import PlayersData
+
+
+class TestPlayersData(TestCase):
+    """Class to test PlayersData class."""
+
+    def test_build_data_with_regular_season_teams(self):
+        # Given
+        games_per_team = pd.DataFrame(
+            {'game_id': ['1', '2', '3', '1', '2', '3'],
+             'season': [2020] * 6,
+             'id': [5, 5, 6, 7, 8, 7]}
+        )
+        box_score = pd.DataFrame(
+            {'game_id': ['1', '2', '3', '3'],
+             'player_id': ['a', 'a', 'a', 'b'],
+             'mp': ['20,5', '30,0', '12,0', '40,0']}
+        )
+
+        # When
+        _, actual_players_team, actual_regular_season_players_team = (
+            PlayersData(games_per_team=games_per_team, basket_ref_box_score=box_score)
+            .build_data_with_regular_season_teams(regular_season_game_ids=['1'])
+        )
+
+        # Then
+        expected_players_team = pd.DataFrame({'player_id': ['a', 'b'], 'season': [2020, 2020], 'id': [5, 6]})
+        expected_regular_season_players_team = pd.DataFrame({'player_id': ['a'], 'season': [2020], 'id': [5]})
+        pd.testing.assert_frame_equal(actual_players_team, expected_players_team)
+        pd.testing.assert_frame_equal(actual_regular_season_players_team, expected_regular_season_players_team)
+        pd.testing.assert_frame_equal(
+            actual_players_team,
+            PlayersData(games_per_team=games_per_team, basket_ref_box_score=box_score).build_data()[1]
+        )
+
+    def test_build_data_ties_keep_the_first_team_to_appear(self):
+        # Given
+        rng = np.random.default_rng(0)
+        nb_games = 60
+        games_per_team = pd.DataFrame(
+            {'game_id': np.repeat([str(game) for game in range(nb_games)], 2),
+             'season': np.repeat(2020 + np.arange(nb_games) % 2, 2),
+             'id': rng.integers(0, 6, 2 * nb_games)}
+        )
+        box_score = pd.DataFrame(
+            {'game_id': [str(game) for game in rng.integers(0, nb_games, 80)],
+             'player_id': [f'p{player}' for player in rng.integers(0, 12, 80)],
+             'mp': '10,0'}
+        )
+        # teams 2, 3 and 0 appear 3 times, team 2 appears first
+        tied_games = pd.DataFrame({'game_id': [f't{game}' for game in range(14)], 'season': 2020,
+                                   'id': [1, 4, 2, 5, 2, 3, 3, 3, 5, 0, 2, 4, 0, 0]})
+        games_per_team = pd.concat([games_per_team, tied_games], ignore_index=True)
+        box_score = pd.concat([box_score, tied_games[['game_id']].assign(player_id='tied', mp='10,0')],
+                              ignore_index=True)
+        categorical_games_per_team = games_per_team.astype({'id': 'category'})
+        regular_season_game_ids = games_per_team['game_id'].iloc[::3]
+
+        # When
+        actual_players_team = PlayersData(games_per_team=games_per_team, basket_ref_box_score=box_score).build_data()[1]
+        _, actual_categorical_players_team, actual_regular_season_players_team = (
+            PlayersData(games_per_team=categorical_games_per_team, basket_ref_box_score=box_score)
+            .build_data_with_regular_season_teams(regular_season_game_ids=regular_season_game_ids)
+        )
+
+        # Then
+        self.assertEqual(actual_players_team.set_index('player_id').loc['tied', 'id'], 2)
+        pd.testing.assert_frame_equal(actual_players_team, _first_most_frequent_team(games_per_team, box_score))
+        pd.testing.assert_frame_equal(actual_categorical_players_team,
+                                      _first_most_frequent_team(categorical_games_per_team, box_score))
+        pd.testing.assert_frame_equal(
+            actual_regular_season_players_team,
+            _first_most_frequent_team(categorical_games_per_team, box_score, regular_season_game_ids)
+        )
+
+
+def _first_most_frequent_team(games_per_team, box_score, game_ids=None):
+    """ Most frequent team of each player season, the first one to appear on ties, with one pass over the lines."""
+    players_games_with_both_teams = pd.merge(box_score[['game_id', 'player_id']],
+                                             games_per_team[['game_id', 'id', 'season']], on='game_id', how='inner')
+    if game_ids is not None:
+        players_games_with_both_teams = players_games_with_both_teams[
+            players_games_with_both_teams['game_id'].isin(game_ids)
+        ]
+    team_counts = {}
+    for player_id, season, team in players_games_with_both_teams[['player_id', 'season', 'id']].itertuples(index=False):
+        player_counts = team_counts.setdefault((player_id, season), {})  # dicts keep the order of first appearance
+        player_counts[team] = player_counts.get(team, 0) + 1
+    players_with_teams = pd.DataFrame(
+        [(player_id, season, max(counts, key=counts.get)) for (player_id, season), counts in team_counts.items()],
+        columns=['player_id', 'season', 'id']
+    ).sort_values(by=['player_id', 'season']).reset_index(drop=True)
+    return players_with_teams.astype({'id': games_per_team['id'].dtype})
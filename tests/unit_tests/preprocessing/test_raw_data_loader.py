@@ -0,0 +1,106 @@
+"""Class to test RawDataLoader class."""
+import os
+import tempfile
+from unittest import TestCase
+
+import pandas as pd
+
+from nba_odds.config.config import BoxScoreRawSchema, GamesRawSchema
+from nba_odds.preprocessing.id_dictionary import IdDictionary
+from nba_odds.preprocessing.raw_data_loader import RawDataLoader
+
+
+class TestRawDataLoader(TestCase):
+    """Class to test RawDataLoader class."""
+
+    def test_load_games_and_box_score(self):
+        # Given
+        games = pd.DataFrame({column: [1, 2, 3] for column in GamesRawSchema.columns + ['unused']})
+        games['datetime'] = ['2017-01-01', '2018-01-01', '2019-01-01']
+        games['season'] = [2017, 2018, 2019]
+        games['game_id'] = ['1', '2', '3']
+        games['home_id'], games['away_id'] = ['A', 'B', 'C'], ['B', 'C', 'A']
+        for column in GamesRawSchema.decimal_columns:
+            games[column] = ['0,5', '1,25', '2']
+        box_score = pd.DataFrame({column: [4, 5, 6] for column in BoxScoreRawSchema.columns})
+        box_score['game_id'], box_score['player_id'], box_score['mp'] = ['1', '2', '3'], ['a', 'b', 'a'], ['1,5'] * 3
+
+        with tempfile.TemporaryDirectory() as data_dir:
+            games.to_parquet(os.path.join(data_dir, 'games.parquet'))
+            box_score.to_parquet(os.path.join(data_dir, 'box_score.parquet'))
+
+            # When
+            loader = RawDataLoader(path_basket_ref_games=os.path.join(data_dir, 'games.parquet'),
+                                   path_basket_ref_box_score=os.path.join(data_dir, 'box_score.parquet'),
+                                   first_season=2018)
+            actual_games = loader.load_games()
+            actual_box_score = loader.load_box_score()
+
+        # Then
+        self.assertListEqual(list(actual_games.columns), GamesRawSchema.columns)
+        self.assertListEqual(list(actual_games['season']), [2018, 2019])
+        self.assertListEqual(list(actual_games['home_efg']), [1.25, 2.0])
+        self.assertEqual(actual_games['datetime'].dtype, 'datetime64[ns]')
+        self.assertListEqual(list(actual_games['home_id'].cat.categories), ['A', 'B', 'C'])
+        self.assertListEqual(list(actual_games['away_id'].cat.categories), ['A', 'B', 'C'])
+        self.assertListEqual(list(actual_box_score['game_id']), ['2', '3'])
+        self.assertListEqual(list(actual_box_score['mp']), [1.5, 1.5])
+        self.assertEqual(actual_box_score['fg'].dtype, 'int16')
+
+    def test_iter_box_score_by_season(self):
+        # Given
+        box_score = pd.DataFrame({column: range(7) for column in BoxScoreRawSchema.columns})
+        box_score['game_id'] = ['1', '2', '1', '3', '4', '3', '3']
+        box_score['player_id'], box_score['mp'] = ['a', 'b', 'c', 'a', 'b', 'c', 'd'], ['1,5'] * 7
+        games_seasons = pd.Series([2017, 2018, 2017], index=['1', '3', '2'])
+
+        with tempfile.TemporaryDirectory() as data_dir:
+            box_score.to_parquet(os.path.join(data_dir, 'box_score.parquet'))
+
+            # When
+            loader = RawDataLoader(path_basket_ref_games=None,
+                                   path_basket_ref_box_score=os.path.join(data_dir, 'box_score.parquet'))
+            seasons = list(loader.iter_box_score_by_season(games_seasons=games_seasons, batch_size=2))
+
+        # Then
+        self.assertListEqual([season for season, _ in seasons], [2017, 2018])
+        self.assertListEqual(list(seasons[0][1]['game_id']), ['1', '2', '1'])
+        self.assertListEqual(list(seasons[0][1]['player_id']), ['a', 'b', 'c'])
+        self.assertListEqual(list(seasons[1][1]['game_id']), ['3', '3', '3'])
+        self.assertListEqual(list(seasons[1][1]['mp']), [1.5] * 3)
+        self.assertEqual(seasons[1][1]['fg'].dtype, 'int16')
+
+    def test_load_with_id_dictionary(self):
+        # Given
+        games = pd.DataFrame({column: [1, 2, 3] for column in GamesRawSchema.columns})
+        games['datetime'] = ['2017-01-01', '2018-01-01', '2019-01-01']
+        games['season'] = [2017, 2018, 2019]
+        games['game_id'] = ['1', '2', '3']
+        games['home_id'], games['away_id'] = ['A', 'B', 'C'], ['B', 'C', 'A']
+        box_score = pd.DataFrame({column: range(5) for column in BoxScoreRawSchema.columns})
+        box_score['game_id'], box_score['player_id'] = ['3', '2', '5', '3', '1'], ['a', 'b', 'a', 'c', 'b']
+        id_dictionary = IdDictionary(ids=['3'])
+
+        with tempfile.TemporaryDirectory() as data_dir:
+            games.to_parquet(os.path.join(data_dir, 'games.parquet'))
+            box_score.to_parquet(os.path.join(data_dir, 'box_score.parquet'))
+
+            # When
+            loader = RawDataLoader(path_basket_ref_games=os.path.join(data_dir, 'games.parquet'),
+                                   path_basket_ref_box_score=os.path.join(data_dir, 'box_score.parquet'),
+                                   first_season=2018, id_dictionary=id_dictionary)
+            actual_games = loader.load_games()
+            actual_box_score = loader.load_box_score()
+            actual_seasons = list(loader.iter_box_score_by_season(
+                games_seasons=actual_games.set_index('game_id')['season'], batch_size=2
+            ))
+
+        # Then
+        self.assertListEqual(list(id_dictionary.ids), ['3', '2'])
+        self.assertListEqual(list(actual_games['game_id']), [1, 0])
+        self.assertEqual(actual_games['game_id'].dtype, 'int32')
+        self.assertListEqual(list(actual_box_score['game_id']), [0, 1, 0])
+        self.assertEqual(actual_box_score['game_id'].dtype, 'int32')
+        self.assertListEqual([season for season, _ in actual_seasons], [2018, 2019])
+        self.assertListEqual(list(actual_seasons[1][1]['game_id']), [0, 0])
+        self.assertListEqual(list(actual_seasons[1][1]['player_id']), ['a', 'c'])
@@ -0,0 +1,37 @@
+"""Class to test SplitPlayoff class."""
+from unittest import TestCase
+
+import pandas as pd
+
+from nba_odds.preprocessing.split_on_playoffs import SplitPlayoff
+
+
+class SmallSeasonsSplitPlayoff(SplitPlayoff):
+    nb_games_per_team_regular = 2
+    nb_teams_before_2004 = 1
+    nb_teams_after_2004 = 2
+
+
+class TestSplitPlayoff(TestCase):
+    """Class to test SplitPlayoff class."""
+
+    def test_compute_phase(self):
+        # Given
+        games_per_team = pd.DataFrame(
+            {'datetime': pd.to_datetime(['2003-01-01', '2003-01-01', '2003-01-03', '2003-01-03', '2003-01-05',
+                                         '2003-01-05', '2010-01-01', '2010-01-01', '2010-01-03', '2010-01-03',
+                                         '2010-01-03', '2010-01-03', '2010-01-09', '2010-01-09']),
+             'season': [2003] * 6 + [2010] * 8}
+        )
+
+        # When
+        actual = SmallSeasonsSplitPlayoff.compute_phase(games_per_team)
+
+        # Then
+        expected = pd.Categorical(['regular'] * 2 + ['playoff'] * 4 + ['regular'] * 6 + ['playoff'] * 2,
+                                  categories=['regular', 'playoff'])
+        pd.testing.assert_extension_array_equal(actual, expected)
+        pd.testing.assert_frame_equal(
+            SmallSeasonsSplitPlayoff(games_per_team=games_per_team.assign(phase=actual)).keep_only_regular_season(),
+            games_per_team.assign(phase=actual).iloc[[0, 1, 6, 7, 8, 9, 10, 11]]
+        )